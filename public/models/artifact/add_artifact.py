@@ -1,10 +1,11 @@
 import sys
 import os
-import shutil
 from PyQt5.QtWidgets import QWidget, QFileDialog, QMessageBox, QListWidgetItem
 from PyQt5.uic import loadUi
 from PyQt5.QtCore import pyqtSignal, QDate
 from db import db
+from translations import translations
+import image_store
 
 class AddArtifactWindow(QWidget):
     goArtifacts = pyqtSignal()
@@ -18,6 +19,8 @@ class AddArtifactWindow(QWidget):
             return
             
         self.selected_images = []
+        self.pending_data = None
+        self.t = translations["ar"]
         self.load_combos()
         
         self.dateRetrieval.setDate(QDate.currentDate())
@@ -26,6 +29,10 @@ class AddArtifactWindow(QWidget):
         if hasattr(self, "dateEditing"):
             self.dateEditing.setDate(QDate.currentDate())
 
+        # الصور المختارة تُحفظ في الخلفية (نافذة تقدم وإلغاء)، ثم القطعة
+        self.ingest = image_store.ImageIngest(self)
+        self.ingest.stored.connect(self.insert_new_artifact)
+
         # Buttons
         self.btnAddImages.clicked.connect(self.pick_images)
         self.btnSave.clicked.connect(self.save_data)
@@ -33,6 +40,7 @@ class AddArtifactWindow(QWidget):
 
     def set_translation(self, t):
         """تحديث النصوص حسب اللغة"""
+        self.t = t
         self.pageTitle.setText(t["add_title"])
         
         self.groupBoxBasic.setTitle(t["grp_basic"])
@@ -90,6 +98,7 @@ class AddArtifactWindow(QWidget):
             self.lblImagesCount.setText(f"{len(self.selected_images)}")
 
     def save_data(self):
+        if self.ingest.is_running(): return
         name = self.inputName.text().strip()
         inv = self.inputInventoryNo.text().strip()
 
@@ -133,22 +142,25 @@ class AddArtifactWindow(QWidget):
             "editing_date": edit_date
         }
 
-        new_id = db.insert_artifact(data)
-        
+        self.pending_data = data
+        if self.selected_images:
+            self.ingest.start(self.selected_images, self.t)
+        else:
+            self.insert_new_artifact([])
+
+    def insert_new_artifact(self, images):
+        """القطعة وأسطر صورها في معاملة واحدة، بعد وصول ملفات الصور إلى المخزن"""
+        try:
+            with db.transaction():
+                new_id = db.insert_artifact(self.pending_data)
+                if new_id: image_store.insert_images(db, new_id, images)
+        except Exception as e:
+            print(f"❌ Save Error: {e}")
+            new_id = None
+
         if new_id:
-            folder = "artifact_images"
-            if not os.path.exists(folder): os.makedirs(folder)
-            
-            for img_path in self.selected_images:
-                safe_inv = inv.replace("/", "-").replace("\\", "-")
-                filename = f"{new_id}_{safe_inv}_{os.path.basename(img_path)}"
-                dest = os.path.join(folder, filename)
-                try:
-                    shutil.copy(img_path, dest)
-                    db.insert_image(new_id, filename)
-                except: pass
-            
             # حفظ صامت ونقل مباشر
             self.goArtifacts.emit()
         else:
+            image_store.remove_new(images)
             QMessageBox.critical(self, "خطأ", "فشل الحفظ")
@@ -2,15 +2,47 @@ import sys
 import os
 from PyQt5.QtWidgets import QWidget, QMessageBox
 from PyQt5.uic import loadUi
-from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import pyqtSignal, QObject, QRunnable, QThreadPool
 from db import db
+import image_store
+import thumbnails
+
+class ImageSignals(QObject):
+    loaded = pyqtSignal(int, object, object)   # (generation, مفتاح الذاكرة المؤقتة، QImage أو None)
+
+class ImageWorker(QRunnable):
+    """فك معاينة صورة واحدة بحجم الإطار في خيط خلفي (توليدها أولاً إن لم تكن على القرص).
+    العمل الذي أصبح قديماً (قطعة أخرى أو مغادرة الصفحة) لا يبدأ ولا تُرسل نتيجته."""
+
+    def __init__(self, generation, key, is_stale):
+        super().__init__()
+        self.generation = generation
+        self.key = key   # (image_path, "fitted", w, h)
+        self.is_stale = is_stale
+        self.signals = ImageSignals()
+
+    def run(self):
+        if self.is_stale(self.generation): return
+        image_path, _, width, height = self.key
+        try:
+            image = thumbnails.read_fitted(image_path, width, height)
+        except Exception as e:
+            print(f"⚠️ Image Error ({image_path}): {e}")
+            image = None
+        if not self.is_stale(self.generation):
+            self.signals.loaded.emit(self.generation, self.key, image)
 
 class ArtifactDetailsWindow(QWidget):
     goBack = pyqtSignal()
     goEdit = pyqtSignal(int)
 
-    def __init__(self, artifact_id):
+    # حقول القطعة (تُفرغ قبل عرض قطعة أخرى في نفس الصفحة)
+    VALUE_LABELS = ["valInventory", "valCode", "valName", "valSource", "valType", "valMaterial", "valDimensions",
+                    "valWeight", "valPeriod", "valCondition", "valStorage", "valDescription", "valNotes",
+                    "valEditor", "valEditDate"]
+
+    def __init__(self, artifact_id=None):
         super().__init__()
         try:
             loadUi("artifact_details.ui", self)
@@ -18,12 +50,15 @@ class ArtifactDetailsWindow(QWidget):
             print(f"Error loading UI: {e}")
             return
 
-        self.artifact_id = artifact_id
+        self.artifact_id = None
         self.images = []
         self.current_img_idx = 0
 
-        self.load_data()
-        self.load_images()
+        # الصور تُفك في الخلفية: الصورة المعروضة أولاً (أولوية أعلى) ثم التالية والسابقة مسبقاً
+        self.image_pool = QThreadPool(self)
+        self.image_pool.setMaxThreadCount(2)
+        self.image_generation = 0   # يزداد مع كل قطعة جديدة أو مغادرة للصفحة؛ النتائج القديمة تُهمل
+        self.pending_images = set()
 
         # Connections
         self.btnBack.clicked.connect(self.goBack.emit)
@@ -32,8 +67,20 @@ class ArtifactDetailsWindow(QWidget):
         self.btnDelete.clicked.connect(self.delete_artifact)
         self.btnEdit.clicked.connect(lambda: self.goEdit.emit(self.artifact_id))
 
+        if artifact_id is not None:
+            self.set_artifact(artifact_id)
+
+    def set_artifact(self, artifact_id):
+        """عرض قطعة أخرى في نفس الصفحة (بدون إعادة تحميل ملف ui)"""
+        self.artifact_id = artifact_id
+        self.cancel_images()
+        self.load_data()
+        self.load_images()
+
     def load_data(self):
         data = db.get_artifact(self.artifact_id)
+        for name in self.VALUE_LABELS:
+            getattr(self, name).clear()
         if data:
             # تعبئة الحقول الأساسية
             self.valInventory.setText(data['inventory_number'])
@@ -65,6 +112,7 @@ class ArtifactDetailsWindow(QWidget):
 
     def load_images(self):
         self.images = db.get_artifact_images(self.artifact_id)
+        self.current_img_idx = 0
         if self.images:
             self.current_img_idx = 0
             self.show_image()
@@ -74,20 +122,63 @@ class ArtifactDetailsWindow(QWidget):
 
     def show_image(self):
         if not self.images: return
-        
-        img_data = self.images[self.current_img_idx]
-        img_path = os.path.join("artifact_images", img_data['image_path'])
-        
-        if os.path.exists(img_path):
-            pixmap = QPixmap(img_path)
-            self.lblImage.setPixmap(pixmap.scaled(
-                self.lblImage.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-            ))
+
+        key = self.image_key(self.current_img_idx)
+        pixmap = thumbnails.pixmap_cache.get(key)
+        if pixmap is not None:
+            self.lblImage.setPixmap(pixmap)
         else:
-            self.lblImage.setText("ملف الصورة غير موجود")
-            
+            self.lblImage.setText("جاري تحميل الصورة...")
+            self.request_image(key, priority=1)
+
+        # التالية والسابقة جاهزتان قبل الضغط على الأسهم
+        for step in (1, -1):
+            neighbour = self.image_key((self.current_img_idx + step) % len(self.images))
+            if neighbour not in thumbnails.pixmap_cache:
+                self.request_image(neighbour)
+
         self.lblImageCounter.setText(f"{self.current_img_idx + 1} / {len(self.images)}")
 
+    def image_key(self, index):
+        """مفتاح الصورة في thumbnails.pixmap_cache: المعاينة مصغرة لحجم الإطار الحالي"""
+        size = self.lblImage.size()
+        return (self.images[index]['image_path'], "fitted", size.width(), size.height())
+
+    def request_image(self, key, priority=0):
+        if key in self.pending_images: return
+        self.pending_images.add(key)
+        worker = ImageWorker(self.image_generation, key, self.is_stale)
+        worker.signals.loaded.connect(self.on_image_loaded)
+        self.image_pool.start(worker, priority)
+
+    def on_image_loaded(self, generation, key, image):
+        if self.is_stale(generation): return
+        self.pending_images.discard(key)
+        pixmap = None
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)  # QPixmap في خيط الواجهة فقط
+            thumbnails.pixmap_cache.put(key, pixmap)
+        # بالمسار وليس بكل المفتاح: إذا تغير حجم الإطار أثناء الفك تُعرض الصورة على أي حال (scaledContents)
+        if self.images and key[0] == self.images[self.current_img_idx]['image_path']:
+            if pixmap is not None:
+                self.lblImage.setPixmap(pixmap)
+            else:
+                self.lblImage.setText("ملف الصورة غير موجود")
+
+    def cancel_images(self):
+        """إهمال كل الصور المطلوبة: ما لم يبدأ يُحذف من الطابور، وما يعمل لا تُعرض نتيجته"""
+        self.image_generation += 1
+        self.image_pool.clear()
+        self.pending_images.clear()
+
+    def is_stale(self, generation):
+        return generation != self.image_generation
+
+    def hideEvent(self, event):
+        # مغادرة الصفحة (قائمة، تعديل، خروج...): لا فائدة من إكمال الفك
+        self.cancel_images()
+        super().hideEvent(event)
+
     def next_image(self):
         if self.images:
             self.current_img_idx = (self.current_img_idx + 1) % len(self.images)
@@ -102,6 +193,7 @@ class ArtifactDetailsWindow(QWidget):
         reply = QMessageBox.question(self, "حذف", "هل أنت متأكد من حذف هذه القطعة نهائياً؟", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
             if db.delete_artifact(self.artifact_id):
+                image_store.collect_garbage(db)  # صور القطعة التي لا تستعملها قطعة أخرى
                 QMessageBox.information(self, "نجاح", "تم الحذف بنجاح")
                 self.goBack.emit()
             else:
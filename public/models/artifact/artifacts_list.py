@@ -1,9 +1,50 @@
+import os
 import sys
 from PyQt5 import QtWidgets
-from PyQt5.QtWidgets import QWidget, QTableWidgetItem, QPushButton
+from PyQt5.QtWidgets import QWidget, QFileDialog, QMessageBox, QProgressDialog
 from PyQt5.uic import loadUi
-from PyQt5.QtCore import pyqtSignal
-from db import db
+from PyQt5.QtCore import pyqtSignal, QTimer, Qt, QObject, QRunnable, QThreadPool
+from artifacts_model import ArtifactsTableModel
+from delegates import ActionButtonsDelegate
+from db import db, FACET_TABLES
+from exporter import export_artifacts, ExportCancelled
+from translations import translations
+
+# انتظار توقف المستخدم عن الكتابة قبل تنفيذ البحث (ms)
+SEARCH_DELAY_MS = 250
+
+class ExportSignals(QObject):
+    progress = pyqtSignal(int)        # عدد القطع المكتوبة
+    finished = pyqtSignal(int, str)   # (العدد، الملف)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class ExportWorker(QRunnable):
+    """تصدير نتيجة البحث الحالية في خيط خلفي؛ الإلغاء لا يترك ملفاً ناقصاً"""
+
+    def __init__(self, path, query, filters, sort=None):
+        super().__init__()
+        self.path = path
+        self.query = query
+        self.filters = filters
+        self.sort = sort
+        self.cancel_requested = False
+        self.signals = ExportSignals()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            with db.thread_connection():
+                written = export_artifacts(db, self.path, self.query, self.filters, on_progress=self.signals.progress.emit,
+                                           is_cancelled=lambda: self.cancel_requested, sort=self.sort)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(written, self.path)
 
 class ArtifactsListWindow(QWidget):
     goDashboard = pyqtSignal()
@@ -20,7 +61,22 @@ class ArtifactsListWindow(QWidget):
             print(f"Error loading UI: {e}")
             return
 
-        self.load_data()
+        # النموذج يجلب الصفوف صفحة بصفحة عند التمرير
+        self.model = ArtifactsTableModel(self)
+        self.artifactsTable.setModel(self.model)
+        self.setup_table()
+
+        self.t = translations["ar"]
+        self.setup_filters()
+        # الصفحة الأولى تُجلب عند عرض الصفحة (MainApp.switch_page → load_data)
+
+        self.export_pool = QThreadPool(self)
+        self.export_pool.setMaxThreadCount(1)
+        self.export_worker = None
+        self.export_dialog = None
+
+        if hasattr(self, "btnExport"):
+            self.btnExport.clicked.connect(self.export_results)
 
         if hasattr(self, "btnAdd"):
             self.btnAdd.clicked.connect(self.goAddArtifact.emit)
@@ -29,7 +85,12 @@ class ArtifactsListWindow(QWidget):
             self.btnSearch.clicked.connect(self.search)
             
         if hasattr(self, "searchInput"):
-            self.searchInput.textChanged.connect(self.search)
+            # البحث بعد توقف الكتابة (debounce) بدل استعلام لكل حرف
+            self.search_timer = QTimer(self)
+            self.search_timer.setSingleShot(True)
+            self.search_timer.setInterval(SEARCH_DELAY_MS)
+            self.search_timer.timeout.connect(self.search)
+            self.searchInput.textChanged.connect(self.on_search_text_changed)
 
     def set_translation(self, t):
         """تحديث النصوص عند تغيير اللغة"""
@@ -37,17 +98,18 @@ class ArtifactsListWindow(QWidget):
         if hasattr(self, "searchInput"): self.searchInput.setPlaceholderText(t["search_ph"])
         if hasattr(self, "btnSearch"): self.btnSearch.setText(t["btn_search"])
         if hasattr(self, "btnAdd"): self.btnAdd.setText(t["btn_new"])
+        if hasattr(self, "btnExport"): self.btnExport.setText(t["btn_export"])
+        if hasattr(self, "btnClearFilters"): self.btnClearFilters.setText(t["btn_clear_filters"])
+        self.t = t
+        if self.last_counts: self.on_facets_loaded(self.last_counts)
         
         # تحديث عناوين الجدول (تأكد من إضافة col_inv و col_store في ملف الترجمة لاحقاً)
         # حالياً سنتركها كما هي في التصميم أو نحدثها يدوياً
         # headers = [t["col_inv"], t["col_code"], t["col_name"], t["col_type"], t["col_material"], t["col_store"], t["col_action"]]
         # self.artifactsTable.setHorizontalHeaderLabels(headers)
 
-    def load_data(self, query=""):
-        results = db.search_artifacts(query)
-        
+    def setup_table(self):
         table = self.artifactsTable
-        table.setRowCount(0)
         head = table.horizontalHeader()
         head.setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
         # ضبط عرض الأعمدة
@@ -55,32 +117,149 @@ class ArtifactsListWindow(QWidget):
         table.setColumnWidth(1, 120) # الكود
         table.setColumnWidth(2, 250) # الاسم
         table.setColumnWidth(5, 150) # الموقع
-        table.setColumnWidth(6, 120) # زر التفاصيل
+        table.setColumnWidth(ArtifactsTableModel.ACTION_COLUMN, 120) # زر التفاصيل
 
-        for row_idx, item in enumerate(results):
-            table.insertRow(row_idx)
-            
-            # تعبئة الخلايا (لاحظ الترتيب الجديد)
-            table.setItem(row_idx, 0, QTableWidgetItem(str(item['id']))) # رقم الجرد
-            table.setItem(row_idx, 1, QTableWidgetItem(str(item['inv_num'])))      # الكود الآلي
-            table.setItem(row_idx, 2, QTableWidgetItem(item['name']))
-            table.setItem(row_idx, 3, QTableWidgetItem(item['type']))
-            table.setItem(row_idx, 4, QTableWidgetItem(item['material']))
-            table.setItem(row_idx, 5, QTableWidgetItem(item['storage']))      # الموقع
-            
-            # زر التفاصيل
-            btn_details = QPushButton("عرض التفاصيل")
-            btn_details.setStyleSheet("""
-                QPushButton { background-color: #3498db; color: white; border-radius: 5px; padding: 5px; font-size: 12px; }
-                QPushButton:hover { background-color: #2980b9; }
-            """)
-            
+        # الضغط على عنوان العمود: تصاعدي ← تنازلي ← الترتيب الافتراضي (الترتيب في SQL)
+        head.setSectionsClickable(True)
+        head.setSortIndicatorShown(True)
+        head.setSortIndicator(-1, Qt.AscendingOrder)
+        head.sectionClicked.connect(self.on_header_clicked)
+
+        # زر التفاصيل مرسوم (delegate) وليس QPushButton لكل صف
+        self.actions_delegate = ActionButtonsDelegate(
+            [("details", "عرض التفاصيل", "#3498db", "#2980b9")], table
+        )
+        self.actions_delegate.clicked.connect(self.on_row_action)
+        table.setItemDelegateForColumn(ArtifactsTableModel.ACTION_COLUMN, self.actions_delegate)
+        table.setMouseTracking(True)
+
+    def setup_filters(self):
+        """قوائم الفلاتر: كل خيار يعرض عدد النتائج مع البحث والفلاتر الأخرى الحالية"""
+        names = {"type": "comboType", "material": "comboMaterial", "period": "comboPeriod",
+                 "condition": "comboCondition", "storage": "comboStorage"}
+        self.filter_combos = {facet: getattr(self, name) for facet, name in names.items() if hasattr(self, name)}
+        self.last_counts = None
+        for combo in self.filter_combos.values():
+            combo.currentIndexChanged.connect(self.search)
+        if hasattr(self, "btnClearFilters"):
+            self.btnClearFilters.clicked.connect(self.clear_filters)
+        self.model.facetsLoaded.connect(self.on_facets_loaded)
+
+    def filters(self):
+        return {facet: combo.currentData() for facet, combo in self.filter_combos.items() if combo.currentData()}
+
+    def clear_filters(self):
+        for combo in self.filter_combos.values():
+            combo.blockSignals(True)
+            combo.setCurrentIndex(0)
+            combo.blockSignals(False)
+        self.search()
+
+    def on_facets_loaded(self, counts):
+        """إعادة ملء القوائم بالأعداد الجديدة مع الحفاظ على الاختيار الحالي"""
+        self.last_counts = counts
+        for facet, combo in self.filter_combos.items():
+            selected = combo.currentData()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem(f"{self.t['flt_' + facet]}: {self.t['flt_all']}", None)
+            for item_id, name, count in counts.get(facet, []):
+                combo.addItem(f"{name} ({count})", item_id)
+            if selected and combo.findData(selected) < 0:
+                # الاختيار الحالي بلا نتائج مع نص البحث الجديد: يبقى ظاهراً بعدد 0
+                combo.addItem(f"{db.lookup_name(FACET_TABLES[facet], selected)} (0)", selected)
+            combo.setCurrentIndex(max(combo.findData(selected), 0) if selected else 0)
+            combo.blockSignals(False)
+
+    def on_header_clicked(self, section):
+        key = self.model.sort_key(section)
+        current = self.model.sort
+        if key is None:
+            sort = current
+        elif current is None or current[0] != key:
+            sort = (key, False)
+        elif not current[1]:
+            sort = (key, True)
+        else:
+            sort = None
+
+        head = self.artifactsTable.horizontalHeader()
+        if sort is None:
+            head.setSortIndicator(-1, Qt.AscendingOrder)
+        else:
+            column = [self.model.sort_key(c) for c in range(self.model.columnCount())].index(sort[0])
+            head.setSortIndicator(column, Qt.DescendingOrder if sort[1] else Qt.AscendingOrder)
+        if sort != current:
+            self.model.set_sort(sort)
+
+    def load_data(self, query=""):
+        # الصفحة الأولى فقط، والباقي يُجلب عند التمرير (fetchMore)
+        self.model.set_query(query, self.filters())
+
+    def on_row_action(self, action, row):
+        if action == "details":
             # نمرر الـ ID الحقيقي للصف لقاعدة البيانات
-            real_id = item['real_id'] 
-            btn_details.clicked.connect(lambda checked, a_id=real_id: self.goDetails.emit(a_id))
-            
-            table.setCellWidget(row_idx, 6, btn_details)
+            self.goDetails.emit(self.model.real_id(row))
+
+    def on_search_text_changed(self):
+        # حرف جديد: البحث الجاري أصبح قديماً، نلغيه فوراً وننتظر توقف الكتابة
+        self.model.cancel()
+        self.search_timer.start()
 
     def search(self):
+        self.search_timer.stop()
         text = self.searchInput.text().strip()
         self.load_data(text)
+
+    # ---------------------------------------------------------
+    #  Export (نتيجة البحث والفلاتر الحالية، أو كل الأرشيف)
+    # ---------------------------------------------------------
+    def export_results(self):
+        if self.export_worker: return
+        path, selected = QFileDialog.getSaveFileName(self, self.t["btn_export"], "artifacts.xlsx",
+                                                     "Excel (*.xlsx);;CSV (*.csv);;JSON Lines (*.jsonl)")
+        if not path: return
+        if not os.path.splitext(path)[1]:
+            path += selected[selected.find("*") + 1:-1] if "*" in selected else ".xlsx"
+
+        query, filters = self.model.query, self.model.filters
+        # العدد معروف مسبقاً لكل الأرشيف (جدول الإحصائيات)؛ لنتيجة بحث أو فلتر نعرض شريطاً غير محدد
+        total = 0 if query or filters else db.get_artifacts_count()
+        # نفس ترتيب القائمة المعروضة (عمود الترتيب الذي اختاره المستخدم)
+        self.export_worker = ExportWorker(path, query, filters, self.model.sort)
+        self.export_dialog = QProgressDialog(self.t["export_progress"].format(written=0),
+                                             self.t["btn_cancel"], 0, total, self)
+        self.export_dialog.setWindowModality(Qt.WindowModal)
+        self.export_dialog.setMinimumDuration(0)
+        self.export_dialog.setAutoClose(False)
+        self.export_dialog.setAutoReset(False)
+        self.export_dialog.canceled.connect(self.export_worker.cancel)
+
+        signals = self.export_worker.signals
+        signals.progress.connect(self.on_export_progress)
+        signals.finished.connect(self.on_export_finished)
+        signals.failed.connect(self.on_export_failed)
+        signals.cancelled.connect(self.end_export)
+        self.btnExport.setEnabled(False)
+        self.export_pool.start(self.export_worker)
+
+    def on_export_progress(self, written):
+        if self.export_dialog:
+            self.export_dialog.setLabelText(self.t["export_progress"].format(written=written))
+            if self.export_dialog.maximum(): self.export_dialog.setValue(min(written, self.export_dialog.maximum()))
+
+    def on_export_finished(self, written, path):
+        self.end_export()
+        QMessageBox.information(self, self.t["btn_export"], self.t["export_done"].format(written=written, file=path))
+
+    def on_export_failed(self, error):
+        self.end_export()
+        QMessageBox.warning(self, "خطأ", self.t["export_failed"].format(error=error))
+
+    def end_export(self):
+        if self.export_dialog:
+            self.export_dialog.canceled.disconnect()
+            self.export_dialog.close()
+        self.export_dialog = None
+        self.export_worker = None
+        self.btnExport.setEnabled(True)
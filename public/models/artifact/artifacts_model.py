@@ -0,0 +1,164 @@
+import sqlite3
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, pyqtSignal
+from db import db
+
+class PageSignals(QObject):
+    loaded = pyqtSignal(int, list, object, object)   # (generation, rows, next_cursor, facet counts أو None)
+    failed = pyqtSignal(int, str)
+
+class PageWorker(QRunnable):
+    """جلب صفحة واحدة من facet_page في خيط خلفي (مع عدد النتائج لكل فلتر في الصفحة الأولى).
+    إذا أصبح البحث قديماً (كتب المستخدم حرفاً جديداً) يُقطع الاستعلام عبر progress handler."""
+
+    def __init__(self, generation, query, filters, sort, after, limit, is_stale):
+        super().__init__()
+        self.generation = generation
+        self.query = query
+        self.filters = filters
+        self.sort = sort
+        self.after = after
+        self.limit = limit
+        self.is_stale = is_stale
+        self.signals = PageSignals()
+
+    def run(self):
+        if self.is_stale(self.generation): return
+        try:
+            # كل تشغيل في QThreadPool بحالة خيط جديدة: الاتصال يُغلق هنا وإلا بقي مفتوحاً
+            with db.thread_connection(), db.cancellable(lambda: self.is_stale(self.generation)):
+                rows, cursor, counts = db.facet_page(self.query, self.filters, self.after, self.limit, self.sort)
+        except sqlite3.OperationalError as e:
+            if not self.is_stale(self.generation):
+                self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.loaded.emit(self.generation, rows, cursor, counts)
+
+class ArtifactsTableModel(QAbstractTableModel):
+    """نموذج جدول قائمة الآثار: يجلب النتائج صفحة بصفحة عند التمرير
+    (canFetchMore / fetchMore) بدل تحميل كل الأرشيف في الذاكرة."""
+
+    PAGE_SIZE = 200
+
+    # عدد النتائج لكل خيار في الفلاتر، مع أول صفحة من كل بحث جديد (انظر db.facet_counts)
+    facetsLoaded = pyqtSignal(object)
+
+    # (مفتاح القيمة في صف search_page، عنوان العمود الافتراضي)
+    COLUMNS = [
+        ("id", "رقم الجرد"),
+        ("inv_num", "الكود الآلي"),
+        ("name", "اسم القطعة"),
+        ("type", "النوع"),
+        ("material", "المادة"),
+        ("storage", "الموقع"),
+        ("date", "تاريخ الترميم"),
+        ("weight", "الوزن"),
+        (None, "إجراءات"),
+    ]
+    ACTION_COLUMN = 8
+
+    # عمود القائمة → مفتاح الترتيب في db.search_page (الترتيب يتم في SQL وليس في الذاكرة)
+    SORT_KEYS = {"id": "code", "inv_num": "inv_num", "name": "name", "type": "type",
+                 "material": "material", "storage": "storage", "date": "date", "weight": "weight"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = [title for _, title in self.COLUMNS]
+        self.query = ""
+        self.filters = {}
+        self.sort = None   # (مفتاح الترتيب، تنازلي؟) أو None = الترتيب الافتراضي
+        self.rows = []
+        self.cursor = None
+        self.exhausted = True
+
+        # خيط واحد مخصص للبحث: الاستعلامات لا تعمل أبداً على خيط الواجهة
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0   # يزداد مع كل بحث جديد؛ النتائج القديمة تُهمل
+        self.loading = False
+        self.worker = None
+
+    # ---------------------------------------------------------
+    #  Query
+    # ---------------------------------------------------------
+    def set_query(self, query="", filters=None):
+        """بدء بحث جديد (نص + فلاتر {facet: id}): تفريغ النموذج ثم جلب الصفحة الأولى فقط (في الخلفية)"""
+        self.cancel()
+        self.beginResetModel()
+        self.query = query
+        self.filters = dict(filters or {})
+        self.rows = []
+        self.cursor = None
+        self.exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def sort_key(self, column):
+        return self.SORT_KEYS.get(self.COLUMNS[column][0])
+
+    def set_sort(self, sort):
+        """ترتيب جديد: إعادة البحث الحالي من الصفحة الأولى بالترتيب الجديد"""
+        self.sort = sort
+        self.set_query(self.query, self.filters)
+
+    def cancel(self):
+        """إلغاء أي صفحة قيد التحميل (يُقطع الاستعلام الجاري في SQLite). لا صفحات أخرى للبحث الملغى
+        حتى set_query التالي: التمرير أثناء انتظار الكتابة لا يجلب صفحة للنص القديم."""
+        self.generation += 1
+        self.loading = False
+        self.exhausted = True
+
+    def is_stale(self, generation):
+        return generation != self.generation
+
+    def real_id(self, row):
+        return self.rows[row]["real_id"]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted or self.loading: return
+        self.loading = True
+        self.worker = PageWorker(self.generation, self.query, self.filters, self.sort, self.cursor, self.PAGE_SIZE, self.is_stale)
+        self.worker.signals.loaded.connect(self.on_page_loaded)
+        self.worker.signals.failed.connect(self.on_page_failed)
+        self.pool.start(self.worker)
+
+    def on_page_loaded(self, generation, page, cursor, counts):
+        if self.is_stale(generation): return
+        self.loading = False
+        self.cursor = cursor
+        self.exhausted = cursor is None
+        if counts is not None: self.facetsLoaded.emit(counts)
+        if not page: return
+
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def on_page_failed(self, generation, error):
+        if self.is_stale(generation): return
+        print(f"Search Error: {error}")
+        self.loading = False
+        self.exhausted = True
+
+    # ---------------------------------------------------------
+    #  QAbstractTableModel
+    # ---------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole: return None
+        key = self.COLUMNS[index.column()][0]
+        if key is None: return None  # عمود الإجراءات يرسمه ActionButtonsDelegate
+        return str(self.rows[index.row()][key])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return None
+        if orientation == Qt.Horizontal: return self.headers[section]
+        return section + 1
@@ -1,5 +1,6 @@
-from PyQt6.QtWidgets import QWidget, QPushButton, QMessageBox
+from PyQt5.QtWidgets import QWidget, QMessageBox, QTableWidgetItem
 from db import db
+from delegates import ActionButtonsDelegate
 from ui_artifacts_page import Ui_ArtifactsPage
 
 class ArtifactsPage(QWidget):
@@ -8,6 +9,16 @@ class ArtifactsPage(QWidget):
         self.ui = Ui_ArtifactsPage()
         self.ui.setupUi(self)
 
+        # أزرار الإجراءات مرسومة بالـ delegate بدل ثلاثة QPushButton لكل صف
+        self.actions_delegate = ActionButtonsDelegate([
+            ("edit", "تعديل", "#f39c12", "#e67e22"),
+            ("delete", "حذف", "#e74c3c", "#c0392b"),
+            ("view", "عرض", "#3498db", "#2980b9"),
+        ], self.ui.tableArtifacts)
+        self.actions_delegate.clicked.connect(self.on_row_action)
+        self.ui.tableArtifacts.setItemDelegateForColumn(7, self.actions_delegate)
+        self.ui.tableArtifacts.setMouseTracking(True)
+
         self.load_artifacts()
 
         self.ui.searchBox.textChanged.connect(self.search)
@@ -22,34 +33,18 @@ class ArtifactsPage(QWidget):
         """)
 
         table = self.ui.tableArtifacts
-        table.setRowCount(0)
-
-        for row_data in rows:
-            row = table.rowCount()
-            table.insertRow(row)
+        table.setRowCount(len(rows))
+        self.row_ids = [row_data[0] for row_data in rows]
 
+        for row, row_data in enumerate(rows):
             for col, value in enumerate(row_data):
                 table.setItem(row, col, QTableWidgetItem(str(value)))
 
-            # أزرار الإجراءات
-            btnEdit = QPushButton("تعديل")
-            btnDelete = QPushButton("حذف")
-            btnView = QPushButton("عرض")
-
-            btnEdit.clicked.connect(lambda _, r=row_data[0]: self.edit_artifact(r))
-            btnDelete.clicked.connect(lambda _, r=row_data[0]: self.delete_artifact(r))
-            btnView.clicked.connect(lambda _, r=row_data[0]: self.view_artifact(r))
-
-            table.setCellWidget(row, 7, self.build_actions(btnEdit, btnDelete, btnView))
-
-    def build_actions(self, *buttons):
-        w = QWidget()
-        layout = QHBoxLayout()
-        for b in buttons:
-            layout.addWidget(b)
-        layout.setContentsMargins(0, 0, 0, 0)
-        w.setLayout(layout)
-        return w
+    def on_row_action(self, action, row):
+        artifact_id = self.row_ids[row]
+        if action == "edit": self.edit_artifact(artifact_id)
+        elif action == "delete": self.delete_artifact(artifact_id)
+        elif action == "view": self.view_artifact(artifact_id)
 
     def search(self):
         text = self.ui.searchBox.text()
@@ -68,7 +63,7 @@ class ArtifactsPage(QWidget):
     def delete_artifact(self, artifact_id):
         confirm = QMessageBox.question(self, "تأكيد", "هل أنت متأكد من حذف القطعة؟")
         if confirm == QMessageBox.StandardButton.Yes:
-            db.execute("DELETE FROM artifacts WHERE id = %s", (artifact_id,))
+            db.delete_artifact(artifact_id)
             self.load_artifacts()
 
     def view_artifact(self, artifact_id):
@@ -0,0 +1,105 @@
+"""قياس أداء تحميل لوحة التحكم وقائمة الآثار على قاعدة بيانات كبيرة.
+
+الاستعمال:
+    python benchmark_db.py [عدد_القطع]
+
+ينشئ قاعدة مؤقتة (100,000 قطعة افتراضياً) ويقارن بين:
+  - per-call : فتح وإغلاق اتصال في كل استدعاء (السلوك القديم)
+  - pooled   : اتصال دائم لكل خيط مع ذاكرة الاستعلامات المحضّرة
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+
+from db import Database
+
+REPEATS = 5
+
+
+def build_catalog(db, n_artifacts, seed=42):
+    """ملء قاعدة فارغة بعدد n_artifacts من القطع (بيانات عشوائية ثابتة البذرة)"""
+    rnd = random.Random(seed)
+    with db.transaction() as cur:
+        lookups = {
+            "artifact_types": ["مخطوطة", "سلاح", "آنية فخارية", "عملة نقدية", "تمثال"],
+            "materials": ["ذهب", "فضة", "برونز", "حديد", "فخار"],
+            "historical_periods": ["العصر الإسلامي", "العصر العثماني", "العصر الروماني"],
+            "preservation_states": ["ممتازة", "جيدة", "تحتاج ترميم", "تالفة جزئياً"],
+            "storage_locations": ["المستودع الرئيسي A", "المستودع الفرعي B", "قاعة العرض 1"],
+        }
+        ids = {}
+        for table, names in lookups.items():
+            cur.executemany(f"INSERT INTO {table} (name) VALUES (?)", [(n,) for n in names])
+            ids[table] = [r[0] for r in cur.execute(f"SELECT id FROM {table}")]
+        cur.executemany("UPDATE preservation_states SET severity = ? WHERE name = ?",
+                        [(2, "تحتاج ترميم"), (3, "تالفة جزئياً")])
+
+        rows = (
+            (str(i).zfill(9), f"{i}/أ", f"قطعة رقم {i}",
+             rnd.choice(ids["artifact_types"]), rnd.choice(ids["materials"]),
+             rnd.choice(ids["historical_periods"]), rnd.choice(ids["preservation_states"]),
+             rnd.choice(ids["storage_locations"]))
+            for i in range(1, n_artifacts + 1)
+        )
+        cur.executemany("""
+            INSERT INTO artifacts (artifact_code, inventory_number, name,
+                                   artifact_type_id, material_id, historical_period_id,
+                                   preservation_state_id, storage_location_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        cur.execute("UPDATE sequences SET current_value = ? WHERE name = 'artifact_code_seq'", (n_artifacts,))
+
+
+def dashboard_load(db, per_call):
+    """نفس الاستدعاءات التي ينفذها DashboardWindow عند العرض"""
+    calls = [
+        lambda: db.count("artifacts"),
+        lambda: db.count("storage_locations"),
+        lambda: db.count("users"),
+        db.get_maintenance_alerts_count,
+        lambda: db.get_recent_artifacts(limit=5),
+        db.get_artifacts_by_type,
+        db.get_artifacts_by_condition,
+    ]
+    for call in calls:
+        call()
+        if per_call: db.close()
+
+
+def list_load(db, per_call):
+    """نفس استدعاء ArtifactsListWindow.load_data بدون نص بحث"""
+    db.search_artifacts("")
+    if per_call: db.close()
+
+
+def timed(func, *args):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    n_artifacts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        print(f"⚙️ Building catalog with {n_artifacts:,} artifacts...")
+        build_catalog(db, n_artifacts)
+        db.close()
+
+        print(f"{'scenario':<12}{'per-call (ms)':>16}{'pooled (ms)':>16}")
+        for name, func in (("dashboard", dashboard_load), ("list", list_load)):
+            before = timed(func, db, True)
+            db.close()
+            after = timed(func, db, False)
+            print(f"{name:<12}{before:>16.2f}{after:>16.2f}")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
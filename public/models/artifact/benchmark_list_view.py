@@ -0,0 +1,100 @@
+"""قياس أداء جدول قائمة الآثار: QPushButton لكل صف مقابل عمود مرسوم بالـ delegate.
+
+الاستعمال:
+    QT_QPA_PLATFORM=offscreen python benchmark_list_view.py [10000 50000 200000]
+
+لكل حجم يُشغَّل كل أسلوب في عملية (process) مستقلة لقياس الذاكرة بشكل نظيف:
+  - widgets  : QTableWidget + setCellWidget(QPushButton) لكل صف (الأسلوب القديم)
+  - delegate : QTableView + ArtifactsTableModel + ActionButtonsDelegate
+الأرقام: زمن تعبئة الجدول، زمن التمرير من الأعلى للأسفل، وزيادة الذاكرة (RSS).
+"""
+import os
+import subprocess
+import sys
+import time
+
+SCROLL_STEPS = 50
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def fake_rows(n):
+    return [{
+        "id": str(i).zfill(9), "inv_num": f"{i}/أ", "name": f"قطعة رقم {i}",
+        "type": "مخطوطة", "material": "فخار", "storage": "المستودع الرئيسي A",
+        "date": "2023-05-14", "weight": f"{i % 900 + 10} g", "real_id": i,
+    } for i in range(n, 0, -1)]
+
+
+def build_widgets(rows):
+    from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QPushButton
+    table = QTableWidget(0, 9)
+    for row_idx, item in enumerate(rows):
+        table.insertRow(row_idx)
+        for col, key in enumerate(("id", "inv_num", "name", "type", "material", "storage", "date", "weight")):
+            table.setItem(row_idx, col, QTableWidgetItem(str(item[key])))
+        btn = QPushButton("عرض التفاصيل")
+        btn.setStyleSheet("QPushButton { background-color: #3498db; color: white; border-radius: 5px; padding: 5px; }")
+        btn.clicked.connect(lambda checked, a_id=item["real_id"]: None)
+        table.setCellWidget(row_idx, 8, btn)
+    return table
+
+
+def build_delegate(rows):
+    from PyQt5.QtWidgets import QTableView
+    from artifacts_model import ArtifactsTableModel
+    from delegates import ActionButtonsDelegate
+    table = QTableView()
+    model = ArtifactsTableModel(table)
+    model.rows = rows
+    table.setModel(model)
+    delegate = ActionButtonsDelegate([("details", "عرض التفاصيل", "#3498db", "#2980b9")], table)
+    table.setItemDelegateForColumn(ArtifactsTableModel.ACTION_COLUMN, delegate)
+    return table
+
+
+def run_one(variant, n):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    rows = fake_rows(n)
+    base = rss_mb()
+
+    start = time.perf_counter()
+    table = (build_widgets if variant == "widgets" else build_delegate)(rows)
+    table.resize(1100, 700)
+    table.show()
+    app.processEvents()
+    populate = time.perf_counter() - start
+
+    bar = table.verticalScrollBar()
+    start = time.perf_counter()
+    for step in range(SCROLL_STEPS + 1):
+        bar.setValue(bar.maximum() * step // SCROLL_STEPS)
+        table.viewport().repaint()
+        app.processEvents()
+    scroll = time.perf_counter() - start
+
+    print(f"{populate * 1000:.0f} {scroll * 1000:.0f} {rss_mb() - base:.0f}")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 50_000, 200_000]
+    print(f"{'rows':>8} {'variant':<10}{'populate (ms)':>15}{'scroll (ms)':>13}{'RSS +MB':>10}")
+    for n in sizes:
+        for variant in ("widgets", "delegate"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", variant, str(n)],
+                capture_output=True, text=True,
+            ).stdout.split()
+            populate, scroll, rss = out[-3:] if len(out) >= 3 else ("-", "-", "-")
+            print(f"{n:>8} {variant:<10}{populate:>15}{scroll:>13}{rss:>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,265 @@
+"""مجموعة قياس أداء قاعدة البيانات على أرشيف مولّد بـ seed_data.py، مع مقارنة بنتائج مرجعية.
+
+الاستعمال:
+    python benchmark_suite.py [--scale 10k] [--seed 1] [--db PATH] [--only get_artifact ...]
+                              [--save] [--tolerance 0.5] [--baseline benchmark_baseline.json]
+
+بدون --db يُولَّد الأرشيف في مجلد مؤقت. مع --db يُحفظ الأرشيف المولّد في هذا الملف ليُعاد
+استعماله في المرات القادمة (يجب أن يكون مولّداً بنفس --scale و --seed)؛ القياس يتم دائماً على نسخة منه.
+القياسات بذاكرة دافئة (تشغيل أول غير محسوب)، وأفضل جولة من ROUNDS لكل قياس. insert_artifact يضيف قطعاً مع صورتين لكل منها
+و delete_artifact يحذفها (مع الصور والفهرس النصي والعدادات)، فيعود الأرشيف كما كان.
+
+النتائج المرجعية محفوظة في benchmark_baseline.json لكل حجم (--save يكتبها أو يحدّثها).
+أي قياس أبطأ من المرجع بأكثر من tolerance يظهر كتراجع ورمز الخروج 1.
+المرجع خاص بالجهاز الذي قيس عليه: على جهاز آخر احفظ مرجعاً جديداً قبل المقارنة.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from seed_data import LOOKUPS, artifact_data, generate_catalog, parse_scale
+
+BASELINE_FILE = "benchmark_baseline.json"
+# العمليات الصغيرة (أقل من 1ms) تتغير بـ 30-40% بين تشغيلين على نفس الجهاز؛ التراجع الحقيقي
+# (فهرس لا يُستعمل مثلاً) يظهر كأضعاف وليس كنسبة صغيرة
+TOLERANCE = 0.5
+# فروق أصغر من هذا (ms) ضجيج قياس، لا تعتبر تراجعاً مهما كانت نسبتها
+MIN_DELTA_MS = 0.1
+
+SEARCH_TERMS = ["سيف", "جرة مزخرفة", "épée", "Tipasa", "1234"]
+OPS = {
+    "get_artifact": 500,
+    "search_artifacts": 10,  # كل عملية = كل نصوص SEARCH_TERMS
+    "search_page": 30,       # كل عملية = الصفحة الأولى لكل نص (ومن دون نص)
+    "dashboard": 20,
+    "insert_artifact": 200,
+    "delete_artifact": 200,  # نفس القطع التي أضافها insert_artifact
+}
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+# =========================================================
+#  Benchmarks: كل دالة تعيد مدة كل عملية (ms)
+# =========================================================
+
+def bench_get_artifact(db, rnd, ctx):
+    ids = rnd.sample(range(1, ctx["artifacts"] + 1), min(OPS["get_artifact"], ctx["artifacts"]))
+    return [_timed(db.get_artifact, i) for i in ids]
+
+
+def search_all(db):
+    for term in SEARCH_TERMS:
+        db.search_artifacts(term)
+
+
+def first_pages(db):
+    for term in [""] + SEARCH_TERMS:
+        db.search_page(term, None, 50)
+
+
+def bench_search_artifacts(db, rnd, ctx):
+    return [_timed(search_all, db) for _ in range(OPS["search_artifacts"])]
+
+
+def bench_search_page(db, rnd, ctx):
+    return [_timed(first_pages, db) for _ in range(OPS["search_page"])]
+
+
+def dashboard_load(db):
+    """نفس أرقام get_dashboard_snapshot بدون الذاكرة المؤقتة، مع صفحة التنبيهات الأولى"""
+    with db.transaction(immediate=False):
+        db.get_artifacts_count()
+        db.count("storage_locations")
+        db.count("users")
+        db.get_maintenance_alerts_count()
+        db.get_maintenance_alerts(limit=20)
+        db.get_recent_artifacts(limit=5)
+        db.get_artifacts_by_type()
+        db.get_artifacts_by_condition()
+        db.get_artifacts_by_period()
+        db.get_artifacts_by_material()
+        db.get_artifacts_by_storage()
+
+
+def bench_dashboard(db, rnd, ctx):
+    return [_timed(dashboard_load, db) for _ in range(OPS["dashboard"])]
+
+
+def bench_insert_artifact(db, rnd, ctx):
+    ids = {table: [r["id"] for r in db.get_list(table)] for table in LOOKUPS}
+    times, ctx["inserted"] = [], []
+    with contextlib.redirect_stdout(io.StringIO()):  # insert_artifact يطبع سطراً لكل قطعة
+        for data in artifact_data(rnd, OPS["insert_artifact"], ids):
+            start = time.perf_counter()
+            new_id = db.insert_artifact(data)
+            times.append((time.perf_counter() - start) * 1000)
+            ctx["inserted"].append(new_id)
+            for k in range(2):
+                db.insert_image(new_id, f"{new_id}_bench_{k}.jpg")
+    return times
+
+
+def bench_delete_artifact(db, rnd, ctx):
+    return [_timed(db.delete_artifact, artifact_id) for artifact_id in ctx.pop("inserted", [])]
+
+
+BENCHMARKS = {
+    "get_artifact": bench_get_artifact,
+    "search_artifacts": bench_search_artifacts,
+    "search_page": bench_search_page,
+    "dashboard": bench_dashboard,
+    "insert_artifact": bench_insert_artifact,
+    "delete_artifact": bench_delete_artifact,
+}
+# قراءة فقط: تُشغّل مرة قبل القياس لتدفئة الذاكرة
+_WARMUP = {"get_artifact", "search_artifacts", "search_page", "dashboard"}
+# كل القياسات تُعاد ROUNDS مرة ويُحتفظ بالجولة الأسرع لكل قياس (كما في timeit):
+# الجولات الأبطأ تقيس غالباً انشغال الجهاز وليس الكود
+ROUNDS = 3
+
+
+def run_suite(db, n_artifacts, only=None, seed=1, rounds=ROUNDS):
+    """{name: {"ops", "median_ms", "p95_ms"}} لكل قياس مطلوب (بالترتيب: القراءة ثم الإضافة ثم الحذف)"""
+    names = [name for name in BENCHMARKS if not only or name in only]
+    if "delete_artifact" in names and "insert_artifact" not in names:
+        names.insert(names.index("delete_artifact"), "insert_artifact")  # الحذف يحتاج القطع المضافة
+
+    results = {}
+    for name in names:
+        if name in _WARMUP:
+            BENCHMARKS[name](db, random.Random(seed), {"artifacts": n_artifacts})
+
+    for _ in range(rounds):
+        ctx = {"artifacts": n_artifacts}
+        for name in names:
+            gc.disable()
+            try:
+                times = sorted(BENCHMARKS[name](db, random.Random(seed), ctx))
+            finally:
+                gc.enable()
+            if only and name not in only: continue
+            median = statistics.median(times)
+            if name not in results or median < results[name]["median_ms"]:
+                results[name] = {
+                    "ops": len(times),
+                    "median_ms": round(median, 4),
+                    "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 4),
+                }
+    return results
+
+
+# =========================================================
+#  Baseline
+# =========================================================
+
+def machine_info():
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version, "cpus": os.cpu_count()}
+
+
+def load_baselines(path):
+    if not os.path.exists(path): return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, key, entry):
+    baselines = load_baselines(path)
+    baselines[key] = entry
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, tolerance):
+    """طباعة جدول النتائج مع الفرق عن المرجع؛ تعيد أسماء القياسات المتراجعة"""
+    regressions = []
+    print(f"{'benchmark':<18}{'ops':>6}{'median ms':>12}{'p95 ms':>10}{'baseline':>12}{'change':>10}")
+    for name, r in results.items():
+        base = (baseline or {}).get("results", {}).get(name)
+        line = f"{name:<18}{r['ops']:>6}{r['median_ms']:>12.3f}{r['p95_ms']:>10.3f}"
+        if base:
+            change = r["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+            regressed = change > tolerance and r["median_ms"] - base["median_ms"] > MIN_DELTA_MS
+            if regressed: regressions.append(name)
+            line += f"{base['median_ms']:>12.3f}{change:>+9.0%}{'  ❌' if regressed else ''}"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1M or a number")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="generated catalog to reuse (created if missing)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline for this scale")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    args = parser.parse_args()
+
+    try:
+        n_artifacts = parse_scale(args.scale)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    from db import Database
+    with tempfile.TemporaryDirectory() as tmp:
+        # القياس دائماً على نسخة: الإضافة والحذف يغيران ترتيب الصفحات في الملف،
+        # فالملف المحفوظ في --db يبقى كما وُلّد وتبدأ كل مرة من نفس الحالة
+        path = os.path.join(tmp, "bench.db")
+        if args.db and os.path.exists(args.db):
+            shutil.copyfile(args.db, path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = Database(path)
+        if not args.db or not os.path.exists(args.db):
+            print(f"🏺 توليد {n_artifacts:,} قطعة (seed={args.seed})...")
+            start = time.perf_counter()
+            generate_catalog(db, n_artifacts, args.seed)
+            print(f"   {time.perf_counter() - start:.1f} s")
+            if args.db:
+                db.close_all()  # آخر إغلاق يفرغ WAL في الملف الرئيسي قبل النسخ
+                shutil.copyfile(path, args.db)
+        elif db.get_artifacts_count() != n_artifacts:
+            print(f"❌ {args.db} فيه {db.get_artifacts_count():,} قطعة وليس {n_artifacts:,}")
+            raise SystemExit(1)
+
+        results = run_suite(db, n_artifacts, args.only, args.seed)
+        db.close_all()
+
+    key = str(n_artifacts)
+    baseline = load_baselines(args.baseline).get(key)
+    if baseline and baseline.get("seed") != args.seed:
+        print(f"⚠️ المرجع مقيس بـ seed={baseline.get('seed')}")
+    if baseline and baseline.get("machine") != machine_info():
+        print(f"⚠️ المرجع مقيس على جهاز أو إصدار مختلف: {baseline.get('machine')}")
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        entry = {"seed": args.seed, "machine": machine_info(),
+                 "results": {**(baseline or {}).get("results", {}), **results}}
+        save_baseline(args.baseline, key, entry)
+        print(f"💾 تم حفظ المرجع ({n_artifacts:,} قطعة) في {args.baseline}")
+    elif regressions:
+        print(f"❌ تراجع في: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
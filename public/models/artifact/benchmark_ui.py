@@ -0,0 +1,335 @@
+"""قياس زمن تشغيل الواجهة والتنقل بين الصفحات (بدون شاشة، QT_QPA_PLATFORM=offscreen) على أرشيف مولّد.
+
+الاستعمال:
+    python benchmark_ui.py [--scale 10k 100k] [--seed 1] [--runs 3] [--cache-dir DIR]
+                           [--role admin] [--label v1.4] [--out ui_timings.jsonl]
+
+لكل حجم يُولَّد أرشيف بـ seed_data.py (أو يُعاد استعماله من --cache-dir)، ثم تُشغَّل الواجهة
+--runs مرة، كل مرة في عملية مستقلة (تشغيل بارد: الاستيراد وقراءة ملفات ui من جديد):
+  - import_ms           : من بداية العملية حتى استيراد main.py (مع PyQt5)
+  - startup_ms          : start_main_app (ما يحدث بعد نجاح تسجيل الدخول: MainApp.__init__ والعرض)
+  - first_paint_ms      : من start_main_app إلى أول رسم للوحة التحكم
+  - login_to_usable_ms  : من start_main_app إلى رسم لوحة التحكم كاملة (مع المخططات)
+  - process_paint_ms    : من بداية العملية إلى أول رسم للوحة التحكم
+  - nav_list_ms         : أول ضغط على زر القائمة (مع إنشاء الصفحة) حتى رسم أول صفحة نتائج (تُجلب في الخلفية)
+  - nav_dashboard_ms    : العودة للوحة التحكم حتى رسمها (اللقطة محفوظة إن لم تتغير البيانات). شاشة
+                          offscreen صغيرة: النافذة تتسع لعرض صفحة القائمة فيُعاد ترتيب اللوحة مرة واحدة هنا
+  - rss_mb              : ذاكرة العملية بعد التنقل
+وأيضاً المدة الكلية وعدد الاستدعاءات لكل مرحلة داخلية (TIMED: استيراد الوحدات أينما حدث، loadUi لكل ملف،
+إنشاء كل صفحة، load_data، load_stats، المخططات...). المدد شاملة: إنشاء لوحة التحكم يتضمن loadUi الخاص بها.
+
+النتائج: جدول (الوسيط بين التشغيلات) وسطر JSON لكل حجم يضاف إلى --out، مع الجهاز والـ commit و --label،
+لمتابعة زمن التشغيل والتنقل من إصدار لآخر.
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+OUT_FILE = "ui_timings.jsonl"
+# أقصى انتظار لرسم صفحة (s): بعده تُسجل المدة كـ None بدل تعليق القياس
+PAINT_TIMEOUT = 60
+
+METRICS = ["import_ms", "startup_ms", "first_paint_ms", "login_to_usable_ms", "process_paint_ms",
+           "nav_list_ms", "nav_dashboard_ms", "rss_mb"]
+
+# الوحدات التي يُقاس استيرادها والدوال المقاسة في كل منها؛ تُلف عند أول استيراد للوحدة أينما حدث
+# (الصفحات و QtChart و bcrypt تُستورد عند الحاجة فقط، فيظهر زمن استيرادها في المرحلة التي طلبتها)
+TIMED = {
+    "db": {"Database": ["__init__"]},
+    "login": {},
+    "main": {"MainApp": ["__init__", "create_page", "change_language", "switch_page"]},
+    "dashboard": {"DashboardWindow": ["__init__", "load_stats", "load_alerts_page", "create_charts",
+                                      "create_pie_chart", "create_bar_chart"]},
+    "artifacts_list": {"ArtifactsListWindow": ["__init__", "load_data", "on_facets_loaded"]},
+    "artifacts_model": {"ArtifactsTableModel": ["on_page_loaded"]},
+    "add_artifact": {"AddArtifactWindow": ["__init__"]},
+    "settings": {"SettingsWindow": ["__init__"]},
+    "users": {"UsersWindow": ["__init__", "load_data"]},
+    "exporter": {}, "importer": {}, "PyQt5.QtChart": {}, "bcrypt": {},
+}
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+# =========================================================
+#  Child process: تشغيل واحد للواجهة
+# =========================================================
+
+class Phases:
+    """المدة الكلية (ms) وعدد الاستدعاءات لكل مرحلة مسماة"""
+
+    def __init__(self):
+        self.totals = {}
+
+    def add(self, name, ms):
+        total = self.totals.setdefault(name, {"calls": 0, "ms": 0.0})
+        total["calls"] += 1
+        total["ms"] += ms
+
+    def wrap(self, owner, attr, name=None):
+        """استبدال owner.attr بنسخة تقيس مدتها (قبل إنشاء أي كائن وقبل ربط الإشارات)"""
+        func = getattr(owner, attr)
+        name = name or f"{owner.__name__}.{attr}"
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, (time.perf_counter() - start) * 1000)
+
+        setattr(owner, attr, timed)
+
+
+def run_one(role):
+    process_start = time.perf_counter()
+    phases = Phases()
+
+    # استيراد الوحدات في TIMED: المدة، ثم لف دوالها
+    import builtins
+    real_import = builtins.__import__
+
+    def timed_import(name, *args, **kwargs):
+        if name not in TIMED or name in sys.modules:
+            return real_import(name, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return real_import(name, *args, **kwargs)
+        finally:
+            phases.add(f"import {name}", (time.perf_counter() - start) * 1000)
+            # دالة غير موجودة (إصدار أقدم من الواجهة) لا تُقاس ببساطة
+            for cls_name, attrs in TIMED[name].items():
+                cls = getattr(sys.modules.get(name), cls_name, None)
+                for attr in attrs:
+                    if hasattr(cls, attr): phases.wrap(cls, attr)
+
+    builtins.__import__ = timed_import
+
+    start = time.perf_counter()
+    from PyQt5 import uic
+    from PyQt5.QtCore import QObject, QEvent, QEventLoop
+    from PyQt5.QtWidgets import QApplication
+    phases.add("import PyQt5", (time.perf_counter() - start) * 1000)
+
+    # كل الصفحات تستورد loadUi من PyQt5.uic: الاستبدال قبل استيرادها
+    load_ui = uic.loadUi
+
+    def timed_load_ui(uifile, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return load_ui(uifile, *args, **kwargs)
+        finally:
+            phases.add(f"loadUi {uifile}", (time.perf_counter() - start) * 1000)
+
+    uic.loadUi = timed_load_ui
+
+    app = QApplication(sys.argv)
+    import main
+    result = {"import_ms": (time.perf_counter() - process_start) * 1000}
+
+    class PaintProbe(QObject):
+        """وقت أول رسم داخل widget() (أو أحد أبنائه) يكون فيه ready() صحيحاً.
+        المراقبة على مستوى التطبيق: الصفحة قد لا تكون موجودة بعد عند بدء المراقبة."""
+
+        def __init__(self, widget, ready=lambda: True):
+            super().__init__()
+            self.widget = widget
+            self.ready = ready
+            self.painted_at = None
+            app.installEventFilter(self)
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and self.painted_at is None:
+                widget = self.widget()
+                if widget is not None and (obj is widget or widget.isAncestorOf(obj)) and self.ready():
+                    self.painted_at = time.perf_counter()
+            return False
+
+        def wait(self, since):
+            deadline = time.perf_counter() + PAINT_TIMEOUT
+            while self.painted_at is None and time.perf_counter() < deadline:
+                app.processEvents(QEventLoop.AllEvents, 10)
+            app.removeEventFilter(self)
+            return None if self.painted_at is None else (self.painted_at - since) * 1000
+
+    def dashboard():
+        window = getattr(main, "window", None)
+        return getattr(window, "page_dashboard", None)
+
+    # 1. ما بعد تسجيل الدخول: MainApp تعرض نفسها وتبدأ بلوحة التحكم، والمخططات بعد أول رسم
+    main.Session.role = role
+    first = PaintProbe(dashboard)
+    usable = PaintProbe(dashboard, lambda: dashboard().chartLayout1.count() > 0)
+    start = time.perf_counter()
+    main.start_main_app()
+    result["startup_ms"] = (time.perf_counter() - start) * 1000
+    result["first_paint_ms"] = first.wait(start)
+    result["login_to_usable_ms"] = usable.wait(start)
+    result["process_paint_ms"] = None if first.painted_at is None else (first.painted_at - process_start) * 1000
+    window = main.window
+
+    # 2. القائمة (تُنشأ عند أول زيارة): الصفحة الأولى تصل من خيط البحث، ثم تُرسم
+    def list_ready():
+        model = window.page_artifacts.model
+        return model.rowCount() > 0 or model.exhausted
+
+    probe = PaintProbe(lambda: getattr(window, "page_artifacts", None), list_ready)
+    start = time.perf_counter()
+    window.btnArtifacts.click()
+    result["nav_list_ms"] = probe.wait(start)
+    result["list_rows"] = window.page_artifacts.model.rowCount()
+
+    # 3. العودة للوحة التحكم
+    probe = PaintProbe(dashboard)
+    start = time.perf_counter()
+    window.btnDashboard.click()
+    result["nav_dashboard_ms"] = probe.wait(start)
+
+    result["rss_mb"] = rss_mb()
+    result["phases"] = phases.totals
+    window.close()
+    main.db.close_all()
+    return result
+
+
+# =========================================================
+#  Parent process
+# =========================================================
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def catalog(n_artifacts, seed, cache_dir):
+    """مسار أرشيف مولّد بـ n_artifacts و seed (يُولَّد مرة واحدة في cache_dir)"""
+    from seed_data import generate_catalog
+    path = os.path.join(cache_dir, f"ui_catalog_{n_artifacts}_seed{seed}.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        from db import Database
+    if os.path.exists(path):
+        # أرشيف محفوظ بمخطط أقدم: الترحيل مرة هنا وليس داخل كل تشغيل مقيس
+        with contextlib.redirect_stdout(io.StringIO()):
+            Database(path).close_all()
+        return path
+
+    tmp = path + ".tmp"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tmp + suffix): os.remove(tmp + suffix)
+    print(f"🏺 توليد {n_artifacts:,} قطعة (seed={seed})...")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = Database(tmp)
+    generate_catalog(db, n_artifacts, seed)
+    db.close_all()  # آخر إغلاق يفرغ WAL في الملف الرئيسي
+    os.replace(tmp, path)
+    print(f"   {time.perf_counter() - start:.1f} s")
+    return path
+
+
+def run_child(db_path, role):
+    env = {**os.environ, "QT_QPA_PLATFORM": "offscreen", "HERITAGE_DB": db_path}
+    env.pop("HERITAGE_QUERY_STATS", None)  # القياس بدون تكلفة تتبع الاستعلامات
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", role],
+                          capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))  # ملفات ui نسبية للمجلد
+    # النتيجة آخر سطر؛ ما قبله طباعة الواجهة نفسها
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        print(f"❌ فشل التشغيل (code {proc.returncode}):\n{proc.stderr.strip()[-2000:]}")
+        return None
+    return json.loads(lines[-1])
+
+
+def median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 2) if values else None
+
+
+def summarize(runs):
+    """الوسيط بين التشغيلات لكل رقم ولكل مرحلة"""
+    metrics = {name: median([r[name] for r in runs]) for name in METRICS}
+    phases = {}
+    for name in runs[0]["phases"]:
+        phases[name] = {"calls": runs[0]["phases"][name]["calls"],
+                        "ms": median([r["phases"].get(name, {}).get("ms") for r in runs])}
+    return metrics, phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", nargs="+", default=["10k", "100k"], help="1k, 10k, 100k, 1M or a number")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--cache-dir", help="keep the generated catalogs here (default: a temporary directory)")
+    parser.add_argument("--role", default="admin", choices=["admin", "user"], help="admin also builds the users page")
+    parser.add_argument("--label", help="release or branch name stored with the results")
+    parser.add_argument("--out", default=OUT_FILE, help="JSON Lines file the results are appended to")
+    args = parser.parse_args()
+
+    from benchmark_suite import machine_info
+    from seed_data import parse_scale
+    try:
+        scales = [parse_scale(s) for s in args.scale]
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = args.cache_dir or tmp
+        os.makedirs(cache_dir, exist_ok=True)
+        records = []
+        for n_artifacts in scales:
+            path = catalog(n_artifacts, args.seed, cache_dir)
+            # نسخة لكل حجم: الواجهة لا تكتب في الأرشيف المحفوظ (الترقيات، PRAGMA optimize)
+            work = os.path.join(tmp, "ui_run.db")
+            shutil.copyfile(path, work)
+            runs = [r for r in (run_child(work, args.role) for _ in range(args.runs)) if r]
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(work + suffix): os.remove(work + suffix)
+            if not runs:
+                raise SystemExit(1)
+
+            metrics, phases = summarize(runs)
+            records.append({
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "label": args.label, "commit": git_commit(),
+                "artifacts": n_artifacts, "seed": args.seed, "role": args.role, "runs": len(runs),
+                "list_rows": runs[0]["list_rows"], "machine": machine_info(), "metrics": metrics, "phases": phases,
+            })
+
+            print(f"\n{n_artifacts:,} قطعة ({len(runs)} تشغيل، الوسيط):")
+            for name in METRICS:
+                value = metrics[name]
+                print(f"  {name:<20}{'-' if value is None else f'{value:>10.1f}'}")
+            print(f"  {'phase':<44}{'calls':>6}{'ms':>10}")
+            for name, phase in sorted(phases.items(), key=lambda p: -(p[1]["ms"] or 0)):
+                print(f"  {name:<44}{phase['calls']:>6}{phase['ms'] or 0:>10.1f}")
+
+    with open(args.out, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, sort_keys=True) + "\n")
+    print(f"\n💾 {len(records)} سطر أضيف إلى {args.out}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--run":
+        result = run_one(sys.argv[2])
+        print(json.dumps(result))
+    else:
+        main()
@@ -0,0 +1,118 @@
+"""فحص تفرّد وتسلسل الأكواد الآلية مع عدة عمليات (processes) تضيف معاً.
+
+الاستعمال:
+    python check_codes.py [--workers 6] [--operations 300] [--block 50] [--db PATH]
+
+كل عملية تخلط: إضافة قطعة واحدة (insert_artifact)، إضافة فاشلة عمداً،
+وحجز كتلة أكواد (reserve_codes) ثم إضافتها دفعة واحدة داخل معاملة، مع إلغاء
+بعض الكتل عمداً. في النهاية يجب أن تكون الأكواد 1..N بدون تكرار ولا فجوات،
+وأن تساوي قيمة العداد عدد القطع وعدد الإضافات التي أبلغت عنها العمليات
+(المعاملات الملغاة لا تستهلك أرقاماً)، وألا تفشل أي إضافة عادية ("database is locked"...).
+ينتهي برمز خروج 1 عند أي مخالفة.
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing as mp
+import os
+import random
+import tempfile
+
+from db import Database
+
+
+class Rollback(Exception):
+    pass
+
+
+def _artifact_data(n):
+    return {
+        "name": f"قطعة {n}", "inventory_number": f"C-{n}", "type_id": None, "quantity": 1,
+        "material_id": None, "period_id": None, "condition_id": None, "date": None,
+        "storage_id": None, "description": "",
+    }
+
+
+def insert_block(db, codes_count, tag, rollback):
+    with db.transaction() as cur:
+        codes = db.reserve_codes(codes_count)
+        cur.executemany(
+            "INSERT INTO artifacts (artifact_code, inventory_number, name) VALUES (?, ?, ?)",
+            [(code, f"B-{tag}-{i}", f"كتلة {tag}") for i, code in enumerate(codes)],
+        )
+        if rollback: raise Rollback()
+    return codes_count
+
+
+def worker(db_path, operations, block, results):
+    db = Database(db_path)
+    rnd = random.Random(os.getpid())
+    inserted = errors = 0
+    with contextlib.redirect_stdout(io.StringIO()):  # بدون رسائل "✓ Added" لكل قطعة
+        for n in range(operations):
+            tag = f"{os.getpid()}-{n}"
+            roll = rnd.random()
+            if roll < 0.70:
+                if db.insert_artifact(_artifact_data(tag)): inserted += 1
+                else: errors += 1
+            elif roll < 0.80:
+                # بيانات ناقصة: تفشل بعد حجز الكود، داخل نفس المعاملة
+                if db.insert_artifact({"inventory_number": tag}) is not None: errors += 1
+            else:
+                try:
+                    inserted += insert_block(db, rnd.randint(1, block), tag, rollback=roll > 0.95)
+                except Rollback:
+                    pass
+                except Exception as e:
+                    errors += 1
+                    print(f"❌ block {tag}: {e}")
+    db.close_all()
+    results.put((os.getpid(), inserted, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--operations", type=int, default=300)
+    parser.add_argument("--block", type=int, default=50)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "codes.db")
+        Database(db_path).close_all()
+
+        results = mp.Queue()
+        procs = [mp.Process(target=worker, args=(db_path, args.operations, args.block, results))
+                 for _ in range(args.workers)]
+        for p in procs: p.start()
+        rows = [results.get() for _ in procs]
+        for p in procs: p.join()
+
+        db = Database(db_path)
+        codes = [r[0] for r in db.fetch_all("SELECT artifact_code FROM artifacts")]
+        sequence = db.fetch_one("SELECT current_value FROM sequences WHERE name = 'artifact_code_seq'")[0]
+        db.close_all()
+
+    problems = []
+    inserted = sum(r[1] for r in rows)
+    if any(r[2] for r in rows):
+        problems.append(f"{sum(r[2] for r in rows)} unexpected insert errors")
+    if len(codes) != len(set(codes)):
+        problems.append(f"{len(codes) - len(set(codes))} duplicate codes")
+    if sorted(int(c) for c in codes) != list(range(1, len(codes) + 1)):
+        problems.append("codes are not contiguous 1..N (gaps from burned codes)")
+    if sequence != len(codes) or inserted != len(codes):
+        problems.append(f"sequence={sequence}, rows={len(codes)}, reported inserts={inserted}")
+
+    for pid, ins, err in sorted(rows):
+        print(f"worker {pid}: {ins} inserted, {err} errors")
+    for p in problems:
+        print(f"❌ {p}")
+    if not problems:
+        print(f"✓ {len(codes)} artifacts from {args.workers} processes: unique, contiguous codes, sequence = {sequence}")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""فحص ترتيب قائمة القطع في SQL مع التصفح بالمفاتيح (keyset).
+
+الاستعمال:
+    python check_list_sort.py [عدد_القطع] [seed]
+
+على قاعدة مؤقتة فيها قيم فارغة (NULL) وقيم مكررة: لكل عمود ترتيب، تصاعدياً وتنازلياً،
+مع وبدون فلتر ونص بحث، تُجمع كل الصفحات عبر search_page وتُقارن بترتيب كامل في الذاكرة.
+يجب أن تظهر كل قطعة مرة واحدة بالضبط وبنفس الترتيب. رمز الخروج 1 عند أي اختلاف.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+from db import Database, SORT_LOOKUPS
+from benchmark_db import build_catalog
+
+PAGE_SIZE = 37   # صغير وغير قاسم لعدد القطع: يختبر حدود الصفحات داخل مجموعات القيم المتساوية
+SORT_KEYS = ["code", "name", "inv_num", "date", "weight"] + list(SORT_LOOKUPS)
+
+
+def scramble(db, rng):
+    """قيم مكررة وفارغة في أعمدة الترتيب"""
+    ids = [r[0] for r in db.fetch_all("SELECT id FROM artifacts")]
+    with db.transaction() as cur:
+        for artifact_id in ids:
+            cur.execute("""
+                UPDATE artifacts SET name = ?, inventory_number = ?, restoration_date = ?,
+                       weight = ?, weight_unit = ?, artifact_type_id = CASE WHEN ? THEN NULL ELSE artifact_type_id END,
+                       material_id = CASE WHEN ? THEN NULL ELSE material_id END,
+                       storage_location_id = CASE WHEN ? THEN NULL ELSE storage_location_id END
+                WHERE id = ?
+            """, (
+                f"قطعة {rng.randint(1, 30)}",
+                rng.choice([None, "", f"{rng.randint(1, 50)}/أ"]),
+                rng.choice([None, "", f"20{rng.randint(10, 24)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"]),
+                rng.choice([0, 1.5, 2, 500, 1500]), rng.choice(["g", "kg"]),
+                rng.random() < 0.1, rng.random() < 0.1, rng.random() < 0.1, artifact_id,
+            ))
+
+
+def expected_order(db, query, filters, sort):
+    """الترتيب المتوقع: كل النتائج من search_artifacts مرتبة في Python"""
+    key, descending = sort
+    rows = db.fetch_all("""
+        SELECT a.id, a.name, coalesce(a.inventory_number, '') AS inv_num, coalesce(a.restoration_date, '') AS date,
+               coalesce(a.weight, 0) * (CASE a.weight_unit WHEN 'kg' THEN 1000 ELSE 1 END) AS weight,
+               coalesce(t.name, '') AS type, coalesce(m.name, '') AS material, coalesce(sl.name, '') AS storage,
+               a.artifact_type_id, a.material_id, a.storage_location_id
+        FROM artifacts a
+        LEFT JOIN artifact_types t ON t.id = a.artifact_type_id
+        LEFT JOIN materials m ON m.id = a.material_id
+        LEFT JOIN storage_locations sl ON sl.id = a.storage_location_id
+    """)
+    matching = {r["real_id"] for r in db.search_artifacts(query)} if query else None
+    rows = [r for r in rows if matching is None or r["id"] in matching]
+    columns = {"type": "artifact_type_id", "material": "material_id", "storage": "storage_location_id"}
+    for facet, value in filters.items():
+        rows = [r for r in rows if r[columns[facet]] == value]
+
+    if key == "code":
+        sort_value = lambda r: (r["id"],)
+    elif key in SORT_LOOKUPS and not query:
+        # بدون نص بحث: مجموعات حسب (الاسم، id القيمة)، القطع بدون قيمة كمجموعة ("", 0)
+        sort_value = lambda r: (r[key], r[columns[key]] or 0, r["id"])
+    else:
+        sort_value = lambda r: (r[key], r["id"])
+    rows.sort(key=sort_value, reverse=descending)
+    return [r["id"] for r in rows]
+
+
+def paged_order(db, query, filters, sort):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = db.search_page(query, cursor, PAGE_SIZE, filters, sort)
+        ids += [r["real_id"] for r in rows]
+        if cursor is None: return ids
+
+
+def main():
+    n_artifacts = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 3)
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = Database(os.path.join(tmp, "sort.db"))
+            build_catalog(db, n_artifacts)
+        scramble(db, rng)
+        type_id = db.get_list("artifact_types")[0]["id"]
+        storage_id = db.get_list("storage_locations")[1]["id"]
+
+        cases = [("", {}), ("", {"type": type_id}), ("", {"storage": storage_id}), ("قطعة 1", {}), ("قطعة", {"type": type_id})]
+        for key in SORT_KEYS:
+            for descending in (False, True):
+                for query, filters in cases:
+                    sort = (key, descending)
+                    got, want = paged_order(db, query, filters, sort), expected_order(db, query, filters, sort)
+                    if got != want:
+                        failed += 1
+                        print(f"❌ sort={sort} query={query!r} filters={filters}: {len(got)} rows vs {len(want)} expected")
+        db.close_all()
+
+    if failed:
+        raise SystemExit(1)
+    print(f"✓ {len(SORT_KEYS) * 2 * 5} sorted listings match a full in-memory sort ({n_artifacts} artifacts, page {PAGE_SIZE})")
+
+
+if __name__ == "__main__":
+    main()
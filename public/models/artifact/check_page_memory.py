@@ -0,0 +1,90 @@
+"""فحص ذاكرة التصفح: عرض 1000 قطعة (التفاصيل، والتعديل لبعضها) يجب ألا يزيد الذاكرة ولا عدد الـ widgets.
+
+الاستعمال:
+    python check_page_memory.py [عدد_القطع_المعروضة] [seed]
+
+على أرشيف مؤقت مولّد بـ seed_data.py وبالواجهة الحقيقية (MainApp، بدون شاشة: offscreen):
+لكل قطعة تُفتح صفحة التفاصيل، ولكل عاشرة صفحة التعديل ثم إلغاء (العودة للتفاصيل).
+بعد WARMUP قطعة (ذاكرة مؤقتة، QtChart...) تؤخذ القراءة الأولى، ثم تُقارن بالأخيرة:
+عدد الصفحات في pagesWidget وعدد كل الـ widgets يجب أن يبقيا كما هما، وزيادة RSS أقل من RSS_TOLERANCE_MB.
+رمز الخروج 1 عند أي زيادة، أو إذا كان عدد القطع المعروضة أقل من WARMUP (لا قراءة للمقارنة).
+"""
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+
+WARMUP = 100
+SAMPLE_EVERY = 100
+EDIT_EVERY = 10
+# ضجيج المُخصص (malloc) بين قراءتين؛ صفحة جديدة لكل قطعة كانت تضيف عشرات الـ MB لكل 1000
+RSS_TOLERANCE_MB = 5
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def main():
+    n_views = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # ملفات ui نسبية لمجلد البرنامج
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # db.db يُفتح عند أول استعمال: على الأرشيف المؤقت وليس heritage.db
+        os.environ["HERITAGE_DB"] = os.path.join(tmp, "browse.db")
+        from PyQt5.QtWidgets import QApplication
+        from db import db
+        from seed_data import generate_catalog
+        import main as app_main
+
+        app = QApplication(sys.argv)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_catalog(db.instance(), max(n_views, 1000), seed)
+        ids = [r[0] for r in db.fetch_all("SELECT id FROM artifacts ORDER BY id LIMIT ?", (n_views,))]
+
+        app_main.Session.role = "user"
+        window = app_main.MainApp()
+
+        def snapshot():
+            gc.collect()
+            app.processEvents()
+            return rss_mb(), len(QApplication.allWidgets()), window.pagesWidget.count()
+
+        first = None
+        print(f"{'viewed':>8}{'RSS MB':>10}{'widgets':>10}{'pages':>8}")
+        with contextlib.redirect_stdout(io.StringIO()) as log:  # الصفحات تطبع سطراً لكل فتح
+            for i, artifact_id in enumerate(ids, 1):
+                window.show_artifact_details(artifact_id)
+                if i % EDIT_EVERY == 0:
+                    window.show_edit_artifact(artifact_id)
+                    window.edit_page.btnCancel.click()
+                app.processEvents()
+                if i == WARMUP or i % SAMPLE_EVERY == 0 or i == len(ids):
+                    sample = snapshot()
+                    if i >= WARMUP and first is None: first = sample
+                    sys.__stdout__.write(f"{i:>8}{sample[0]:>10.1f}{sample[1]:>10}{sample[2]:>8}\n")
+            log.truncate(0)
+        last = snapshot()
+        window.close()
+        db.close_all()
+
+    if first is None:
+        print(f"❌ عدد القطع ({len(ids)}) أقل من WARMUP ({WARMUP})")
+        raise SystemExit(1)
+    failed = []
+    if last[2] != first[2]: failed.append(f"pages {first[2]} → {last[2]}")
+    if last[1] != first[1]: failed.append(f"widgets {first[1]} → {last[1]}")
+    if last[0] - first[0] > RSS_TOLERANCE_MB: failed.append(f"RSS +{last[0] - first[0]:.1f} MB")
+    if failed:
+        print(f"❌ الذاكرة تزيد مع التصفح: {', '.join(failed)}")
+        raise SystemExit(1)
+    print(f"✓ {len(ids)} قطعة معروضة: RSS {last[0] - first[0]:+.1f} MB، {last[1]} widget و {last[2]} صفحات ثابتة")
+
+
+if __name__ == "__main__":
+    main()
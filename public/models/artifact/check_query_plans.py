@@ -0,0 +1,111 @@
+"""فحص خطط التنفيذ (EXPLAIN QUERY PLAN) للاستعلامات الأكثر استعمالاً.
+
+الاستعمال:
+    python check_query_plans.py
+
+ينشئ قاعدة مؤقتة بنفس المخطط (بعد كل الترحيلات)، ينفذ دوال Database الحقيقية
+ويلتقط كل استعلام SELECT تنفذه، ثم يفحص خطته. ينتهي برمز خروج 1 إذا كان أي
+استعلام يقرأ جدولاً كبيراً بالكامل (SCAN بدون فهرس) بدل استعمال فهرس.
+شغّله بعد أي تعديل على الاستعلامات أو الفهارس.
+"""
+import os
+import re
+import tempfile
+
+from db import Database
+from benchmark_db import build_catalog
+
+# الجداول التي تكبر مع حجم الأرشيف؛ جداول القوائم (lookups) صغيرة ويُسمح بقراءتها كاملة
+LARGE_TABLES = {"artifacts", "artifact_images", "artifact_facets"}
+
+# الدوال التي يجب أن تبقى سريعة مهما كبر الأرشيف
+HOT_CALLS = {
+    "get_artifact": lambda db: db.get_artifact(1),
+    "get_artifact_for_edit": lambda db: db.get_artifact_for_edit(1),
+    "get_artifact_images": lambda db: db.get_artifact_images(1),
+    "get_artifacts_by_type": lambda db: db.get_artifacts_by_type(),
+    "get_artifacts_by_condition": lambda db: db.get_artifacts_by_condition(),
+    "get_artifacts_by_period": lambda db: db.get_artifacts_by_period(),
+    "get_artifacts_count": lambda db: db.get_artifacts_count(),
+    "get_artifacts_by_material": lambda db: db.get_artifacts_by_material(),
+    "get_artifacts_by_storage": lambda db: db.get_artifacts_by_storage(),
+    "get_maintenance_alerts_count": lambda db: db.get_maintenance_alerts_count(),
+    "get_maintenance_alerts": lambda db: db.get_maintenance_alerts(None, 20),
+    "get_maintenance_alerts_next": lambda db: db.get_maintenance_alerts((3, "", 1500), 20),
+    "search_artifacts": lambda db: db.search_artifacts("قطعة 10"),
+    "search_page": lambda db: db.search_page("", None, 200),
+    "search_page_next": lambda db: db.search_page("", (None, 1500), 200),
+    "search_page_text": lambda db: db.search_page("قطعة", (-1.0, 1500), 200),
+    "search_page_sort_name": lambda db: db.search_page("", None, 200, sort=("name", False)),
+    "search_page_sort_name_next": lambda db: db.search_page("", ("قطعة رقم 500", 500), 200, sort=("name", False)),
+    "search_page_sort_inventory_desc": lambda db: db.search_page("", ("50/أ", 50), 200, sort=("inv_num", True)),
+    "search_page_sort_date": lambda db: db.search_page("", ("2020-01-01", 10), 200, sort=("date", False)),
+    "search_page_sort_weight": lambda db: db.search_page("", (1000, 10), 200, sort=("weight", True)),
+    "search_page_sort_type": lambda db: db.search_page("", None, 200, sort=("type", False)),
+    "search_page_sort_storage_next": lambda db: db.search_page("", (("قاعة العرض 1", 3), 900), 200, sort=("storage", True)),
+    "search_page_filtered": lambda db: db.search_page("", None, 200, {"type": 1, "storage": 2}),
+    "facet_counts": lambda db: db.facet_counts(),
+    "facet_counts_type": lambda db: db.facet_counts("", {"type": 1}),
+    "facet_counts_material_storage": lambda db: db.facet_counts("", {"material": 2, "storage": 1}),
+    "facet_counts_text": lambda db: db.facet_counts("قطعة", {"period": 1}),
+    "find_by_inventory_number": lambda db: db.fetch_all("SELECT id FROM artifacts WHERE inventory_number = ?", ("10/أ",)),
+}
+
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def capture_queries(db, call):
+    """تنفيذ call(db) وإرجاع نصوص SELECT التي نفذها (بعد تعويض المعاملات)"""
+    conn = db.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call(db)
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def full_scans(db, sql):
+    """أسماء الجداول الكبيرة التي تقرؤها خطة sql بالكامل.
+    يُسمح بـ SCAN إذا كان الاستعلام محدوداً بـ LIMIT ولا يحتاج ترتيباً مؤقتاً
+    (مثل أول صفحة في القائمة: يتوقف بعد LIMIT صف)."""
+    conn = db.get_connection()
+    aliases = {}
+    for table, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|GROUP\b|ORDER\b|LIMIT\b)(\w+))?", sql, re.I):
+        aliases[alias or table] = table
+        aliases[table] = table
+
+    plan = [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    bounded = re.search(r"\bLIMIT\b", sql, re.I) and not any("TEMP B-TREE" in d for d in plan)
+
+    scanned = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail)
+        if match and not bounded and aliases.get(match.group(1), match.group(1)) in LARGE_TABLES:
+            scanned.append(detail)
+    return scanned
+
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "plans.db"))
+        build_catalog(db, 2000)
+
+        for name, call in HOT_CALLS.items():
+            problems = []
+            for sql in capture_queries(db, call):
+                problems += full_scans(db, sql)
+            if problems:
+                failed = True
+                print(f"❌ {name}: {'; '.join(problems)}")
+            else:
+                print(f"✓ {name}")
+        db.close_all()
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""فحص مشغلات artifact_stats و artifact_facets: عمليات عشوائية ثم مقارنة العدادات بعدّ حقيقي.
+
+الاستعمال:
+    python check_stats.py [عدد_العمليات] [seed]
+
+على قاعدة مؤقتة: إضافة، تعديل (نوع/مادة/فترة/حالة/موقع أو حقول أخرى)، حذف،
+وتفريغ بعض القيم إلى NULL، بشكل عشوائي، مع معاملات تُلغى (ROLLBACK) أحياناً.
+بعد كل BATCH عملية يُقارن الجدولان بعدّ كامل من artifacts (verify_stats).
+في النهاية انحراف مصطنع (كتابة مباشرة في artifact_stats و artifact_facets) يجب أن يكشفه
+verify_stats ويصلحه rebuild_stats. رمز الخروج 1 عند أي انحراف.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+from db import Database
+from benchmark_db import build_catalog
+from migrations import STATS_DIMENSIONS
+
+BATCH = 50
+
+
+def random_operation(db, rng, lookups):
+    ids = [r[0] for r in db.fetch_all("SELECT id FROM artifacts")]
+    op = rng.choice(["insert", "insert", "update", "update", "update_other", "delete", "null"])
+
+    if op == "insert" or not ids:
+        db.insert_artifact({
+            "name": f"قطعة {rng.random():.6f}", "type_id": rng.choice(lookups["artifact_type_id"]),
+            "quantity": 1, "material_id": rng.choice(lookups["material_id"]),
+            "period_id": rng.choice(lookups["historical_period_id"]),
+            "condition_id": rng.choice(lookups["preservation_state_id"]), "date": None,
+            "storage_id": rng.choice(lookups["storage_location_id"]), "description": "",
+        })
+    elif op == "update":
+        column = rng.choice(list(STATS_DIMENSIONS.values()))
+        db.execute(f"UPDATE artifacts SET {column} = ? WHERE id = ?", (rng.choice(lookups[column]), rng.choice(ids)))
+    elif op == "update_other":
+        db.execute("UPDATE artifacts SET notes = ? WHERE id = ?", (str(rng.random()), rng.choice(ids)))
+    elif op == "null":
+        column = rng.choice(list(STATS_DIMENSIONS.values()))
+        db.execute(f"UPDATE artifacts SET {column} = NULL WHERE id = ?", (rng.choice(ids),))
+    else:
+        db.delete_artifact(rng.choice(ids))
+
+
+def rolled_back_operation(db, rng, lookups):
+    """عملية داخل معاملة تفشل: يجب ألا يبقى أثرها في العدادات"""
+    try:
+        with db.transaction():
+            random_operation(db, rng, lookups)
+            raise RuntimeError("rollback")
+    except RuntimeError:
+        pass
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "stats.db"))
+        build_catalog(db, 500)
+        lookups = {
+            "artifact_type_id": [r[0] for r in db.fetch_all("SELECT id FROM artifact_types")],
+            "material_id": [r[0] for r in db.fetch_all("SELECT id FROM materials")],
+            "historical_period_id": [r[0] for r in db.fetch_all("SELECT id FROM historical_periods")],
+            "preservation_state_id": [r[0] for r in db.fetch_all("SELECT id FROM preservation_states")],
+            "storage_location_id": [r[0] for r in db.fetch_all("SELECT id FROM storage_locations")],
+        }
+
+        drift = db.verify_stats()
+        for done in range(operations):
+            with contextlib.redirect_stdout(io.StringIO()):  # بدون رسائل "✓ Added" لكل قطعة
+                if rng.random() < 0.05:
+                    rolled_back_operation(db, rng, lookups)
+                else:
+                    random_operation(db, rng, lookups)
+            if (done + 1) % BATCH == 0:
+                drift = db.verify_stats()
+                if drift: break
+
+        if not drift:
+            # انحراف مصطنع (كتابة مباشرة بدون مشغلات) يجب أن يُكتشف ويُصلح
+            db.execute("UPDATE artifact_stats SET count = count + 3 WHERE dimension = 'total'")
+            db.execute("UPDATE artifact_facets SET count = count + 1 WHERE count = (SELECT MAX(count) FROM artifact_facets)")
+            if len({dim == "facets" for dim, *_ in db.verify_stats()}) != 2:
+                drift = [("total/facets", 0, "verify_stats did not detect drift", "")]
+            db.rebuild_stats()
+            drift = drift or db.verify_stats()
+
+        total = db.get_artifacts_count()
+        db.close_all()
+
+    if drift:
+        for row in drift:
+            print(f"❌ {row}")
+        raise SystemExit(1)
+    print(f"✓ artifact_stats and artifact_facets match a full recount after {operations} random operations ({total} artifacts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
 import sys
-from PyQt5.QtWidgets import QWidget, QTableWidgetItem, QGraphicsDropShadowEffect
+from PyQt5.QtWidgets import QWidget, QTableWidgetItem, QGraphicsDropShadowEffect, QAbstractItemView, QHeaderView
 from PyQt5.uic import loadUi
-from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, Qt, QTimer
 from PyQt5.QtGui import QColor, QFont, QPainter
-from PyQt5.QtChart import QChart, QChartView, QPieSeries, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis
 from db import db
 
 class DashboardWindow(QWidget):
     goAddArtifact = pyqtSignal()
+    goDetails = pyqtSignal(int)
+
+    ALERTS_PAGE_SIZE = 10
+    pending_charts = None  # لقطة لم تُرسم مخططاتها بعد (انظر paintEvent)
 
     def __init__(self):
         super().__init__()
@@ -17,14 +20,22 @@ class DashboardWindow(QWidget):
             print(f"Error loading dashboard.ui: {e}")
             return
 
+        self.snapshot = None
+        self.alert_cursors = [None]  # مفتاح بداية كل صفحة تنبيهات تمت زيارتها (للرجوع للسابقة)
+        self.alert_next = None
+        self.alert_ids = []
+
+        self.setup_alerts_table()
+        self.btnAlertsNext.clicked.connect(self.next_alerts_page)
+        self.btnAlertsPrev.clicked.connect(self.prev_alerts_page)
+        self.tableAlerts.cellDoubleClicked.connect(lambda row, col: self.goDetails.emit(self.alert_ids[row]))
+
         self.apply_clean_shadows()
         self.load_stats()
-        self.create_pie_chart()
-        self.create_bar_chart()
 
     def apply_clean_shadows(self):
         cards = [self.cardTotal, self.cardStorage, self.cardUsers, self.cardAlert, 
-                 self.chartFrame1, self.chartFrame2, self.recentContainer]
+                 self.chartFrame1, self.chartFrame2, self.chartFrame3, self.recentContainer, self.alertsContainer]
         for card in cards:
             shadow = QGraphicsDropShadowEffect()
             shadow.setBlurRadius(15)
@@ -35,13 +46,18 @@ class DashboardWindow(QWidget):
 
     def load_stats(self):
         try:
+            # كل الأرقام والمخططات من استعلام واحد (لقطة محفوظة حتى تتغير البيانات)
+            snapshot = db.get_dashboard_snapshot()
+            if snapshot is self.snapshot: return  # لا شيء تغير منذ آخر عرض
+            self.snapshot = snapshot
+
             # الأرقام الأساسية
-            self.valArtifacts.setText(str(db.count("artifacts")))
-            self.valStorage.setText(str(db.count("storage_locations")))
-            self.valUsers.setText(str(db.count("users")))
+            self.valArtifacts.setText(str(snapshot["artifacts"]))
+            self.valStorage.setText(str(snapshot["storage_locations"]))
+            self.valUsers.setText(str(snapshot["users"]))
             
             # ✅ جلب تنبيهات الصيانة الحقيقية
-            alerts = db.get_maintenance_alerts_count()
+            alerts = snapshot["alerts"]
             self.valAlerts.setText(str(alerts))
             
             # تغيير لون الرقم للأحمر إذا كان هناك تنبيهات
@@ -51,7 +67,7 @@ class DashboardWindow(QWidget):
                 self.valAlerts.setStyleSheet("color: #2c3e50;")
 
             # الجدول
-            recent_items = db.get_recent_artifacts(limit=5)
+            recent_items = snapshot["recent"]
             self.tableRecent.setRowCount(len(recent_items))
             self.tableRecent.setColumnWidth(0, 150)
             self.tableRecent.setColumnWidth(1, 400)
@@ -62,16 +78,75 @@ class DashboardWindow(QWidget):
                 self.tableRecent.setItem(i, 0, QTableWidgetItem(str(row[0])))
                 self.tableRecent.setItem(i, 1, QTableWidgetItem(row[1]))
 
+            # قائمة التنبيهات تعود للصفحة الأولى عند تغير البيانات
+            self.alert_cursors = [None]
+            self.load_alerts_page()
+
+            # المخططات بعد أن تُرسم الأرقام والجداول (انظر paintEvent)؛ QtChart يُستورد عند أول مخطط
+            self.pending_charts = snapshot
+            self.update()
+
         except Exception as e:
             print(f"Error loading stats: {e}")
 
-    def create_pie_chart(self):
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.pending_charts is not None:
+            QTimer.singleShot(0, self.create_charts)
+
+    def create_charts(self):
+        snapshot, self.pending_charts = self.pending_charts, None
+        if snapshot is None: return
+        try:
+            self.create_pie_chart(snapshot["by_type"])
+            self.create_bar_chart(self.chartLayout2, snapshot["by_condition"], "حالة الأصول", "#1abc9c")
+            self.create_bar_chart(self.chartLayout3, snapshot["by_period"], "التوزيع حسب الفترة التاريخية", "#9b59b6")
+        except Exception as e:
+            print(f"Error creating charts: {e}")
+
+    def setup_alerts_table(self):
+        self.tableAlerts.verticalHeader().setVisible(False)
+        self.tableAlerts.setAlternatingRowColors(True)
+        self.tableAlerts.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tableAlerts.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tableAlerts.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+
+    def load_alerts_page(self):
+        """صفحة واحدة من القطع التي تحتاج صيانة (الأعلى أولوية ثم الأقدم ترميماً)"""
+        try:
+            alerts, self.alert_next = db.get_maintenance_alerts(self.alert_cursors[-1], self.ALERTS_PAGE_SIZE)
+        except Exception as e:
+            print(f"Error loading alerts: {e}")
+            alerts, self.alert_next = [], None
+
+        self.alert_ids = [a["id"] for a in alerts]
+        self.tableAlerts.setRowCount(len(alerts))
+        for i, alert in enumerate(alerts):
+            self.tableAlerts.setItem(i, 0, QTableWidgetItem(alert["artifact_code"]))
+            self.tableAlerts.setItem(i, 1, QTableWidgetItem(alert["name"]))
+            self.tableAlerts.setItem(i, 2, QTableWidgetItem(alert["condition"]))
+            self.tableAlerts.setItem(i, 3, QTableWidgetItem(alert["restoration_date"] or "-"))
+
+        self.lblAlertsPage.setText(str(len(self.alert_cursors)))
+        self.btnAlertsPrev.setEnabled(len(self.alert_cursors) > 1)
+        self.btnAlertsNext.setEnabled(self.alert_next is not None)
+
+    def next_alerts_page(self):
+        if self.alert_next is None: return
+        self.alert_cursors.append(self.alert_next)
+        self.load_alerts_page()
+
+    def prev_alerts_page(self):
+        if len(self.alert_cursors) <= 1: return
+        self.alert_cursors.pop()
+        self.load_alerts_page()
+
+    def create_pie_chart(self, data):
         """Pie Chart بألوان مخصصة ومتباينة"""
+        from PyQt5.QtChart import QChart, QChartView, QPieSeries
         series = QPieSeries()
         series.setHoleSize(0.40) 
         
-        data = db.get_artifacts_by_type() 
-        
         # ✅ قائمة ألوان متباينة (Contrast Palette)
         colors = [
             "#3498db", # أزرق
@@ -112,12 +187,12 @@ class DashboardWindow(QWidget):
              self.chartLayout1.itemAt(0).widget().deleteLater()
         self.chartLayout1.addWidget(chartview)
 
-    def create_bar_chart(self):
-        data = db.get_artifacts_by_condition()
+    def create_bar_chart(self, layout, data, title, color):
         if not data: return 
+        from PyQt5.QtChart import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis
 
         set0 = QBarSet("العدد")
-        set0.setColor(QColor("#1abc9c")) # لون تركواز مميز للأعمدة
+        set0.setColor(QColor(color))
         
         categories = []
         max_val = 0
@@ -131,7 +206,7 @@ class DashboardWindow(QWidget):
 
         chart = QChart()
         chart.addSeries(series)
-        chart.setTitle("حالة الأصول")
+        chart.setTitle(title)
         chart.setTitleFont(QFont("Segoe UI", 12, QFont.Bold))
         chart.setTitleBrush(QColor("#2c3e50"))
 
@@ -150,9 +225,9 @@ class DashboardWindow(QWidget):
         chartview = QChartView(chart)
         chartview.setRenderHint(QPainter.Antialiasing)
 
-        if self.chartLayout2.count() > 0:
-             self.chartLayout2.itemAt(0).widget().deleteLater()
-        self.chartLayout2.addWidget(chartview)
+        if layout.count() > 0:
+             layout.itemAt(0).widget().deleteLater()
+        layout.addWidget(chartview)
 
     def set_translation(self, t):
         if hasattr(self, "lblWelcome"): self.lblWelcome.setText(t["dash_welcome"])
@@ -164,3 +239,8 @@ class DashboardWindow(QWidget):
         if hasattr(self, "lblSectionTitle"): self.lblSectionTitle.setText(t["recent_title"])
         if hasattr(self, "tableRecent"):
             self.tableRecent.setHorizontalHeaderLabels([t["tbl_code"], t["tbl_name"]])
+        if hasattr(self, "lblAlertsTitle"): self.lblAlertsTitle.setText(t["alerts_title"])
+        if hasattr(self, "tableAlerts"):
+            self.tableAlerts.setHorizontalHeaderLabels([t["tbl_code"], t["tbl_name"], t["tbl_condition"], t["tbl_restoration"]])
+        if hasattr(self, "btnAlertsPrev"): self.btnAlertsPrev.setText(t["btn_prev"])
+        if hasattr(self, "btnAlertsNext"): self.btnAlertsNext.setText(t["btn_next"])
@@ -1,234 +1,460 @@
 import sqlite3
+import heapq
+import itertools
 import os
+import re
+import threading
+import unicodedata
+import weakref
+from contextlib import contextmanager
+
+import migrations
+import query_stats
+
+# عدد الاستعلامات المحضّرة (prepared statements) المحفوظة لكل اتصال
+STATEMENT_CACHE_SIZE = 256
+
+# إعدادات التخزين المطبقة على كل اتصال جديد (يمكن تعديلها عبر Database(profile={...}))
+# ملاحظة: WAL يسمح للقراء بالعمل أثناء الكتابة، لكنه يتطلب أن تعمل كل البرامج على نفس الجهاز.
+# إذا كان heritage.db على مجلد شبكة مشترك بين عدة أجهزة: HERITAGE_DB_JOURNAL=DELETE على كل جهاز
+# (انظر _env_profile)؛ نمط السجل يُحفظ في الملف نفسه، فيجب أن تستعمل كل البرامج نفس القيمة.
+DEFAULT_STORAGE_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",     # آمن مع WAL وأسرع بكثير من FULL
+    "cache_size": -32000,        # قيمة سالبة = بالكيلوبايت (≈ 32MB لكل اتصال)
+    "mmap_size": 268435456,      # 256MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,        # ms: الانتظار بدل الفشل الفوري بـ "database is locked"
+}
+
+# جداول القوائم الثابتة (تُحفظ في الذاكرة عبر lookups())
+LOOKUP_TABLES = migrations.LOOKUP_TABLES
+
+# فلاتر قائمة القطع: facet → جدول القائمة (العمود في artifacts: migrations.STATS_DIMENSIONS)
+FACET_TABLES = {
+    "type": "artifact_types",
+    "material": "materials",
+    "period": "historical_periods",
+    "condition": "preservation_states",
+    "storage": "storage_locations",
+}
+
+# ترتيب القائمة حسب قائمة ثابتة (الاسم في جدول القائمة): العمود المقابل في استعلام البحث
+SORT_LOOKUPS = {"type": "t.name", "material": "m.name", "storage": "sl.name"}
+# الجدول المقابل (نفس الاسم المستعار في _list_sql) لاستعلام لا يربط جداول القوائم (iter_artifacts)
+SORT_JOINS = {
+    "type": "LEFT JOIN artifact_types t ON a.artifact_type_id = t.id",
+    "material": "LEFT JOIN materials m ON a.material_id = m.id",
+    "storage": "LEFT JOIN storage_locations sl ON a.storage_location_id = sl.id",
+}
+
+_PROFILE_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+# =========================================================
+#  Text Normalization (البحث النصي)
+# =========================================================
+
+# التشكيل (الحركات، الشدة، السكون، الألف الخنجرية...) والتطويل
+_ARABIC_DIACRITICS = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+# توحيد أشكال الهمزة والألف، الألف المقصورة، والتاء المربوطة
+_LETTER_FOLDING = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي", "ى": "ي", "ة": "ه",
+    "œ": "oe", "æ": "ae",
+})
+
+_combining_bmp = None
+
+def _strip_combining(text):
+    """حذف علامات التركيب (combining) بعد NFKD. تعبير منتظم مبني مرة واحدة لأحرف BMP
+    بدل المرور على كل حرف في بايثون (الدالة تُستدعى لكل حقل في كل إضافة عبر المشغلات)."""
+    global _combining_bmp
+    if text.isascii(): return text
+    if max(text) > "\uffff":
+        return "".join(c for c in text if not unicodedata.combining(c))
+    if _combining_bmp is None:
+        marks = "".join(chr(cp) for cp in range(0x10000) if unicodedata.combining(chr(cp)))
+        _combining_bmp = re.compile(f"[{re.escape(marks)}]")
+    return _combining_bmp.sub("", text)
+
+def normalize_text(text):
+    """توحيد النص للبحث: حذف التشكيل، توحيد الهمزات/التاء المربوطة،
+    وحذف الحركات الفرنسية (é → e, ç → c) مع تحويل الأحرف إلى صغيرة.
+    تُسجل كدالة SQL باسم heritage_normalize وتستعملها مشغلات (triggers) الفهرس النصي."""
+    if not text: return ""
+    text = _ARABIC_DIACRITICS.sub("", str(text)).casefold().translate(_LETTER_FOLDING)
+    return _strip_combining(unicodedata.normalize("NFKD", text))
+
+def fts_query(query_text):
+    """تحويل نص البحث إلى استعلام FTS5: كل كلمة بادئة (prefix) ويجب أن تتحقق كل الكلمات"""
+    tokens = re.findall(r"\w+", normalize_text(query_text))
+    return " ".join(f'"{t}"*' for t in tokens)
+
+def register_sql_functions(conn):
+    """الدوال التي يحتاجها المخطط (مشغلات artifacts_fts).
+    أي اتصال يكتب في جدول artifacts يجب أن يسجلها، وإلا فشل بـ no such function."""
+    conn.create_function("heritage_normalize", 1, normalize_text, deterministic=True)
+
+class _ThreadToken:
+    """يبقى في threading.local ما دامت حالة الخيط حية (بلا مراجع دائرية: يُحذف فور انتهائها).
+    مرجع ضعيف إليه في Database._connections يكشف اتصالات الخيوط المنتهية."""
+
+
+def _env_profile():
+    """نمط السجل عند التثبيت بدون تعديل الكود: HERITAGE_DB_JOURNAL (DELETE، TRUNCATE، WAL...).
+    يُقرأ في كل Database() وليس في الواجهة فقط: أدوات سطر الأوامر على نفس الملف لا تعيده إلى WAL.
+    بدون WAL يصبح synchronous = FULL (NORMAL آمن مع WAL فقط)."""
+    journal = os.environ.get("HERITAGE_DB_JOURNAL")
+    if not journal: return {}
+    profile = {"journal_mode": journal}
+    if journal.upper() != "WAL":
+        profile["synchronous"] = "FULL"
+    return profile
+
 
 class Database:
-    def __init__(self):
-        self.db_name = "heritage.db"
-        
-        if not os.path.exists(self.db_name):
-            self.create_tables()
-        else:
-            print("✓ SQLite Database Connected")
+    def __init__(self, db_name="heritage.db", profile=None):
+        self.db_name = db_name
+        # الأولوية: profile الممرر، ثم متغير البيئة، ثم DEFAULT_STORAGE_PROFILE
+        self.profile = self._validate_profile({**DEFAULT_STORAGE_PROFILE, **_env_profile(), **(profile or {})})
+
+        # اتصال دائم واحد لكل خيط (thread) بدلاً من فتح وإغلاق اتصال في كل استدعاء
+        self._local = threading.local()
+        self._connections = {}  # conn -> مرجع ضعيف لـ _ThreadToken الخيط المالك
+        self._connections_lock = threading.Lock()
+        self._generation = 0  # يزداد عند close_all لإجبار كل الخيوط على فتح اتصال جديد
+
+        # القوائم الثابتة مشتركة بين كل النوافذ والخيوط (انظر lookups())
+        self._lookups = None
+        self._lookups_lock = threading.Lock()
+
+        # قياس الاستعلامات (اختياري، انظر set_query_stats و query_stats.py)
+        self.query_stats = None
+
+        # إنشاء الجداول أو ترقيتها تلقائياً حسب PRAGMA user_version (انظر migrations.py)
+        migrations.migrate(self)
+        print("✓ SQLite Database Connected")
+
+    # =========================================================
+    #  Connection Manager
+    # =========================================================
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_name)
-        conn.row_factory = sqlite3.Row 
+        """الاتصال الخاص بالخيط الحالي: يُفتح مرة واحدة ثم يُعاد استخدامه.
+        عمال الخيوط المؤقتة (QRunnable في QThreadPool...) يبدأ كل تشغيل منهم بحالة خيط جديدة
+        فلا يجد اتصاله السابق: يستعملون thread_connection() ليُغلق الاتصال عند انتهاء العمل."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            # isolation_level=None: نتحكم في المعاملات يدوياً عبر transaction()
+            conn = sqlite3.connect(
+                self.db_name,
+                timeout=self.profile["busy_timeout"] / 1000,
+                isolation_level=None,
+                cached_statements=STATEMENT_CACHE_SIZE,
+                check_same_thread=False,
+                factory=query_stats.TracedConnection,
+            )
+            conn.stats = self.query_stats
+            conn.row_factory = sqlite3.Row
+            register_sql_functions(conn)
+            self._apply_profile(conn)
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.generation = self._generation
+            # عدادات data_stamp تخص الاتصال: اتصال جديد قد يطابق بصمة لقطة الاتصال السابق بالصدفة
+            self._local.dashboard = None
+            self._local.lookups_seen = None
+            token = getattr(self._local, "token", None)
+            if token is None:
+                token = self._local.token = _ThreadToken()
+            with self._connections_lock:
+                orphans = self._take_orphans()
+                self._connections[conn] = weakref.ref(token)
+            self._close_quietly(orphans)
         return conn
 
-    def create_tables(self):
-        print("⚙️ Initializing Database Tables...")
+    def _take_orphans(self):
+        """(مع _connections_lock) اتصالات خيوط انتهت دون close(): لم يعد أحد يستعملها"""
+        orphans = [conn for conn, owner in self._connections.items() if owner() is None]
+        for conn in orphans:
+            del self._connections[conn]
+        return orphans
+
+    @staticmethod
+    def _close_quietly(connections, optimize=False):
+        for conn in connections:
+            if optimize:
+                try:
+                    # تحديث إحصائيات الفهارس إذا تغير حجم الجداول كثيراً (توصية SQLite عند الإغلاق)
+                    conn.execute("PRAGMA optimize")
+                except sqlite3.Error: pass
+            try: conn.close()
+            except sqlite3.Error: pass
+
+    @contextmanager
+    def thread_connection(self):
+        """اتصال لعمل واحد في خيط مؤقت (QRunnable، ThreadPoolExecutor...)، يُغلق عند الخروج:
+            with db.thread_connection():
+                rows = db.facet_page(...)"""
+        try:
+            yield self.get_connection()
+        finally:
+            self.close()
+
+    def set_query_stats(self, stats):
+        """تفعيل قياس الاستعلامات (query_stats.QueryStats) أو إيقافه (None)، للاتصالات المفتوحة والجديدة"""
+        self.query_stats = stats
+        with self._connections_lock:
+            for conn in list(self._connections):
+                conn.stats = stats
+
+    @staticmethod
+    def _validate_profile(profile):
+        for key, choices in _PROFILE_CHOICES.items():
+            profile[key] = str(profile[key]).upper()
+            if profile[key] not in choices:
+                raise ValueError(f"Invalid {key}: {profile[key]}")
+        for key in ("cache_size", "mmap_size", "busy_timeout"):
+            profile[key] = int(profile[key])
+        return profile
+
+    def _apply_profile(self, conn):
+        p = self.profile
+        conn.execute(f"PRAGMA busy_timeout = {p['busy_timeout']}")
+        mode = conn.execute(f"PRAGMA journal_mode = {p['journal_mode']}").fetchone()[0]
+        if mode.upper() != p["journal_mode"]:
+            print(f"⚠️ journal_mode = {mode} (requested {p['journal_mode']})")
+        conn.execute(f"PRAGMA synchronous = {p['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {p['cache_size']}")
+        conn.execute(f"PRAGMA mmap_size = {p['mmap_size']}")
+        conn.execute(f"PRAGMA temp_store = {p['temp_store']}")
+        conn.execute("PRAGMA foreign_keys = ON")
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """معاملة واحدة: COMMIT عند النجاح و ROLLBACK عند أي خطأ.
+        المعاملات المتداخلة تتحول إلى SAVEPOINT داخل المعاملة الخارجية.
+        immediate=True (الافتراضي للكتابة) يحجز قفل الكتابة من البداية، فينتظر
+        busy_timeout إذا كان جهاز آخر يكتب بدل الفشل عند ترقية القفل في منتصف المعاملة."""
         conn = self.get_connection()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        lookups = ["artifact_types", "materials", "historical_periods", 
-                   "preservation_states", "restoration_methods", "storage_locations"]
-        
-        for table in lookups:
-            cur.execute(f"""
-                CREATE TABLE IF NOT EXISTS {table} (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL
-                )
-            """)
-
-        # ✅ تم إضافة card_editor و editing_date
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS artifacts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                artifact_code TEXT UNIQUE NOT NULL,
-                inventory_number TEXT,
-                name TEXT NOT NULL,
-                source TEXT,
-                artifact_type_id INTEGER,
-                quantity INTEGER DEFAULT 1,
-                material_id INTEGER,
-                historical_period_id INTEGER,
-                preservation_state_id INTEGER,
-                restoration_date TEXT,
-                restoration_method_id INTEGER,
-                storage_location_id INTEGER,
-                storage_row TEXT,
-                storage_col TEXT,
-                dim_length REAL DEFAULT 0,
-                dim_width REAL DEFAULT 0,
-                dim_diameter REAL DEFAULT 0,
-                dim_thickness REAL DEFAULT 0,
-                weight REAL DEFAULT 0,
-                weight_unit TEXT DEFAULT 'g',
-                description TEXT,
-                notes TEXT,
-                card_editor TEXT,
-                editing_date TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(artifact_type_id) REFERENCES artifact_types(id),
-                FOREIGN KEY(material_id) REFERENCES materials(id),
-                FOREIGN KEY(historical_period_id) REFERENCES historical_periods(id),
-                FOREIGN KEY(preservation_state_id) REFERENCES preservation_states(id),
-                FOREIGN KEY(storage_location_id) REFERENCES storage_locations(id)
-            )
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS artifact_images (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                artifact_id INTEGER,
-                image_path TEXT NOT NULL,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(artifact_id) REFERENCES artifacts(id) ON DELETE CASCADE
-            )
-        """)
+        depth = self._local.depth
+        savepoint = f"sp_{depth}"
 
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS sequences (
-                name TEXT PRIMARY KEY,
-                current_value INTEGER DEFAULT 0
-            )
-        """)
-        cur.execute("INSERT OR IGNORE INTO sequences (name, current_value) VALUES ('artifact_code_seq', 0)")
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+
+        try:
+            yield conn.cursor()
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+
+        self._local.depth = depth
+        if depth == 0:
+            try:
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+
+    @contextmanager
+    def cancellable(self, is_cancelled, every=1000):
+        """تنفيذ استعلامات يمكن إيقافها في منتصفها (بحث قديم لم يعد مطلوباً مثلاً).
+        is_cancelled() تُستدعى كل `every` خطوة من محرك SQLite؛ إذا أعادت True
+        يتوقف الاستعلام الجاري بخطأ sqlite3.OperationalError (interrupted)."""
+        conn = self.get_connection()
+        conn.set_progress_handler(lambda: 1 if is_cancelled() else 0, every)
+        try:
+            yield
+        finally:
+            conn.set_progress_handler(None, every)
 
-        conn.commit()
+    def close(self):
+        """إغلاق اتصال الخيط الحالي (يُعاد فتحه تلقائياً عند الحاجة). لا يُستدعى داخل transaction()."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None: return
+        if self._local.depth:
+            raise RuntimeError("Database.close() inside a transaction")
+        with self._connections_lock:
+            self._connections.pop(conn, None)
         conn.close()
-        print("✓ Tables Created Successfully")
+        self._local.conn = None
+        self._local.dashboard = None
+        self._local.lookups_seen = None
+
+    def close_all(self):
+        """إغلاق كل الاتصالات المفتوحة (عند الخروج من البرنامج)"""
+        with self._connections_lock:
+            connections, self._connections = list(self._connections), {}
+            self._generation += 1
+        self._close_quietly(connections, optimize=True)
+        self._local.conn = None
+        self._local.dashboard = None
+        self._local.lookups_seen = None
 
     # =========================================================
     #  Helper Methods
     # =========================================================
 
     def fetch_one(self, query, params=()):
-        conn = self.get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(query, params)
-            return cur.fetchone()
+            return self.get_connection().execute(query, params).fetchone()
         except Exception as e:
             print(f"Fetch One Error: {e}")
             return None
-        finally:
-            conn.close()
 
     def fetch_all(self, query, params=()):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(query, params)
-            return cur.fetchall()
-        finally:
-            conn.close()
+        return self.get_connection().execute(query, params).fetchall()
 
     def execute(self, query, params=()):
-        conn = self.get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(query, params)
-            conn.commit()
+            with self.transaction() as cur:
+                cur.execute(query, params)
             return True
         except Exception as e:
             print(f"Execute Error: {e}")
             return False
-        finally:
-            conn.close()
 
     def count(self, table_name):
         valid_tables = ["artifacts", "storage_locations", "users", "historical_periods", "materials"]
         if table_name not in valid_tables: return 0
-        conn = self.get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(f"SELECT COUNT(*) FROM {table_name}")
-            return cur.fetchone()[0]
+            return self.get_connection().execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
         except: return 0
-        finally:
-            conn.close()
 
     # =========================================================
     #  Artifact Management
     # =========================================================
 
+    def _reserve_codes(self, cur, count):
+        """حجز count رقماً متتالياً من العداد داخل معاملة الكتابة الحالية (cur)، ويعيد أول رقم.
+        الحجز جزء من المعاملة: إذا أُلغيت لا يضيع أي رقم، وقفل الكتابة (BEGIN IMMEDIATE)
+        يمنع جهازين من أخذ نفس الرقم."""
+        cur.execute("UPDATE sequences SET current_value = current_value + ? WHERE name = 'artifact_code_seq'", (count,))
+        cur.execute("SELECT current_value FROM sequences WHERE name = 'artifact_code_seq'")
+        return cur.fetchone()[0] - count + 1
+
     def get_next_sequence(self):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute("UPDATE sequences SET current_value = current_value + 1 WHERE name = 'artifact_code_seq'")
-            cur.execute("SELECT current_value FROM sequences WHERE name = 'artifact_code_seq'")
-            val = cur.fetchone()[0]
-            conn.commit()
-            return val
-        finally:
-            conn.close()
+        with self.transaction() as cur:
+            return self._reserve_codes(cur, 1)
+
+    def reserve_codes(self, count):
+        """حجز كتلة من count كود آلي بكتابة واحدة (للإدخال الجماعي). يعيد قائمة الأكواد.
+        داخل معاملة أكبر (استيراد مثلاً) يُلغى الحجز مع إلغائها."""
+        if count <= 0: return []
+        with self.transaction() as cur:
+            first = self._reserve_codes(cur, count)
+        return [str(n).zfill(9) for n in range(first, first + count)]
+
+    # ✅ تمت إضافة card_editor و editing_date
+    _INSERT_ARTIFACT_SQL = """
+        INSERT INTO artifacts (
+            artifact_code, inventory_number, name, source,
+            artifact_type_id, quantity, material_id, 
+            historical_period_id, preservation_state_id, 
+            restoration_date, 
+            storage_location_id, storage_row, storage_col,
+            dim_length, dim_width, dim_diameter, dim_thickness,
+            weight, weight_unit,
+            description, notes, card_editor, editing_date
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    @staticmethod
+    def _artifact_params(sys_code, data):
+        return (
+            sys_code, 
+            data.get('inventory_number', ''), 
+            data['name'], 
+            data.get('source', ''),
+            data['type_id'], 
+            data['quantity'], 
+            data['material_id'],
+            data['period_id'], 
+            data['condition_id'], 
+            data['date'], 
+            data['storage_id'], 
+            data.get('storage_row', ''), 
+            data.get('storage_col', ''),
+            data.get('dim_length', 0),
+            data.get('dim_width', 0),
+            data.get('dim_diameter', 0),
+            data.get('dim_thickness', 0),
+            data.get('weight', 0),
+            data.get('weight_unit', 'g'),
+            data['description'], 
+            data.get('notes', ''),
+            data.get('card_editor', ''),
+            data.get('editing_date', '')
+        )
 
     def insert_artifact(self, data):
-        conn = self.get_connection()
         try:
-            cur = conn.cursor()
-            
-            seq_num = self.get_next_sequence()
-            sys_code = str(seq_num).zfill(9)
+            # الكود يُحجز داخل نفس معاملة الإضافة: إضافة فاشلة لا تستهلك رقماً
+            with self.transaction() as cur:
+                sys_code = str(self._reserve_codes(cur, 1)).zfill(9)
+                cur.execute(self._INSERT_ARTIFACT_SQL, self._artifact_params(sys_code, data))
+                new_id = cur.lastrowid
 
-            # ✅ تمت إضافة card_editor و editing_date
-            sql = """
-                INSERT INTO artifacts (
-                    artifact_code, inventory_number, name, source,
-                    artifact_type_id, quantity, material_id, 
-                    historical_period_id, preservation_state_id, 
-                    restoration_date, 
-                    storage_location_id, storage_row, storage_col,
-                    dim_length, dim_width, dim_diameter, dim_thickness,
-                    weight, weight_unit,
-                    description, notes, card_editor, editing_date
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            cur.execute(sql, (
-                sys_code, 
-                data.get('inventory_number', ''), 
-                data['name'], 
-                data.get('source', ''),
-                data['type_id'], 
-                data['quantity'], 
-                data['material_id'],
-                data['period_id'], 
-                data['condition_id'], 
-                data['date'], 
-                data['storage_id'], 
-                data.get('storage_row', ''), 
-                data.get('storage_col', ''),
-                data.get('dim_length', 0),
-                data.get('dim_width', 0),
-                data.get('dim_diameter', 0),
-                data.get('dim_thickness', 0),
-                data.get('weight', 0),
-                data.get('weight_unit', 'g'),
-                data['description'], 
-                data.get('notes', ''),
-                data.get('card_editor', ''),
-                data.get('editing_date', '')
-            ))
-            
-            new_id = cur.lastrowid
-            conn.commit()
             print(f"✓ Added: {sys_code}")
             return new_id
 
         except Exception as e:
             print(f"❌ Insert Error: {e}")
             return None
-        finally:
-            conn.close()
 
-    def update_artifact(self, data):
+    def insert_artifacts_many(self, items, chunk_size=1000):
+        """إضافة عدد كبير من القطع (نفس شكل dict في insert_artifact) في معاملة واحدة.
+        items يمكن أن يكون generator: يُقرأ دفعة بدفعة (chunk_size) ولا يُحمّل كاملاً في الذاكرة،
+        وكل دفعة تحجز أكوادها بكتابة واحدة ثم تُضاف بـ executemany.
+        أي خطأ يلغي كل الإضافة (لا شيء أو كل شيء). تعيد عدد القطع المضافة."""
+        items = iter(items)
+        total = 0
+        rows_per_statement = self._insert_rows_per_statement()
+        with self.transaction() as cur:
+            while True:
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk: break
+                first = self._reserve_codes(cur, len(chunk))
+                params = [self._artifact_params(str(first + i).zfill(9), data) for i, data in enumerate(chunk)]
+                # عدة قطع في كل جملة INSERT بدل executemany: كل جملة تُطلق مشغل الفهرس النصي تفتح
+                # savepoint، و FTS5 يكتب ما عنده على القرص عند كل savepoint (مقطع صغير لكل قطعة)
+                for start in range(0, len(params), rows_per_statement):
+                    batch = params[start:start + rows_per_statement]
+                    cur.execute(self._insert_artifacts_sql(len(batch)), [v for row in batch for v in row])
+                total += len(chunk)
+        return total
+
+    # أقصى عدد قطع في جملة INSERT واحدة (insert_artifacts_many)
+    INSERT_ROWS_PER_STATEMENT = 200
+
+    def _insert_rows_per_statement(self):
+        # getlimit متاحة من Python 3.11؛ قبلها نفترض 999، أصغر حد لعدد المعاملات (?) في نسخ SQLite القديمة
         conn = self.get_connection()
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER) if hasattr(conn, "getlimit") else 999
+        return max(1, min(self.INSERT_ROWS_PER_STATEMENT, limit // self._INSERT_ARTIFACT_SQL.count("?")))
+
+    @classmethod
+    def _insert_artifacts_sql(cls, count):
+        head, _, row = cls._INSERT_ARTIFACT_SQL.rpartition("VALUES")
+        return f"{head}VALUES {', '.join([row.strip()] * count)}"
+
+    def update_artifact(self, data):
         try:
-            cur = conn.cursor()
             # ✅ تمت إضافة card_editor و editing_date للتحديث
             sql = """
                 UPDATE artifacts SET
@@ -245,268 +471,603 @@ class Database:
             """
             r_date = data["date"] if data["date"] else None
             
-            cur.execute(sql, (
-                data.get('inventory_number', ''),
-                data["name"], 
-                data.get('source', ''),
-                data["type_id"], data["quantity"], data["material_id"], 
-                data["period_id"], data["condition_id"], r_date, 
-                data["storage_id"], 
-                data.get('storage_row', ''), data.get('storage_col', ''),
-                data.get('dim_length', 0), data.get('dim_width', 0), 
-                data.get('dim_diameter', 0), data.get('dim_thickness', 0),
-                data.get('weight', 0), data.get('weight_unit', 'g'),
-                data["description"], data["notes"],
-                data.get("card_editor", ""), data.get("editing_date", ""),
-                data["id"]
-            ))
-            conn.commit()
+            with self.transaction() as cur:
+                cur.execute(sql, (
+                    data.get('inventory_number', ''),
+                    data["name"], 
+                    data.get('source', ''),
+                    data["type_id"], data["quantity"], data["material_id"], 
+                    data["period_id"], data["condition_id"], r_date, 
+                    data["storage_id"], 
+                    data.get('storage_row', ''), data.get('storage_col', ''),
+                    data.get('dim_length', 0), data.get('dim_width', 0), 
+                    data.get('dim_diameter', 0), data.get('dim_thickness', 0),
+                    data.get('weight', 0), data.get('weight_unit', 'g'),
+                    data["description"], data["notes"],
+                    data.get("card_editor", ""), data.get("editing_date", ""),
+                    data["id"]
+                ))
             return True
         except Exception as e:
             print(f"Update Error: {e}")
             return False
-        finally:
-            conn.close()
 
     def get_artifact(self, artifact_id):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            # ✅ تمت إضافة card_editor و editing_date للعرض
-            query = """
-                SELECT a.name, t.name as type, a.quantity, m.name as material, 
-                       p.name as period, a.description, s.name as condition, 
-                       a.restoration_date, sl.name as storage, a.artifact_code, a.notes,
-                       a.inventory_number, a.source, 
-                       a.storage_row, a.storage_col,
-                       a.dim_length, a.dim_width, a.dim_diameter, a.dim_thickness,
-                       a.weight, a.weight_unit,
-                       a.card_editor, a.editing_date
-                FROM artifacts a
-                LEFT JOIN artifact_types t ON a.artifact_type_id = t.id
-                LEFT JOIN materials m ON a.material_id = m.id
-                LEFT JOIN historical_periods p ON a.historical_period_id = p.id
-                LEFT JOIN preservation_states s ON a.preservation_state_id = s.id
-                LEFT JOIN storage_locations sl ON a.storage_location_id = sl.id
-                WHERE a.id = ?
-            """
-            cur.execute(query, (artifact_id,))
-            r = cur.fetchone()
-            if r:
-                return {
-                    "name": r['name'], "type": r['type'] or "-", "quantity": r['quantity'], 
-                    "material": r['material'] or "-", "period": r['period'] or "-", 
-                    "description": r['description'] or "", "condition": r['condition'] or "-", 
-                    "restoration_date": str(r['restoration_date']) if r['restoration_date'] else "-", 
-                    "storage": r['storage'] or "-", "code": r['artifact_code'], "notes": r['notes'] or "",
-                    "inventory_number": r['inventory_number'] or "---",
-                    "source": r['source'] or "---",
-                    "storage_row": r['storage_row'] or "",
-                    "storage_col": r['storage_col'] or "",
-                    "dims": f"L:{r['dim_length']} W:{r['dim_width']} D:{r['dim_diameter']} Th:{r['dim_thickness']} (cm)",
-                    "weight": f"{r['weight']} {r['weight_unit']}" if r['weight'] else "---",
-                    "card_editor": r['card_editor'] or "---",
-                    "editing_date": r['editing_date'] or "---"
-                }
-            return None
-        finally:
-            conn.close()
+        # أسماء النوع والمادة... تُقرأ من الذاكرة (lookups) بدل 5 LEFT JOIN
+        r = self.get_connection().execute("SELECT * FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+        if r:
+            names = self._lookup_data()[1]
+            return {
+                "name": r['name'], "type": names["artifact_types"].get(r['artifact_type_id']) or "-",
+                "quantity": r['quantity'], "material": names["materials"].get(r['material_id']) or "-",
+                "period": names["historical_periods"].get(r['historical_period_id']) or "-",
+                "description": r['description'] or "",
+                "condition": names["preservation_states"].get(r['preservation_state_id']) or "-",
+                "restoration_date": str(r['restoration_date']) if r['restoration_date'] else "-", 
+                "storage": names["storage_locations"].get(r['storage_location_id']) or "-",
+                "code": r['artifact_code'], "notes": r['notes'] or "",
+                "inventory_number": r['inventory_number'] or "---",
+                "source": r['source'] or "---",
+                "storage_row": r['storage_row'] or "",
+                "storage_col": r['storage_col'] or "",
+                "dims": f"L:{r['dim_length']} W:{r['dim_width']} D:{r['dim_diameter']} Th:{r['dim_thickness']} (cm)",
+                "weight": f"{r['weight']} {r['weight_unit']}" if r['weight'] else "---",
+                "card_editor": r['card_editor'] or "---",
+                "editing_date": r['editing_date'] or "---"
+            }
+        return None
 
     def get_artifact_for_edit(self, artifact_id):
+        r = self.get_connection().execute("SELECT * FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+        if r:
+            return dict(r) 
+        return None
+
+    @staticmethod
+    def _active_filters(filters):
+        """{facet: id} بدون القيم الفارغة، مع رفض أسماء الفلاتر غير المعروفة"""
+        active = {facet: value for facet, value in (filters or {}).items() if value}
+        unknown = active.keys() - FACET_TABLES.keys()
+        if unknown:
+            raise ValueError(f"unknown filter(s): {sorted(unknown)}")
+        return active
+
+    def _search_filter(self, query_text, after=None, filters=None, sort=None):
+        """(source, sort_key, order, where, params) المشتركة بين قائمة البحث والتصدير.
+        الترتيب: حسب sort = (العمود، تنازلي؟) إن وُجد، وإلا حسب الأهمية (rank) عند وجود
+        نص بحث، وإلا من الأحدث للأقدم. القطع المتساوية تُرتب حسب id دائماً.
+        after: مفتاح آخر صف في الصفحة السابقة (keyset) بدل OFFSET.
+        filters: {facet: id} (انظر FACET_TABLES)."""
+        match = fts_query(query_text)
+        where, params = [], []
+        for facet, value in self._active_filters(filters).items():
+            where.append(f"a.{migrations.STATS_DIMENSIONS[facet]} = ?")
+            params.append(value)
+        if match:
+            # البحث عبر الفهرس النصي artifacts_fts، مرتب حسب الأهمية (bm25)
+            source = "artifacts_fts f JOIN artifacts a ON a.id = f.rowid"
+            where.append("artifacts_fts MATCH ?")
+            params.append(match)
+        else:
+            source = "artifacts a"
+
+        if sort is not None:
+            sort_key = self._sort_expression(sort[0])
+            direction, op = ("DESC", "<") if sort[1] else ("ASC", ">")
+            order = f"{sort_key} {direction}, a.id {direction}"
+            if after is not None:
+                # ">= ... AND (> ... OR id >)" بدل (قيمة، id) > (?, ?): يسمح لـ SQLite بالبدء من موضع المفتاح في الفهرس
+                where.append(f"{sort_key} {op}= ? AND ({sort_key} {op} ? OR a.id {op} ?)")
+                params += [after[0], after[0], after[1]]
+        elif match:
+            sort_key = "f.rank"
+            order = "f.rank, a.id DESC"
+            if after is not None:
+                where.append("(f.rank > ? OR (f.rank = ? AND a.id < ?))")
+                params += [after[0], after[0], after[1]]
+        else:
+            sort_key = "NULL"
+            order = "a.id DESC"
+            if after is not None:
+                where.append("a.id < ?")
+                params.append(after[1])
+        return source, sort_key, order, where, params
+
+    @staticmethod
+    def _sort_expression(key):
+        if key == "code": return "a.id"  # الكود الآلي يُعطى بالتسلسل مثل id
+        if key in migrations.SORT_EXPRESSIONS: return migrations.SORT_EXPRESSIONS[key].format(a="a.")
+        if key in SORT_LOOKUPS: return f"coalesce({SORT_LOOKUPS[key]}, '')"
+        raise ValueError(f"unknown sort column: {key}")
+
+    @staticmethod
+    def _list_sql(source, where, order, sort_key="NULL"):
+        return f"""
+            SELECT a.artifact_code, a.name, t.name as type_name, p.name as period_name, 
+                   m.name as mat_name, a.id, a.inventory_number, sl.name as store_name,
+                   a.restoration_date, a.weight, a.weight_unit, {sort_key} as sort_key
+            FROM {source}
+            LEFT JOIN artifact_types t ON a.artifact_type_id = t.id
+            LEFT JOIN historical_periods p ON a.historical_period_id = p.id
+            LEFT JOIN materials m ON a.material_id = m.id
+            LEFT JOIN storage_locations sl ON a.storage_location_id = sl.id
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY {order}
+        """
+
+    def _search_sql(self, query_text, after=None, limit=None, filters=None, sort=None):
+        """بناء استعلام البحث المشترك بين search_artifacts و search_page"""
+        source, sort_key, order, where, params = self._search_filter(query_text, after, filters, sort)
+        sql = self._list_sql(source, where, order, sort_key)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def _lookup_sorted_page(self, sort, after, limit, filters):
+        """صفحة مرتبة حسب اسم النوع/المادة/الموقع بدون نص بحث.
+        ترتيب كل الجدول حسب اسم من جدول آخر لا يمكن أن يأتي من فهرس، لذلك تُقرأ القيم
+        واحدة بواحدة بترتيب أسمائها (من الذاكرة)، وقطع كل قيمة من فهرسها حسب id (مثل التنبيهات).
+        مفتاح الصفحة: ((الاسم، id القيمة)، id آخر قطعة)."""
+        facet, descending = sort
+        column = migrations.STATS_DIMENSIONS[facet]
+        names = self._lookup_data()[1][FACET_TABLES[facet]]
         conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            query = "SELECT * FROM artifacts WHERE id = ?"
-            cur.execute(query, (artifact_id,))
-            r = cur.fetchone()
-            if r:
-                return dict(r) 
-            return None
-        finally:
-            conn.close()
+        # فقط القيم المستعملة فعلاً (حسب artifact_stats). القطع بدون قيمة (key = 0) أو بقيمة
+        # محذوفة من القائمة = اسم فارغ (أولاً في الترتيب التصاعدي، مثل coalesce في البحث النصي)
+        used = [key for key, in conn.execute(
+            "SELECT key FROM artifact_stats WHERE dimension = ? AND count > 0", (facet,))]
+        groups = sorted([(names.get(key, ""), key) for key in used], reverse=descending)
+        active = self._active_filters(filters)
+        if facet in active:
+            groups = [g for g in groups if g[1] == active[facet]]
+        if after is not None:
+            position = tuple(after[0])
+            groups = [g for g in groups if (g <= position if descending else g >= position)]
+
+        direction, op = ("DESC", "<") if descending else ("ASC", ">")
+        page = []
+        for group in groups:
+            source, _, _, where, params = self._search_filter("", None, filters)
+            where.append(f"a.{column} = ?" if group[1] else f"a.{column} IS NULL")
+            params += [group[1]] if group[1] else []
+            if after is not None and group == tuple(after[0]):
+                where.append(f"a.id {op} ?")
+                params.append(after[1])
+            sql = self._list_sql(source, where, f"a.id {direction}") + " LIMIT ?"
+            params.append(limit - len(page))
+            page += [(group, row) for row in conn.execute(sql, params)]
+            if len(page) >= limit: break
+
+        rows = [self._search_row(row) for _, row in page]
+        if len(page) < limit:
+            return rows, None
+        last_group, last = page[-1]
+        return rows, (last_group, last['id'])
+
+    @staticmethod
+    def _search_row(row):
+        return {
+            "id": row['artifact_code'],
+            "inv_num": row['inventory_number'] or "---",
+            "name": row['name'],
+            "type": row['type_name'] or "-",
+            "material": row['mat_name'] or "-",
+            "storage": row['store_name'] or "-",
+            "date": row['restoration_date'] or "-",
+            "weight": f"{row['weight']:g} {row['weight_unit'] or 'g'}" if row['weight'] else "-",
+            "real_id": row['id']
+        }
 
     def search_artifacts(self, query_text=""):
-        conn = self.get_connection()
+        sql, params = self._search_sql(query_text)
+        cur = self.get_connection().execute(sql, params)
+        return [self._search_row(row) for row in cur.fetchall()]
+
+    def search_page(self, query_text="", after=None, limit=200, filters=None, sort=None):
+        """صفحة واحدة من نتائج البحث: (الصفوف، مفتاح الصفحة التالية).
+        sort: (العمود، تنازلي؟) — code, inv_num, name, type, material, storage, date, weight.
+        مفتاح الصفحة التالية None عند الوصول لآخر النتائج.
+        التكلفة تعتمد على حجم الصفحة فقط، وليس على حجم الأرشيف."""
+        if sort is not None and sort[0] in SORT_LOOKUPS and not fts_query(query_text):
+            return self._lookup_sorted_page(sort, after, limit, filters)
+        sql, params = self._search_sql(query_text, after, limit, filters, sort)
+        rows = self.get_connection().execute(sql, params).fetchall()
+        if len(rows) < limit:
+            return [self._search_row(row) for row in rows], None
+        last = rows[-1]
+        return [self._search_row(row) for row in rows], (last['sort_key'], last['id'])
+
+    def facet_counts(self, query_text="", filters=None):
+        """عدد النتائج لكل خيار في كل فلتر: {facet: [(id, name, count), ...]}.
+        عدد خيارات فلتر ما يُحسب مع كل الفلاتر الأخرى (وليس مع نفسه) ليبقى تغيير الاختيار ممكناً.
+        بدون نص بحث: من artifact_stats / artifact_facets (عدادات، وليس قطع). مع نص بحث: من نتائج FTS."""
+        active = self._active_filters(filters)
+        match = fts_query(query_text)
+        parts, params = [], []
+        for facet in FACET_TABLES:
+            others = [(f, v) for f, v in active.items() if f != facet]
+            where = "".join(f" AND {f} = ?" for f, _ in others)
+            params += [v for _, v in others]
+            if match:
+                source = "facets"
+            elif others:
+                source = "artifact_facets"
+            else:
+                # لا فلتر آخر: نفس عدادات لوحة التحكم
+                parts.append(f"SELECT '{facet}', key, count FROM artifact_stats WHERE dimension = '{facet}' AND key != 0 AND count > 0")
+                continue
+            parts.append(f"SELECT '{facet}', {facet}, SUM(count) FROM {source} WHERE {facet} != 0{where} GROUP BY 2 HAVING SUM(count) > 0")
+        sql = " UNION ALL ".join(parts)
+
+        if match:
+            # نتائج البحث النصي تُجمع مرة واحدة حسب التركيبة، ثم تُعد كل الفلاتر منها
+            columns = ", ".join(f"coalesce(a.{col}, 0) AS {dim}" for dim, col in migrations.STATS_DIMENSIONS.items())
+            sql = f"""WITH facets AS (
+                SELECT {columns}, COUNT(*) AS count
+                FROM artifacts_fts f JOIN artifacts a ON a.id = f.rowid
+                WHERE artifacts_fts MATCH ? GROUP BY 1, 2, 3, 4, 5
+            ) {sql}"""
+            params.insert(0, match)
+
+        names = self._lookup_data()[1]
+        counts = {facet: [] for facet in FACET_TABLES}
+        for facet, key, count in self.get_connection().execute(sql, params):
+            name = names[FACET_TABLES[facet]].get(key)
+            if name is not None: counts[facet].append((key, name, count))
+        for items in counts.values():
+            items.sort(key=lambda item: item[1])
+        return counts
+
+    def facet_page(self, query_text="", filters=None, after=None, limit=200, sort=None):
+        """صفحة من نتائج البحث والفلاتر + عدد النتائج لكل خيار (للصفحة الأولى فقط، after=None).
+        يعيد (rows, next_cursor, counts)؛ الاستعلامان في نفس المعاملة (نفس حالة البيانات)."""
+        with self.transaction(immediate=False):
+            rows, cursor = self.search_page(query_text, after, limit, filters, sort)
+            counts = self.facet_counts(query_text, filters) if after is None else None
+        return rows, cursor, counts
+
+    def iter_artifacts(self, query_text="", batch_size=500, filters=None, sort=None):
+        """كل القطع المطابقة للبحث والفلاتر (بنفس ترتيب القائمة، sort كما في search_page) كـ dict كامل
+        مع أسماء القوائم. generator: الصفوف تُقرأ من SQLite دفعة بدفعة (fetchmany)، فالذاكرة لا تكبر
+        مع حجم الأرشيف."""
+        source, _, order, where, params = self._search_filter(query_text, filters=filters, sort=sort)
+        if sort is not None and sort[0] in SORT_JOINS:
+            source += " " + SORT_JOINS[sort[0]]
+        sql = f"SELECT a.* FROM {source} {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY {order}"
+        names = self._lookup_data()[1]
+        cur = self.get_connection().execute(sql, params)
         try:
-            cur = conn.cursor()
-            sql = """
-                SELECT a.artifact_code, a.name, t.name as type_name, p.name as period_name, 
-                       m.name as mat_name, a.id, a.inventory_number, sl.name as store_name
-                FROM artifacts a
-                LEFT JOIN artifact_types t ON a.artifact_type_id = t.id
-                LEFT JOIN historical_periods p ON a.historical_period_id = p.id
-                LEFT JOIN materials m ON a.material_id = m.id
-                LEFT JOIN storage_locations sl ON a.storage_location_id = sl.id
-                WHERE a.name LIKE ? OR a.artifact_code LIKE ? OR a.inventory_number LIKE ?
-                ORDER BY a.id DESC
-            """
-            search_param = f"%{query_text}%"
-            cur.execute(sql, (search_param, search_param, search_param))
-            
-            results = []
-            for row in cur.fetchall():
-                results.append({
-                    "id": row['artifact_code'],
-                    "inv_num": row['inventory_number'] or "---",
-                    "name": row['name'],
-                    "type": row['type_name'] or "-",
-                    "material": row['mat_name'] or "-",
-                    "storage": row['store_name'] or "-",
-                    "real_id": row['id']
-                })
-            return results
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows: return
+                for r in rows:
+                    item = dict(r)
+                    item["type"] = names["artifact_types"].get(r["artifact_type_id"])
+                    item["material"] = names["materials"].get(r["material_id"])
+                    item["period"] = names["historical_periods"].get(r["historical_period_id"])
+                    item["condition"] = names["preservation_states"].get(r["preservation_state_id"])
+                    item["storage"] = names["storage_locations"].get(r["storage_location_id"])
+                    yield item
         finally:
-            conn.close()
+            cur.close()
 
     # =========================================================
     #  Users & Lookups & Images
     # =========================================================
     def get_all_users(self):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT id, username, role, created_at FROM users ORDER BY id")
-            return cur.fetchall()
-        finally:
-            conn.close()
+        return self.fetch_all("SELECT id, username, role, created_at FROM users ORDER BY id")
 
     def add_user(self, username, password, role="user"):
-        conn = self.get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)", (username, password, role))
-            conn.commit()
+            with self.transaction() as cur:
+                cur.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)", (username, password, role))
             return True
         except: return False
-        finally:
-            conn.close()
 
     def delete_user(self, user_id):
-        conn = self.get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            conn.commit()
+            with self.transaction() as cur:
+                cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
             return True
         except: return False
-        finally:
-            conn.close()
 
-    def get_list(self, table_name):
-        valid = ["artifact_types", "materials", "historical_periods", "preservation_states", "storage_locations", "restoration_methods"]
-        if table_name not in valid: return []
+    # ---------------------------------------------------------
+    #  Lookups Cache (القوائم الثابتة في الذاكرة)
+    # ---------------------------------------------------------
+
+    def lookups(self):
+        """كل القوائم الثابتة: {table: [صفوف كـ dict مرتبة بالاسم]}، تُقرأ مرة واحدة للبرنامج كله.
+        تُلغى عند التعديل من هذا البرنامج (insert_lookup، delete_lookup...)،
+        وعند تغير عداد lookup_version (تعديل القوائم من برنامج أو جهاز آخر، انظر migrations.py)."""
+        return self._lookup_data()[0]
+
+    def _lookup_data(self):
+        """(الصفوف، {table: {id: name}}، lookup_version عند قراءتها)"""
         conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(f"SELECT id, name FROM {table_name} ORDER BY name")
-            return [{"id": r[0], "name": r[1]} for r in cur.fetchall()]
-        finally:
-            conn.close()
+        # data_version لم يتغير منذ آخر تحقق على هذا الاتصال: لا كتابة من اتصال آخر، فلا حاجة لقراءة العداد
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if getattr(self._local, "lookups_seen", None) != data_version:
+            version = conn.execute("SELECT version FROM lookup_version WHERE id = 1").fetchone()[0]
+            with self._lookups_lock:
+                if self._lookups is not None and self._lookups[2] != version:
+                    self._lookups = None
+            self._local.lookups_seen = data_version
+
+        with self._lookups_lock:
+            if self._lookups is None:
+                # العداد قبل الصفوف: القوائم المحفوظة ليست أقدم من العداد المحفوظ معها
+                version = conn.execute("SELECT version FROM lookup_version WHERE id = 1").fetchone()[0]
+                rows = {t: [dict(r) for r in conn.execute(f"SELECT * FROM {t} ORDER BY name")] for t in LOOKUP_TABLES}
+                names = {t: {r["id"]: r["name"] for r in items} for t, items in rows.items()}
+                self._lookups = (rows, names, version)
+            return self._lookups
+
+    def invalidate_lookups(self):
+        with self._lookups_lock:
+            self._lookups = None
+
+    def lookup_name(self, table_name, item_id):
+        """اسم عنصر في قائمة ثابتة من الذاكرة (None إذا لم يوجد)"""
+        if item_id is None: return None
+        return self._lookup_data()[1][table_name].get(item_id)
+
+    def get_list(self, table_name):
+        if table_name not in LOOKUP_TABLES: return []
+        return [{"id": r["id"], "name": r["name"]} for r in self.lookups()[table_name]]
 
     def insert_lookup(self, table_name, value_name):
-        conn = self.get_connection()
+        if table_name not in LOOKUP_TABLES: return False
         try:
-            cur = conn.cursor()
-            cur.execute(f"INSERT INTO {table_name} (name) VALUES (?)", (value_name,))
-            conn.commit()
+            with self.transaction() as cur:
+                cur.execute(f"INSERT INTO {table_name} (name) VALUES (?)", (value_name,))
             return True
         except: return False
-        finally:
-            conn.close()
+        finally: self.invalidate_lookups()
 
     def delete_lookup(self, table_name, item_id):
-        conn = self.get_connection()
+        if table_name not in LOOKUP_TABLES: return False
         try:
-            cur = conn.cursor()
-            cur.execute(f"DELETE FROM {table_name} WHERE id = ?", (item_id,))
-            conn.commit()
+            with self.transaction() as cur:
+                cur.execute(f"DELETE FROM {table_name} WHERE id = ?", (item_id,))
             return True
         except: return False
-        finally:
-            conn.close()
+        finally: self.invalidate_lookups()
 
-    def insert_image(self, artifact_id, filename):
-        conn = self.get_connection()
+    def get_preservation_states(self):
+        return [{"id": r["id"], "name": r["name"], "severity": r["severity"]}
+                for r in self.lookups()["preservation_states"]]
+
+    def insert_preservation_state(self, value_name, severity=0):
         try:
-            cur = conn.cursor()
-            cur.execute("INSERT INTO artifact_images (artifact_id, image_path) VALUES (?, ?)", (artifact_id, filename))
-            conn.commit()
-        finally:
-            conn.close()
+            with self.transaction() as cur:
+                cur.execute("INSERT INTO preservation_states (name, severity) VALUES (?, ?)", (value_name, severity))
+            return True
+        except: return False
+        finally: self.invalidate_lookups()
 
-    def get_artifact_images(self, artifact_id):
-        conn = self.get_connection()
+    def set_state_severity(self, state_id, severity):
         try:
-            cur = conn.cursor()
-            cur.execute("SELECT id, image_path FROM artifact_images WHERE artifact_id = ?", (artifact_id,))
-            return [{"id": r[0], "image_path": r[1]} for r in cur.fetchall()]
-        finally:
-            conn.close()
+            with self.transaction() as cur:
+                cur.execute("UPDATE preservation_states SET severity = ? WHERE id = ?", (severity, state_id))
+            return True
+        except: return False
+        finally: self.invalidate_lookups()
+
+    def insert_image(self, artifact_id, filename, original_name=None):
+        # نفس الملف مرتين لنفس القطعة: لا شيء (فهرس فريد، انظر image_store.py)
+        with self.transaction() as cur:
+            cur.execute("INSERT OR IGNORE INTO artifact_images (artifact_id, image_path, original_name) VALUES (?, ?, ?)",
+                        (artifact_id, filename, original_name))
+
+    def insert_images(self, artifact_id, images):
+        """كل صور القطعة في معاملة واحدة؛ images: [(image_path، الاسم الأصلي، ...)] (image_store.ingest)"""
+        with self.transaction() as cur:
+            cur.executemany("INSERT OR IGNORE INTO artifact_images (artifact_id, image_path, original_name) VALUES (?, ?, ?)",
+                            [(artifact_id, image[0], image[1]) for image in images])
+
+    def get_artifact_images(self, artifact_id):
+        rows = self.fetch_all("SELECT id, image_path, original_name FROM artifact_images WHERE artifact_id = ?", (artifact_id,))
+        return [{"id": r[0], "image_path": r[1], "original_name": r[2] or r[1]} for r in rows]
 
     def delete_image(self, image_id):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
+        with self.transaction() as cur:
             cur.execute("DELETE FROM artifact_images WHERE id = ?", (image_id,))
-            conn.commit()
-        finally:
-            conn.close()
-    
+
+    def take_orphan_images(self, remove):
+        """ملفات الصور التي لم يعد يشير إليها أي سطر (image_files.refs = 0): تُحذف من الجدول وتُعاد مساراتها.
+        remove(image_path) يحذف الملف من القرص قبل COMMIT، أي تحت قفل الكتابة: لا يضيف أحد سطراً لملف
+        بين التحقق من refs وحذفه (image_store.collect_garbage و image_store.insert_images)."""
+        with self.transaction() as cur:
+            paths = [r[0] for r in cur.execute("SELECT image_path FROM image_files WHERE refs <= 0")]
+            for path in paths:
+                remove(path)
+            cur.execute("DELETE FROM image_files WHERE refs <= 0")
+        return paths
+
     def delete_artifact(self, artifact_id):
-        conn = self.get_connection()
+        # foreign_keys مفعّلة على كل اتصال، فالحذف يشمل صور القطعة (ON DELETE CASCADE)
         try:
-            cur = conn.cursor()
-            cur.execute("PRAGMA foreign_keys = ON")
-            cur.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
-            conn.commit()
+            with self.transaction() as cur:
+                cur.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
             return True
         except: return False
-        finally:
-            conn.close()
+
+    # =========================================================
+    #  Statistics (artifact_stats: عدادات تحدّثها المشغلات، انظر migrations.py)
+    # =========================================================
+
+    def _stats_by(self, dimension, lookup_table):
+        # عدد الصفوف = عدد عناصر القائمة، مهما كان حجم الأرشيف
+        return self.fetch_all(f"""
+            SELECT l.name, SUM(st.count) FROM artifact_stats st
+            JOIN {lookup_table} l ON l.id = st.key
+            WHERE st.dimension = ? AND st.count > 0
+            GROUP BY l.name
+        """, (dimension,))
+
+    def get_artifacts_count(self):
+        row = self.fetch_one("SELECT count FROM artifact_stats WHERE dimension = 'total' AND key = 0")
+        return row[0] if row else 0
 
     def get_artifacts_by_type(self):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT t.name, COUNT(a.id) FROM artifacts a JOIN artifact_types t ON a.artifact_type_id = t.id GROUP BY t.name")
-            return cur.fetchall()
-        finally:
-            conn.close()
+        return self._stats_by("type", "artifact_types")
 
     def get_artifacts_by_condition(self):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT s.name, COUNT(a.id) FROM artifacts a JOIN preservation_states s ON a.preservation_state_id = s.id GROUP BY s.name")
-            return cur.fetchall()
-        finally:
-            conn.close()
+        return self._stats_by("condition", "preservation_states")
+
+    def get_artifacts_by_period(self):
+        return self._stats_by("period", "historical_periods")
+
+    def get_artifacts_by_material(self):
+        return self._stats_by("material", "materials")
+
+    def get_artifacts_by_storage(self):
+        return self._stats_by("storage", "storage_locations")
             
     def get_recent_artifacts(self, limit=5):
-        conn = self.get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT artifact_code, name FROM artifacts ORDER BY id DESC LIMIT ?", (limit,))
-            return cur.fetchall()
-        finally:
-            conn.close()
-            
+        return self.fetch_all("SELECT artifact_code, name FROM artifacts ORDER BY id DESC LIMIT ?", (limit,))
+
     def get_maintenance_alerts_count(self):
-        conn = self.get_connection()
+        # القطع التي حالتها severity > 0 (الأولوية تُضبط من الإعدادات، بدل البحث في أسماء الحالات)
         try:
-            cur = conn.cursor()
             sql = """
-                SELECT COUNT(a.id) 
-                FROM artifacts a
-                JOIN preservation_states s ON a.preservation_state_id = s.id
-                WHERE s.name LIKE '%ترميم%' OR s.name LIKE '%تالف%' OR s.name LIKE '%سيئ%'
+                SELECT COALESCE(SUM(st.count), 0)
+                FROM preservation_states s
+                JOIN artifact_stats st ON st.dimension = 'condition' AND st.key = s.id
+                WHERE s.severity > 0
             """
-            cur.execute(sql)
-            result = cur.fetchone()
+            result = self.get_connection().execute(sql).fetchone()
             return result[0] if result else 0
         except: return 0
-        finally:
-            conn.close()
+
+    def _alerts_for_state(self, state, after, limit):
+        """أول limit قطعة في حالة حفظ واحدة بترتيب الفهرس idx_artifacts_state_restoration"""
+        where, params = ["a.preservation_state_id = ?"], [state['id']]
+        if after is not None:
+            # الشرط الأول وحده يكفي لتحديد مدى في الفهرس (بدل المرور على كل الصفوف السابقة)
+            where.append("coalesce(a.restoration_date, '') >= ?")
+            where.append("(coalesce(a.restoration_date, '') > ? OR a.id > ?)")
+            params += [after[0], after[0], after[1]]
+        sql = f"""
+            SELECT a.id, a.artifact_code, a.name, coalesce(a.restoration_date, '') as restoration_date
+            FROM artifacts a
+            WHERE {" AND ".join(where)}
+            ORDER BY coalesce(a.restoration_date, ''), a.id
+            LIMIT ?
+        """
+        rows = self.get_connection().execute(sql, params + [limit]).fetchall()
+        return [{**dict(r), "condition": state['name'], "severity": state['severity']} for r in rows]
+
+    def get_maintenance_alerts(self, after=None, limit=20):
+        """صفحة من القطع التي تحتاج صيانة: الأعلى أولوية أولاً، ثم الأقدم ترميماً
+        (القطع التي لم تُرمم أبداً تأتي أولاً). تعيد (الصفوف، مفتاح الصفحة التالية).
+        كل حالة تُقرأ من الفهرس مرتبة مسبقاً ثم تُدمج الحالات ذات نفس الأولوية،
+        فتكلفة الصفحة لا تعتمد على عدد التنبيهات الكلي."""
+        states = self.fetch_all("SELECT id, name, severity FROM preservation_states WHERE severity > 0 ORDER BY severity DESC")
+        alerts = []
+        for severity, group in itertools.groupby(states, key=lambda s: s['severity']):
+            if after is not None and severity > after[0]: continue
+            key = (after[1], after[2]) if after is not None and severity == after[0] else None
+            remaining = limit - len(alerts)
+            pages = [self._alerts_for_state(state, key, remaining) for state in group]
+            alerts += list(heapq.merge(*pages, key=lambda r: (r['restoration_date'], r['id'])))[:remaining]
+            if len(alerts) >= limit: break
+
+        if len(alerts) < limit:
+            return alerts, None
+        last = alerts[-1]
+        return alerts, (last['severity'], last['restoration_date'], last['id'])
+
+    def verify_stats(self):
+        """مقارنة artifact_stats و artifact_facets بعدّ حقيقي من جدول artifacts.
+        تعيد قائمة الفروقات (dimension, key, المخزن, الحقيقي)؛ قائمة فارغة = لا انحراف.
+        (تركيبات الفلاتر تظهر كـ dimension = 'facets' و key = 'type/material/period/condition/storage')"""
+        def facet_key(row):
+            return ("facets", "/".join(str(v) for v in row[:5]))
+
+        with self.transaction(immediate=False) as cur:
+            actual = {(d, k): c for d, k, c in cur.execute(migrations.STATS_RECOUNT_SQL)}
+            stored = {(d, k): c for d, k, c in cur.execute("SELECT dimension, key, count FROM artifact_stats")}
+            actual.update((facet_key(r), r[5]) for r in cur.execute(migrations.FACETS_RECOUNT_SQL))
+            stored.update((facet_key(r), r[5]) for r in cur.execute(
+                f"SELECT {migrations.FACET_COLUMNS}, count FROM artifact_facets WHERE count != 0"))
+        return [
+            (dim, key, stored.get((dim, key), 0), actual.get((dim, key), 0))
+            for dim, key in sorted(actual.keys() | stored.keys())
+            if stored.get((dim, key), 0) != actual.get((dim, key), 0)
+        ]
+
+    def rebuild_stats(self):
+        """إعادة حساب artifact_stats و artifact_facets بالكامل (بعد تعديل الملف من برنامج خارجي مثلاً)"""
+        with self.transaction() as cur:
+            migrations.rebuild_stats(cur)
+
+    # =========================================================
+    #  Dashboard
+    # =========================================================
+
+    def data_stamp(self):
+        """بصمة تتغير مع أي تعديل على قاعدة البيانات:
+        data_version تتغير عند الكتابة من اتصال آخر (خيط أو جهاز آخر)،
+        و total_changes عند الكتابة من اتصال هذا الخيط نفسه.
+        العدادان خاصان بالاتصال: لا تُقارن بصمتان من اتصالين مختلفين."""
+        conn = self.get_connection()
+        return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    def get_dashboard_snapshot(self):
+        """كل أرقام ومخططات لوحة التحكم في معاملة قراءة واحدة (لقطة متناسقة).
+        النتيجة محفوظة وتُعاد كما هي (نفس الكائن) حتى تتغير البيانات فعلاً."""
+        stamp = self.data_stamp()
+        cached = getattr(self._local, "dashboard", None)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        with self.transaction(immediate=False):
+            snapshot = {
+                "artifacts": self.get_artifacts_count(),
+                "storage_locations": self.count("storage_locations"),
+                "users": self.count("users"),
+                "alerts": self.get_maintenance_alerts_count(),
+                "recent": [tuple(r) for r in self.get_recent_artifacts(limit=5)],
+                "by_type": [tuple(r) for r in self.get_artifacts_by_type()],
+                "by_condition": [tuple(r) for r in self.get_artifacts_by_condition()],
+                "by_period": [tuple(r) for r in self.get_artifacts_by_period()],
+            }
+        self._local.dashboard = (stamp, snapshot)
+        return snapshot
+
+class LazyDatabase:
+    """يؤجل إنشاء Database (فتح الملف والترقيات) إلى أول استعمال، لا عند استيراد db.py.
+    كل الخصائص والدوال تُمرر إلى القاعدة الحقيقية (instance())."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._db = None
+        self._lock = threading.Lock()
+
+    def instance(self):
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    self._db = self._factory()
+        return self._db
+
+    def __getattr__(self, name):
+        return getattr(self.instance(), name)
+
+    def close_all(self):
+        # إغلاق قاعدة لم تُفتح أصلاً لا يحتاج فتحها
+        if self._db is not None:
+            self._db.close_all()
+
+
+def _open_default():
+    # HERITAGE_DB لتشغيل الواجهة على قاعدة أخرى، مثلاً أرشيف مولّد في benchmark_ui.py
+    database = Database(os.environ.get("HERITAGE_DB", "heritage.db"))
+    if os.environ.get("HERITAGE_QUERY_STATS"):
+        database.set_query_stats(query_stats.QueryStats())
+    return database
 
 # Instance
-db = Database()
+db = LazyDatabase(_open_default)
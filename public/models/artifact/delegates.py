@@ -0,0 +1,66 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QEvent, QRect, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QFont
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """عمود أزرار (تفاصيل، تعديل، حذف...) مرسوم بالـ delegate بدل QPushButton حقيقي لكل صف.
+    الأزرار مجرد رسم، فلا توجد أي widgets إضافية مهما كان عدد الصفوف.
+    عند النقر تُرسل الإشارة clicked(اسم_الإجراء، رقم_الصف)."""
+
+    clicked = pyqtSignal(str, int)
+
+    MARGIN = 4
+    SPACING = 6
+
+    def __init__(self, actions, parent=None):
+        """actions: قائمة (key, text, color, hover_color)"""
+        super().__init__(parent)
+        self.actions = list(actions)
+        self.hover = None  # (row, action_key) تحت مؤشر الفأرة
+        self.font = QFont("Segoe UI", 9, QFont.Bold)
+
+    def button_rects(self, rect):
+        inner = rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        count = len(self.actions)
+        width = (inner.width() - self.SPACING * (count - 1)) // count
+        return [
+            QRect(inner.left() + i * (width + self.SPACING), inner.top(), width, inner.height())
+            for i in range(count)
+        ]
+
+    def action_at(self, rect, pos):
+        for (key, *_), button in zip(self.actions, self.button_rects(rect)):
+            if button.contains(pos):
+                return key
+        return None
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(self.font)
+        for (key, text, color, hover_color), button in zip(self.actions, self.button_rects(option.rect)):
+            hovered = self.hover == (index.row(), key)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(hover_color if hovered else color))
+            painter.drawRoundedRect(button, 5, 5)
+            painter.setPen(QColor("white"))
+            painter.drawText(button, Qt.AlignCenter, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseMove:
+            hover = (index.row(), self.action_at(option.rect, event.pos()))
+            if hover != self.hover:
+                self.hover = hover
+                self.parent().viewport().update()
+            return False
+
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            key = self.action_at(option.rect, event.pos())
+            if key is not None:
+                self.clicked.emit(key, index.row())
+                return True
+        return False
@@ -1,15 +1,18 @@
 import sys
 import os
-import shutil
 from PyQt5.QtWidgets import QWidget, QFileDialog, QMessageBox, QListWidgetItem
 from PyQt5.uic import loadUi
-from PyQt5.QtCore import pyqtSignal, QDate, Qt
+from PyQt5.QtCore import pyqtSignal, QDate, QSize, Qt
+from PyQt5.QtGui import QIcon
 from db import db
+from translations import translations
+import image_store
+import thumbnails
 
 class EditArtifactWindow(QWidget):
     goDetails = pyqtSignal(int) 
 
-    def __init__(self, artifact_id):
+    def __init__(self, artifact_id=None):
         super().__init__()
         try:
             loadUi("edit_artifact.ui", self)
@@ -17,19 +20,39 @@ class EditArtifactWindow(QWidget):
             print(f"Error loading UI: {e}")
             return
             
-        self.artifact_id = artifact_id
+        self.artifact_id = None
         self.new_images = [] 
         self.deleted_images_ids = []
+        self.pending_data = None
+        self.t = translations["ar"]
+        # تاريخ الترميم الافتراضي من التصميم (لقطعة بلا تاريخ بعد قطعة لها تاريخ)
+        self.default_retrieval_date = self.dateRetrieval.date()
 
-        self.load_combos()
-        self.load_artifact_data()
+        # الصور الجديدة تُحفظ في الخلفية (نافذة تقدم وإلغاء)، ثم التعديلات
+        self.ingest = image_store.ImageIngest(self)
+        self.ingest.stored.connect(self.commit_changes)
+
+        # الصور المحفوظة بمعاينتها الصغيرة (thumbnails "thumb")
+        self.imagesList.setIconSize(QSize(48, 48))
 
         self.btnAddImages.clicked.connect(self.pick_images)
         self.btnRemoveImage.clicked.connect(self.remove_selected_image)
         self.btnSave.clicked.connect(self.save_changes)
         self.btnCancel.clicked.connect(lambda: self.goDetails.emit(self.artifact_id))
 
+        if artifact_id is not None:
+            self.set_artifact(artifact_id)
+
+    def set_artifact(self, artifact_id):
+        """تعديل قطعة أخرى في نفس الصفحة: كل الحقول والصور المختارة تبدأ من جديد"""
+        self.artifact_id = artifact_id
+        self.new_images = []
+        self.deleted_images_ids = []
+        self.load_combos()
+        self.load_artifact_data()
+
     def set_translation(self, t):
+        self.t = t
         self.pageTitle.setText(t["edit_title"])
         
         self.groupBoxBasic.setTitle(t["grp_basic"])
@@ -80,7 +103,11 @@ class EditArtifactWindow(QWidget):
 
     def load_artifact_data(self):
         data = db.get_artifact_for_edit(self.artifact_id)
-        if not data: return
+        if not data:
+            # قطعة محذوفة: لا نترك بيانات القطعة السابقة (الحفظ يرفض اسماً فارغاً)
+            self.inputName.clear()
+            self.imagesList.clear()
+            return
 
         # Text Fields
         self.inputInventoryNo.setText(data.get('inventory_number', ''))
@@ -114,6 +141,8 @@ class EditArtifactWindow(QWidget):
         # Dates
         if data.get('restoration_date'):
             self.dateRetrieval.setDate(QDate.fromString(str(data['restoration_date']), "yyyy-MM-dd"))
+        else:
+            self.dateRetrieval.setDate(self.default_retrieval_date)
         if data.get('editing_date'):
             self.dateEditing.setDate(QDate.fromString(str(data['editing_date']), "yyyy-MM-dd"))
         else:
@@ -122,19 +151,17 @@ class EditArtifactWindow(QWidget):
         self.load_images_list()
 
     def set_combo(self, combo, value_id):
-        if value_id:
-            for i in range(combo.count()):
-                if combo.itemData(i) == value_id:
-                    combo.setCurrentIndex(i)
-                    return
+        combo.setCurrentIndex(max(combo.findData(value_id), 0) if value_id else 0)  # 0 = "---"
 
     def load_images_list(self):
         self.imagesList.clear()
         old_imgs = db.get_artifact_images(self.artifact_id)
         for img in old_imgs:
             if img['id'] not in self.deleted_images_ids:
-                item = QListWidgetItem(f"📁 {img['image_path']}")
+                item = QListWidgetItem(f"📁 {img['original_name']}")
                 item.setData(Qt.UserRole, {"type": "old", "id": img['id']})
+                pixmap = thumbnails.preview_pixmap(img['image_path'], "thumb")
+                if pixmap: item.setIcon(QIcon(pixmap))
                 self.imagesList.addItem(item)
 
         for path in self.new_images:
@@ -163,6 +190,7 @@ class EditArtifactWindow(QWidget):
         self.load_images_list()
 
     def save_changes(self):
+        if self.ingest.is_running(): return
         name = self.inputName.text().strip()
         if not name: return
 
@@ -197,23 +225,29 @@ class EditArtifactWindow(QWidget):
             "restoration_method_id": None 
         }
 
-        if db.update_artifact(data):
-            for img_id in self.deleted_images_ids:
-                db.delete_image(img_id)
+        self.pending_data = data
+        if self.new_images:
+            self.ingest.start(self.new_images, self.t)
+        else:
+            self.commit_changes([])
 
-            folder = "artifact_images"
-            if not os.path.exists(folder): os.makedirs(folder)
-            
-            for img_path in self.new_images:
-                safe_inv = data['inventory_number'].replace("/", "-")
-                filename = f"{self.artifact_id}_{safe_inv}_{os.path.basename(img_path)}"
-                dest = os.path.join(folder, filename)
-                try:
-                    shutil.copy(img_path, dest)
-                    db.insert_image(self.artifact_id, filename)
-                except: pass
-            
+    def commit_changes(self, images):
+        """التعديلات والصور المحذوفة والجديدة في معاملة واحدة، بعد وصول ملفات الصور إلى المخزن"""
+        try:
+            with db.transaction():
+                saved = db.update_artifact(self.pending_data)
+                if saved:
+                    for img_id in self.deleted_images_ids:
+                        db.delete_image(img_id)
+                    image_store.insert_images(db, self.pending_data["id"], images)
+        except Exception as e:
+            print(f"❌ Save Error: {e}")
+            saved = False
+
+        if saved:
+            image_store.collect_garbage(db)  # ملفات لم تعد أي قطعة تستعملها
             # تحديث صامت وعودة
-            self.goDetails.emit(self.artifact_id)
+            self.goDetails.emit(self.pending_data["id"])
         else:
+            image_store.remove_new(images)
             QMessageBox.warning(self, "خطأ", "فشل التحديث")
@@ -0,0 +1,178 @@
+"""تصدير القطع (كل الأرشيف أو نتيجة بحث وفلاتر) إلى CSV أو JSON Lines أو Excel (XLSX).
+
+الاستعمال:
+    python exporter.py OUT.csv|OUT.jsonl|OUT.xlsx [--db heritage.db] [--query "نص البحث"] [--filter type=3 ...]
+                       [--sort name [--desc]]
+
+الصفوف تُقرأ من SQLite دفعة بدفعة (Database.iter_artifacts) وتُكتب مباشرة في الملف،
+فاستهلاك الذاكرة ثابت مهما كبر الأرشيف. عناوين CSV/XLSX هي نفس العناوين التي يقبلها
+importer.py، فالملف المصدّر يمكن استيراده من جديد.
+الكتابة تتم في ملف مؤقت بجانب الملف المطلوب، ولا يُستبدل به إلا عند نجاح التصدير:
+عند الإلغاء أو الخطأ لا يبقى ملف ناقص.
+XLSX يحتاج مكتبة openpyxl (pip install openpyxl).
+"""
+import argparse
+import csv
+import json
+import os
+
+# (المفتاح في dict الخاص بـ iter_artifacts، عنوان العمود، مفتاح JSON)
+COLUMNS = [
+    ("artifact_code", "الكود الآلي", "artifact_code"),
+    ("inventory_number", "رقم الجرد", "inventory_number"),
+    ("name", "اسم القطعة", "name"),
+    ("source", "المصدر", "source"),
+    ("type", "النوع", "type"),
+    ("quantity", "الكمية", "quantity"),
+    ("material", "المادة", "material"),
+    ("period", "الفترة التاريخية", "period"),
+    ("condition", "حالة الحفظ", "condition"),
+    ("restoration_date", "تاريخ الترميم", "date"),
+    ("storage", "الموقع", "storage"),
+    ("storage_row", "الصف", "storage_row"),
+    ("storage_col", "العمود", "storage_col"),
+    ("dim_length", "الطول", "dim_length"),
+    ("dim_width", "العرض", "dim_width"),
+    ("dim_diameter", "القطر", "dim_diameter"),
+    ("dim_thickness", "السمك", "dim_thickness"),
+    ("weight", "الوزن", "weight"),
+    ("weight_unit", "وحدة الوزن", "weight_unit"),
+    ("description", "الوصف", "description"),
+    ("notes", "ملاحظات", "notes"),
+    ("card_editor", "محرر البطاقة", "card_editor"),
+    ("editing_date", "تاريخ التحرير", "editing_date"),
+    ("created_at", "تاريخ الإضافة", "created_at"),
+]
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".xlsx": "xlsx"}
+
+# كل كم صف يُستدعى on_progress / is_cancelled
+PROGRESS_EVERY = 1000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"unsupported export format: {path} (use {', '.join(FORMATS)})")
+    return fmt
+
+
+# =========================================================
+#  Writers (كل writer يستهلك generator من الصفوف)
+# =========================================================
+
+def _write_csv(path, rows):
+    # utf-8-sig: Excel يفتح الملف بالعربية مباشرة
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow([header for _, header, _ in COLUMNS])
+        for row in rows:
+            writer.writerow(["" if row[key] is None else row[key] for key, _, _ in COLUMNS])
+
+
+def _write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps({name: row[key] for key, _, name in COLUMNS}, ensure_ascii=False))
+            f.write("\n")
+
+
+def _write_xlsx(path, rows):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("كتابة ملفات Excel تحتاج مكتبة openpyxl (pip install openpyxl)")
+
+    # write_only: كل سطر يُكتب للملف المؤقت فوراً بدل بناء الورقة كاملة في الذاكرة
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("artifacts")
+    ws.sheet_view.rightToLeft = True
+    ws.append([header for _, header, _ in COLUMNS])
+    try:
+        for row in rows:
+            ws.append([row[key] for key, _, _ in COLUMNS])
+    except BaseException:
+        ws.close()  # إغلاق الملف المؤقت للورقة قبل التخلي عنها (إلغاء أو خطأ)
+        raise
+    wb.save(path)
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "xlsx": _write_xlsx}
+
+
+# =========================================================
+#  Export
+# =========================================================
+
+def export_artifacts(db, path, query_text="", filters=None, on_progress=None, is_cancelled=None, sort=None):
+    """تصدير القطع المطابقة لـ query_text و filters ({facet: id}) إلى path (الصيغة من الامتداد). يعيد عدد الصفوف.
+    sort: (العمود، تنازلي؟) كما في Database.search_page، لنفس ترتيب القائمة المعروضة.
+    on_progress(written) كل PROGRESS_EVERY صف؛ is_cancelled() → ExportCancelled ولا يُكتب شيء."""
+    writer = _WRITERS[export_format(path)]
+    written = 0
+
+    def rows():
+        nonlocal written
+        for row in db.iter_artifacts(query_text, filters=filters, sort=sort):
+            if written % PROGRESS_EVERY == 0:
+                if is_cancelled and is_cancelled(): raise ExportCancelled()
+                if on_progress and written: on_progress(written)
+            written += 1
+            yield row
+
+    tmp_path = f"{path}.part"
+    try:
+        writer(tmp_path, rows())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+    if on_progress: on_progress(written)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out")
+    parser.add_argument("--db", default="heritage.db")
+    parser.add_argument("--query", default="", help="export only the search result for this text")
+    parser.add_argument("--filter", action="append", default=[], metavar="FACET=ID",
+                        help="type, material, period, condition or storage id (repeatable)")
+    parser.add_argument("--sort", choices=["code", "inv_num", "name", "type", "material", "storage", "date", "weight"],
+                        help="order rows like the list sorted by this column (default: the list's default order)")
+    parser.add_argument("--desc", action="store_true", help="with --sort: descending")
+    args = parser.parse_args()
+
+    try:
+        export_format(args.out)
+        filters = {}
+        for item in args.filter:
+            facet, _, value = item.partition("=")
+            filters[facet.strip()] = int(value)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    from db import Database
+    db = Database(args.db)
+
+    def progress(written):
+        print(f"\r   {written} قطعة", end="", flush=True)
+
+    try:
+        sort = (args.sort, args.desc) if args.sort else None
+        written = export_artifacts(db, args.out, args.query, filters, on_progress=progress, sort=sort)
+    except Exception as e:
+        print(f"\n❌ فشل التصدير: {e}")
+        raise SystemExit(1)
+    finally:
+        db.close_all()
+
+    print(f"\n✅ تم تصدير {written} قطعة إلى {args.out}")
+
+
+if __name__ == "__main__":
+    main()
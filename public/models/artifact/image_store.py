@@ -0,0 +1,333 @@
+"""مخزن صور القطع حسب المحتوى: كل صورة ملف واحد مهما أضيفت من مرات.
+
+اسم الملف هو بصمة SHA-256 لمحتواه، في مجلدين فرعيين من أول أحرفها
+(artifact_images/ab/cd/abcd….jpg)، فلا يكبر أي مجلد إلى مئات الآلاف من الملفات.
+artifact_images.image_path يحفظ هذا المسار النسبي، و original_name اسم الملف كما اختاره المستخدم.
+نفس الصورة لقطعتين = ملف واحد وسطران؛ image_files.refs يعدّ الأسطر (مشغلات، انظر migrations.py)
+والملف يُحذف من القرص عندما لا يبقى له سطر (collect_garbage).
+الحذف والحفظ يتمان تحت قفل الكتابة: collect_garbage يحذف الملفات داخل معاملته، و insert_images
+يتحقق من وجود الملفات بعد إضافة أسطرها ويعيد الناقص منها (ملف موجود أعاده store ثم حذفه تنظيف).
+
+الصور القديمة ({id}_{inventory}_{name} مباشرة في artifact_images/) تبقى تعمل كما هي.
+لنقلها إلى المخزن (مع دمج المكرر منها):
+    python image_store.py [heritage.db]
+"""
+import hashlib
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImageReader
+from PyQt5.QtWidgets import QMessageBox, QProgressDialog
+
+import thumbnails
+
+IMAGES_DIR = thumbnails.IMAGES_DIR
+CHUNK_SIZE = 1024 * 1024
+# صور تُعالج معاً عند الحفظ: القراءة والبصمة والنسخ وفك الصور تعمل خارج الـ GIL
+INGEST_THREADS = min(4, os.cpu_count() or 1)
+# ab/cd/<64 hex>.ext
+_STORED = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$")
+
+
+def is_stored(image_path):
+    return bool(_STORED.match(image_path))
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stored_path(digest, filename):
+    """المسار النسبي (بـ / على كل الأنظمة) لمحتوى digest؛ الامتداد من الاسم الأصلي"""
+    ext = os.path.splitext(filename)[1].lower().lstrip(".") or "img"
+    if ext == "jpeg": ext = "jpg"
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def store(src, link=False):
+    """نسخ ملف إلى المخزن (إلا إذا كان محتواه موجوداً). يعيد (image_path، هل هو ملف جديد).
+    link: ربط (hard link) بدل النسخ إن أمكن، فقط لملف سيُحذف أصله (الترحيل)؛ ملف المستخدم يُنسخ دائماً
+    حتى لا يغيّر تعديله لاحقاً الصورة المحفوظة."""
+    image_path = stored_path(file_hash(src), src)
+    dest = thumbnails.source_path(image_path)
+    if os.path.exists(dest):
+        return image_path, False
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    # نسخ ثم إعادة تسمية: لا يظهر في المخزن ملف نصف منسوخ باسم بصمة صحيحة
+    tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            if not link: raise OSError
+            os.link(src, tmp)  # نفس القرص: بدون نسخ البيانات
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+    return image_path, True
+
+
+def remove_new(stored):
+    """حذف ملفات دفعة لم تُحفظ أسطرها (إلغاء أو فشل): فقط التي أنشأتها هذه الدفعة في المخزن (أي خيط)"""
+    for image_path, _, new_file, _ in stored:
+        if not new_file: continue
+        try:
+            os.remove(thumbnails.source_path(image_path))
+        except FileNotFoundError:
+            pass
+        thumbnails.remove_previews(image_path)
+
+
+# =========================================================
+#  Ingest (الصور المختارة في صفحتي الإضافة والتعديل)
+# =========================================================
+
+class IngestCancelled(Exception):
+    pass
+
+
+def ingest_file(src):
+    """صورة واحدة (أي خيط): فحص ثم المخزن ثم المعاينات. يعيد (image_path، الاسم الأصلي، ملف جديد؟، الملف المختار)"""
+    reader = QImageReader(src)
+    if not reader.canRead() or not reader.size().isValid():
+        raise ValueError(reader.errorString())
+    image_path, new_file = store(src)
+    if new_file:
+        # لا حاجة لإسقاط نسخة من pixmap_cache (خيط الواجهة فقط): اسم الملف بصمة محتواه، فلا نسخة قديمة له
+        thumbnails.generate_previews(image_path)
+    return image_path, os.path.basename(src), new_file, src
+
+
+def ingest(files, on_progress=None, is_cancelled=None, threads=INGEST_THREADS):
+    """ingest_file لكل الملفات بالتوازي. يعيد (ناجحة [(image_path، الاسم، جديد؟، الملف)]، فاشلة [(الملف، الخطأ)])
+    بترتيب files. on_progress(done, total) بعد كل ملف؛ is_cancelled() → IngestCancelled بعد انتهاء
+    ما بدأ، والملفات الجديدة من هذه الدفعة تُحذف."""
+    results = {}
+    cancelled = False
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = {pool.submit(ingest_file, src): src for src in files}
+        while pending:
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                src = pending.pop(future)
+                try:
+                    results[src] = (True, future.result())
+                except Exception as e:
+                    results[src] = (False, str(e) or type(e).__name__)
+            if done and on_progress: on_progress(len(results), len(files))
+            if is_cancelled and is_cancelled():
+                cancelled = True
+                for future in pending: future.cancel()
+                break
+    # الخروج من with ينتظر ما بدأ فعلاً
+    for future, src in pending.items():
+        if not future.cancelled() and future.exception() is None:
+            results[src] = (True, future.result())
+
+    stored = [results[src][1] for src in files if src in results and results[src][0]]
+    if cancelled:
+        remove_new(stored)
+        raise IngestCancelled()
+    failed = [(src, results[src][1]) for src in files if src in results and not results[src][0]]
+    return stored, failed
+
+
+class IngestSignals(QObject):
+    progress = pyqtSignal(int, int)     # (done, total)
+    finished = pyqtSignal(list, list)   # (ناجحة، فاشلة)، انظر ingest
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class IngestWorker(QRunnable):
+    def __init__(self, files):
+        super().__init__()
+        self.files = list(files)
+        self.cancel_requested = False
+        self.signals = IngestSignals()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            stored, failed = ingest(self.files, self.signals.progress.emit, lambda: self.cancel_requested)
+        except IngestCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(stored, failed)
+
+
+class ImageIngest(QObject):
+    """حفظ الصور المختارة في الخلفية مع نافذة تقدم وزر إلغاء (صفحتا الإضافة والتعديل).
+    stored(list) يُرسل عند الانتهاء بالصور الجاهزة (انظر ingest) لتُحفظ أسطرها (insert_images) في معاملة
+    واحدة مع القطعة؛ عند الإلغاء أو رفض المتابعة بعد صور فاشلة لا يُرسل شيء ولا يبقى ملف جديد."""
+    stored = pyqtSignal(list)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.worker = None
+        self.dialog = None
+        self.t = None
+
+    def is_running(self):
+        return self.worker is not None
+
+    def start(self, files, t):
+        if self.worker: return
+        self.t = t
+        parent = self.parent()
+        self.worker = IngestWorker(files)
+        self.dialog = QProgressDialog(t["ingest_progress"].format(done=0, total=len(files)),
+                                      t["btn_cancel"], 0, len(files), parent)
+        self.dialog.setWindowModality(Qt.WindowModal)
+        self.dialog.setMinimumDuration(300)  # صورة أو صورتان صغيرتان: بدون وميض نافذة
+        self.dialog.setAutoClose(False)
+        self.dialog.setAutoReset(False)
+        self.dialog.canceled.connect(self.worker.cancel)
+
+        signals = self.worker.signals
+        signals.progress.connect(self.on_progress)
+        signals.finished.connect(self.on_finished)
+        signals.failed.connect(self.on_failed)
+        signals.cancelled.connect(self.end)
+        self.pool.start(self.worker)
+
+    def on_progress(self, done, total):
+        if self.dialog:
+            self.dialog.setLabelText(self.t["ingest_progress"].format(done=done, total=total))
+            self.dialog.setValue(done)
+
+    def on_finished(self, stored, failed):
+        self.end()
+        if failed:
+            names = "\n".join(f"{os.path.basename(src)}: {error}" for src, error in failed[:10])
+            if len(failed) > 10: names += "\n..."
+            reply = QMessageBox.question(self.parent(), self.t["btn_save"],
+                                         self.t["ingest_failed"].format(count=len(failed), files=names),
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                remove_new(stored)
+                return
+        self.stored.emit(stored)
+
+    def on_failed(self, error):
+        self.end()
+        print(f"❌ Image Ingest Error: {error}")
+        QMessageBox.warning(self.parent(), "خطأ", error)
+
+    def end(self):
+        if self.dialog:
+            self.dialog.canceled.disconnect()
+            self.dialog.close()
+        self.dialog = None
+        self.worker = None
+
+
+def insert_images(db, artifact_id, stored):
+    """أسطر صور الدفعة للقطعة (داخل معاملة حفظ القطعة). بعد الإضافة لم يعد أي ملف منها يتيماً، والقفل
+    محجوز حتى COMMIT: ملف ناقص الآن حذفه تنظيف سابق بعد أن وجده store، فيُنسخ من جديد من الملف المختار."""
+    with db.transaction():
+        db.insert_images(artifact_id, stored)
+        for image_path, _, _, src in stored:
+            if os.path.exists(thumbnails.source_path(image_path)): continue
+            # OSError: الحفظ كله يفشل ويُلغى
+            if store(src)[0] != image_path:
+                raise OSError(f"الصورة تغيّرت بعد اختيارها: {src}")
+            thumbnails.generate_previews(image_path)
+
+
+def collect_garbage(db):
+    """حذف ملفات الصور (ومعايناتها) التي لم تعد أي قطعة تستعملها. يعيد عدد الملفات المحذوفة"""
+    removed = 0
+
+    def remove(image_path):
+        nonlocal removed
+        try:
+            os.remove(thumbnails.source_path(image_path))
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ تعذر حذف الصورة {image_path}: {e}")
+        thumbnails.remove(image_path)
+
+    db.take_orphan_images(remove)
+    return removed
+
+
+# =========================================================
+#  Migration (الصور القديمة → المخزن)
+# =========================================================
+
+def migrate_legacy(db, on_progress=None):
+    """نقل كل صورة قديمة إلى المخزن وتحديث أسطرها؛ المحتوى المكرر يصبح ملفاً واحداً.
+    آمن للإعادة بعد أي انقطاع: السطر لا يتغير إلا بعد وجود الملف في المخزن،
+    والملف القديم لا يُحذف إلا بعد تحديث السطر."""
+    legacy = [r[0] for r in db.fetch_all("SELECT DISTINCT image_path FROM artifact_images")
+              if not is_stored(r[0])]
+    counts = {"files": len(legacy), "moved": 0, "duplicates": 0, "missing": 0, "failed": 0, "bytes_saved": 0}
+    for i, old in enumerate(legacy, 1):
+        source = thumbnails.source_path(old)
+        if not os.path.isfile(source):
+            counts["missing"] += 1  # السطر يبقى كما هو
+            continue
+        try:
+            image_path, new_file = store(source, link=True)
+        except OSError as e:
+            print(f"⚠️ Image Error ({old}): {e}")
+            counts["failed"] += 1
+            continue
+        with db.transaction() as cur:
+            # القطعة التي لها الصورة نفسها باسم آخر: يُحذف السطر المكرر قبل التحديث (فهرس فريد)
+            cur.execute("""
+                DELETE FROM artifact_images WHERE image_path = ? AND artifact_id IN (
+                    SELECT artifact_id FROM artifact_images WHERE image_path = ?)
+            """, (old, image_path))
+            cur.execute("""
+                UPDATE artifact_images SET image_path = ?, original_name = coalesce(original_name, ?)
+                WHERE image_path = ?
+            """, (image_path, old, old))
+            # كما في insert_images: ملف موجود وجده store ثم حذفه تنظيف قبل هذه المعاملة
+            if not os.path.exists(thumbnails.source_path(image_path)):
+                new_file = store(source, link=True)[1]
+        if new_file:
+            counts["moved"] += 1
+            thumbnails.move(old, image_path)  # المعاينات الموجودة لا تُولَّد من جديد
+        else:
+            counts["duplicates"] += 1
+            counts["bytes_saved"] += os.path.getsize(source)
+        os.remove(source)
+        thumbnails.remove(old)
+        if on_progress: on_progress(i, len(legacy))
+    collect_garbage(db)
+    return counts
+
+
+def main():
+    from db import Database
+    db = Database(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("HERITAGE_DB", "heritage.db"))
+    start = time.perf_counter()
+    counts = migrate_legacy(db, lambda i, n: print(f"   {i:,} / {n:,}", end="\r") if i % 100 == 0 else None)
+    db.close_all()
+    print(f"✅ {counts['files']:,} صورة قديمة في {time.perf_counter() - start:.1f} s: "
+          f"{counts['moved']:,} نُقلت، {counts['duplicates']:,} مكررة دُمجت "
+          f"({counts['bytes_saved'] / 1024 / 1024:.1f} MB)، {counts['missing']:,} ملف غير موجود، {counts['failed']:,} فشلت")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""استيراد القطع من ملف CSV أو Excel (XLSX) إلى قاعدة البيانات.
+
+الاستعمال:
+    python importer.py FILE [--db heritage.db] [--chunk 1000] [--create-lookups] [--dry-run]
+
+الملف يُقرأ سطراً بسطر (لا يُحمّل كاملاً في الذاكرة) ويُضاف دفعة بدفعة عبر
+Database.insert_artifacts_many. أسماء النوع والمادة والفترة والحالة والموقع
+تُحوّل إلى معرفات من ذاكرة القوائم الثابتة (بعد التطبيع: الهمزات، التشكيل...).
+الأسطر غير الصالحة لا توقف الاستيراد: تُكتب مع سبب الرفض في FILE.rejects.csv.
+كل الاستيراد معاملة واحدة: عند الإلغاء أو الخطأ لا يُضاف أي سطر.
+
+الأعمدة المقبولة (العنوان بالعربية أو الفرنسية أو اسم الحقل): انظر FIELDS.
+XLSX يحتاج مكتبة openpyxl (pip install openpyxl).
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import os
+import re
+
+from db import normalize_text
+
+# الحقل → العناوين المقبولة في أول سطر من الملف
+FIELDS = {
+    "inventory_number": ["inventory_number", "رقم الجرد", "N° inventaire", "Inventaire"],
+    "name": ["name", "الاسم", "اسم القطعة", "Nom"],
+    "source": ["source", "المصدر", "Source"],
+    "type": ["type", "النوع", "Type"],
+    "quantity": ["quantity", "العدد", "الكمية", "Quantité"],
+    "material": ["material", "المادة", "Matériau"],
+    "period": ["period", "الفترة", "الفترة التاريخية", "Période"],
+    "condition": ["condition", "الحالة", "حالة الحفظ", "État"],
+    "date": ["date", "restoration_date", "تاريخ الحيازة", "تاريخ الترميم", "Date"],
+    "storage": ["storage", "الموقع", "المستودع", "Stockage", "Emplacement"],
+    "storage_row": ["storage_row", "الصف", "Rangée"],
+    "storage_col": ["storage_col", "العمود", "Colonne"],
+    "dim_length": ["dim_length", "الطول", "Longueur"],
+    "dim_width": ["dim_width", "العرض", "Largeur"],
+    "dim_diameter": ["dim_diameter", "القطر", "Diamètre"],
+    "dim_thickness": ["dim_thickness", "السمك", "Épaisseur"],
+    "weight": ["weight", "الوزن", "Poids"],
+    "weight_unit": ["weight_unit", "وحدة الوزن", "Unité"],
+    "description": ["description", "الوصف", "الوصف العلمي", "Description"],
+    "notes": ["notes", "ملاحظات", "Remarques"],
+    "card_editor": ["card_editor", "محرر البطاقة", "Rédacteur"],
+    "editing_date": ["editing_date", "تاريخ التحرير", "Date de rédaction"],
+}
+
+# الحقل → (جدول القائمة، المفتاح في dict الخاص بـ insert_artifact)
+LOOKUP_FIELDS = {
+    "type": ("artifact_types", "type_id"),
+    "material": ("materials", "material_id"),
+    "period": ("historical_periods", "period_id"),
+    "condition": ("preservation_states", "condition_id"),
+    "storage": ("storage_locations", "storage_id"),
+}
+
+NUMBER_FIELDS = ["dim_length", "dim_width", "dim_diameter", "dim_thickness", "weight"]
+WEIGHT_UNITS = {"g", "kg"}
+
+_HEADER_TO_FIELD = {normalize_text(alias): field for field, aliases in FIELDS.items() for alias in aliases}
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class RowError(ValueError):
+    pass
+
+
+# =========================================================
+#  Readers (قراءة الملف سطراً بسطر)
+# =========================================================
+
+def read_rows(path):
+    """(رقم السطر، dict بأسماء الأعمدة الأصلية) لكل سطر في الملف"""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        return _read_xlsx(path)
+    return _read_csv(path)
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        for line, row in enumerate(csv.DictReader(f, dialect=dialect), start=2):
+            yield line, row
+
+
+def _read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("قراءة ملفات Excel تحتاج مكتبة openpyxl (pip install openpyxl)")
+
+    # read_only: الأسطر تُقرأ من الملف عند الحاجة بدل تحميل الورقة كاملة
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        for line, values in enumerate(rows, start=2):
+            if values is None or all(v is None or v == "" for v in values): continue
+            yield line, dict(zip(header, values))
+    finally:
+        wb.close()
+
+
+# =========================================================
+#  Importer
+# =========================================================
+
+class ArtifactImporter:
+    """تحويل أسطر الملف إلى dict بصيغة insert_artifact والتحقق منها، ثم إضافتها دفعة بدفعة"""
+
+    def __init__(self, db, create_lookups=False):
+        self.db = db
+        self.create_lookups = create_lookups
+        # {table: {الاسم بعد التطبيع: id}} من ذاكرة القوائم الثابتة
+        self.lookup_ids = {
+            table: {normalize_text(r["name"]): r["id"] for r in db.lookups()[table]}
+            for table, _ in LOOKUP_FIELDS.values()
+        }
+        self.created = []  # (table, name) القيم الجديدة التي أُضيفت للقوائم
+        # نفس العناوين والأسماء تتكرر في كل الأسطر: التطبيع مرة واحدة لكل قيمة مختلفة
+        self.header_fields = {}
+        self.resolved = {table: {} for table in self.lookup_ids}
+
+    def resolve(self, cur, table, name):
+        item_id = self.resolved[table].get(name)
+        if item_id is not None: return item_id
+        key = normalize_text(name)
+        item_id = self.lookup_ids[table].get(key)
+        if item_id is None:
+            if not self.create_lookups:
+                raise RowError(f"unknown {table} '{name}'")
+            cur.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,))
+            item_id = self.lookup_ids[table][key] = cur.lastrowid
+            self.created.append((table, name))
+        self.resolved[table][name] = item_id
+        return item_id
+
+    def convert(self, cur, raw):
+        """سطر من الملف → dict لـ insert_artifacts_many (أو RowError مع السبب)"""
+        row = {}
+        for header, value in raw.items():
+            if header not in self.header_fields:
+                self.header_fields[header] = _HEADER_TO_FIELD.get(normalize_text(header or ""))
+            field = self.header_fields[header]
+            if field is None: continue
+            row[field] = value.strip() if isinstance(value, str) else value
+
+        if not row.get("name"):
+            raise RowError("name is required")
+
+        data = {
+            "name": str(row["name"]),
+            "quantity": _integer(row.get("quantity"), "quantity", default=1, minimum=1),
+            "description": _text(row.get("description")),
+            "weight_unit": (_text(row.get("weight_unit")) or "g").lower(),
+        }
+        if data["weight_unit"] not in WEIGHT_UNITS:
+            raise RowError(f"weight_unit must be one of {sorted(WEIGHT_UNITS)}")
+
+        for field in ["inventory_number", "source", "storage_row", "storage_col", "notes", "card_editor"]:
+            data[field] = _text(row.get(field))
+        for field in NUMBER_FIELDS:
+            data[field] = _number(row.get(field), field)
+        data["date"] = _date(row.get("date"), "date")
+        data["editing_date"] = _date(row.get("editing_date"), "editing_date") or ""
+
+        for field, (table, key) in LOOKUP_FIELDS.items():
+            name = _text(row.get(field))
+            data[key] = self.resolve(cur, table, name) if name else None
+        return data
+
+    def run(self, path, chunk_size=1000, rejects_path=None, dry_run=False,
+            on_progress=None, is_cancelled=None):
+        """استيراد الملف. يعيد dict: read, inserted, rejected, rejects_file.
+        on_progress(read, inserted, rejected) بعد كل دفعة؛ is_cancelled() → إلغاء كل الاستيراد."""
+        rejects_path = rejects_path or f"{path}.rejects.csv"
+        report = {"read": 0, "inserted": 0, "rejected": 0, "rejects_file": None}
+        rejects = None
+
+        def valid_rows(cur):
+            nonlocal rejects
+            for line, raw in read_rows(path):
+                if report["read"] % chunk_size == 0:
+                    if is_cancelled and is_cancelled(): raise ImportCancelled()
+                    if report["read"] == 0: _check_header(raw)
+                    elif on_progress: on_progress(report["read"], report["read"] - report["rejected"], report["rejected"])
+                report["read"] += 1
+                try:
+                    yield self.convert(cur, raw)
+                except RowError as e:
+                    if rejects is None:
+                        rejects = _RejectsWriter(rejects_path)
+                    rejects.write(line, raw, str(e))
+                    report["rejected"] += 1
+
+        try:
+            # استدعاء واحد لـ insert_artifacts_many على generator: معاملة واحدة بدون SAVEPOINT
+            # لكل دفعة (كل SAVEPOINT يجبر فهرس FTS5 على الكتابة للقرص ويضاعف زمن الاستيراد)
+            with self.db.transaction() as cur:
+                report["inserted"] = self.db.insert_artifacts_many(valid_rows(cur), chunk_size)
+                if on_progress: on_progress(report["read"], report["inserted"], report["rejected"])
+                if dry_run: raise ImportCancelled()
+        except ImportCancelled:
+            report["inserted"] = 0
+            if not dry_run: raise
+        finally:
+            if rejects is not None:
+                rejects.close()
+                report["rejects_file"] = rejects_path
+            if self.created: self.db.invalidate_lookups()
+        return report
+
+
+def _check_header(raw):
+    fields = {_HEADER_TO_FIELD.get(normalize_text(h or "")) for h in raw}
+    if "name" not in fields:
+        raise RuntimeError(f"no name column found in header: {[h for h in raw if h]}")
+
+
+class _RejectsWriter:
+    """الأسطر المرفوضة كما هي + رقم السطر وسبب الرفض (تُكتب أثناء القراءة)"""
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = None
+
+    def write(self, line, raw, error):
+        if self.writer is None:
+            columns = [h for h in raw if h is not None]
+            self.writer = csv.DictWriter(self.file, ["line", "error"] + columns, extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow({**raw, "line": line, "error": error})
+
+    def close(self):
+        self.file.close()
+
+
+# =========================================================
+#  Validation helpers
+# =========================================================
+
+def _text(value):
+    if value is None: return ""
+    if isinstance(value, float) and value.is_integer(): value = int(value)  # Excel: 12 → 12.0
+    return str(value).strip()
+
+
+def _number(value, field):
+    if value is None or value == "": return 0
+    try:
+        number = float(str(value).replace(",", ".")) if not isinstance(value, (int, float)) else float(value)
+    except ValueError:
+        raise RowError(f"{field} is not a number: '{value}'")
+    if number < 0:
+        raise RowError(f"{field} must not be negative")
+    return number
+
+
+def _integer(value, field, default, minimum):
+    if value is None or value == "": return default
+    number = _number(value, field)
+    if not number.is_integer() or number < minimum:
+        raise RowError(f"{field} must be an integer >= {minimum}")
+    return int(number)
+
+
+_DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"]
+
+def _date(value, field):
+    """تاريخ بصيغة YYYY-MM-DD (كما يحفظه البرنامج) أو None"""
+    if value is None or value == "": return None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime("%Y-%m-%d")
+    text = re.sub(r"\s+\d{1,2}:\d{2}(:\d{2})?$", "", str(value).strip())
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    raise RowError(f"{field} is not a date (YYYY-MM-DD): '{value}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file")
+    parser.add_argument("--db", default="heritage.db")
+    parser.add_argument("--chunk", type=int, default=1000)
+    parser.add_argument("--create-lookups", action="store_true", help="add unknown type/material/... names to the lists")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, nothing is saved")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"❌ الملف غير موجود: {args.file}")
+        raise SystemExit(1)
+
+    from db import Database
+    db = Database(args.db)
+    importer = ArtifactImporter(db, create_lookups=args.create_lookups)
+
+    def progress(read, inserted, rejected):
+        print(f"\r   {read} سطر، {rejected} مرفوض", end="", flush=True)
+
+    try:
+        report = importer.run(args.file, args.chunk, dry_run=args.dry_run, on_progress=progress)
+    except Exception as e:
+        print(f"\n❌ فشل الاستيراد (لم يُضف أي سطر): {e}")
+        raise SystemExit(1)
+    finally:
+        db.close_all()
+
+    print()
+    if args.dry_run:
+        print(f"✓ فحص فقط: {report['read'] - report['rejected']} سطر صالح من {report['read']}")
+    else:
+        print(f"✅ تمت إضافة {report['inserted']} قطعة من {report['read']} سطر")
+    if not args.dry_run:
+        for table, name in importer.created:
+            print(f"   + {table}: {name}")
+    if report["rejects_file"]:
+        print(f"⚠️ {report['rejected']} سطر مرفوض، التفاصيل في: {report['rejects_file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 import sys
 import os
-import bcrypt
 # 1. أضفنا QDesktopWidget هنا
 from PyQt5.QtWidgets import QWidget, QApplication, QVBoxLayout, QLabel, QGraphicsDropShadowEffect, QSizePolicy, QDesktopWidget
 from PyQt5.uic import loadUi
@@ -108,6 +107,7 @@ class LoginWindow(QWidget):
                 stored_hash = user_data[0]
                 role = user_data[1]
 
+            import bcrypt  # عند أول تسجيل دخول فقط، لا عند فتح البرنامج
             if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
                 Session.username = username
                 Session.role = role
@@ -5,15 +5,14 @@ from PyQt5.uic import loadUi
 from login import LoginWindow, Session  # Import Session here
 import warnings
 from translations import translations
+from db import db
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-from dashboard import DashboardWindow
-from artifacts_list import ArtifactsListWindow
-from add_artifact import AddArtifactWindow
-from settings import SettingsWindow
-from artifact_details import ArtifactDetailsWindow
-from edit_artifact import EditArtifactWindow
+# صفحات القائمة الجانبية (رقم الصفحة في switch_page)؛ كل صفحة تُنشأ وتُستورد وحدتها عند أول زيارة
+PAGE_DASHBOARD, PAGE_ARTIFACTS, PAGE_ADD, PAGE_SETTINGS, PAGE_USERS = range(5)
+# صفحتا التفاصيل والتعديل: تُفتحان من صفحات أخرى (show_artifact_details، show_edit_artifact)، بنفس الإنشاء والترجمة
+PAGE_DETAILS, PAGE_EDIT = 5, 6
 
 # Global variable for current language
 CURRENT_LANG = "ar"
@@ -34,18 +33,12 @@ class MainApp(QMainWindow):
         self.apply_modern_style()
 
         # ---------------------------------------------------------
-        # 1. Initialize Pages
+        # 1. Pages: تُنشأ عند أول زيارة (انظر page)
         # ---------------------------------------------------------
-        self.page_dashboard = DashboardWindow()
-        self.page_artifacts = ArtifactsListWindow()
-        self.page_add = AddArtifactWindow()
-        self.page_settings = SettingsWindow()
-
-        # Add pages to StackedWidget
-        self.pagesWidget.addWidget(self.page_dashboard)  # Index 0
-        self.pagesWidget.addWidget(self.page_artifacts)  # Index 1
-        self.pagesWidget.addWidget(self.page_add)        # Index 2
-        self.pagesWidget.addWidget(self.page_settings)   # Index 3
+        self.pages = {}        # رقم الصفحة -> الصفحة
+        self.page_langs = {}   # رقم الصفحة -> اللغة المطبقة عليها (الترجمة عند العرض فقط)
+        self.details_page = None  # صفحتا التفاصيل والتعديل: واحدة لكل منهما، تُربط بالقطعة عند كل عرض
+        self.edit_page = None
 
         # ---------------------------------------------------------
         # 2. Users Page Logic (Admin Only)
@@ -54,13 +47,7 @@ class MainApp(QMainWindow):
         if Session.role == "admin":
             if hasattr(self, "btnUsers"):
                 self.btnUsers.show()
-                # Initialize Users Page dynamically
-                from users import UsersWindow
-                self.page_users = UsersWindow()
-                self.pagesWidget.addWidget(self.page_users) # Index 4
-                
-                # Connect Button
-                self.btnUsers.clicked.connect(lambda: self.switch_page(4))
+                self.btnUsers.clicked.connect(lambda: self.switch_page(PAGE_USERS))
         else:
             # Hide button for non-admins
             if hasattr(self, "btnUsers"):
@@ -69,10 +56,10 @@ class MainApp(QMainWindow):
         # ---------------------------------------------------------
         # 3. Connect Sidebar Buttons
         # ---------------------------------------------------------
-        self.btnDashboard.clicked.connect(lambda: self.switch_page(0))
-        self.btnArtifacts.clicked.connect(lambda: self.switch_page(1))
-        self.btnAddArtifact.clicked.connect(lambda: self.switch_page(2))
-        self.btnSettings.clicked.connect(lambda: self.switch_page(3))
+        self.btnDashboard.clicked.connect(lambda: self.switch_page(PAGE_DASHBOARD))
+        self.btnArtifacts.clicked.connect(lambda: self.switch_page(PAGE_ARTIFACTS))
+        self.btnAddArtifact.clicked.connect(lambda: self.switch_page(PAGE_ADD))
+        self.btnSettings.clicked.connect(lambda: self.switch_page(PAGE_SETTINGS))
         self.btnLogout.clicked.connect(self.logout)
 
         # ✅ Connect Language Buttons
@@ -80,22 +67,68 @@ class MainApp(QMainWindow):
         self.btnLangFR.clicked.connect(lambda: self.change_language("fr"))
 
         # ---------------------------------------------------------
-        # 4. Connect Internal Signals
-        # ---------------------------------------------------------
-        self.page_add.goArtifacts.connect(lambda: self.switch_page(1))
-        self.page_dashboard.goAddArtifact.connect(lambda: self.switch_page(2))
-        self.page_artifacts.goAddArtifact.connect(lambda: self.switch_page(2))
-        self.page_artifacts.goDetails.connect(self.show_artifact_details)
-        
-        # Settings internal links if they exist
-        if hasattr(self.page_settings, 'goDashboard'): self.page_settings.goDashboard.connect(lambda: self.switch_page(0))
-        if hasattr(self.page_settings, 'goArtifacts'): self.page_settings.goArtifacts.connect(lambda: self.switch_page(1))
-
-        # ---------------------------------------------------------
-        # 5. Startup
+        # 4. Startup
         # ---------------------------------------------------------
         self.change_language(CURRENT_LANG)
-        self.switch_page(0)
+        self.switch_page(PAGE_DASHBOARD)
+
+    def create_page(self, index):
+        """إنشاء صفحة (مع استيراد وحدتها) وربط إشاراتها الداخلية"""
+        if index == PAGE_DASHBOARD:
+            from dashboard import DashboardWindow
+            page = self.page_dashboard = DashboardWindow()
+            page.goAddArtifact.connect(lambda: self.switch_page(PAGE_ADD))
+            page.goDetails.connect(self.show_artifact_details)
+        elif index == PAGE_ARTIFACTS:
+            from artifacts_list import ArtifactsListWindow
+            page = self.page_artifacts = ArtifactsListWindow()
+            page.goAddArtifact.connect(lambda: self.switch_page(PAGE_ADD))
+            page.goDetails.connect(self.show_artifact_details)
+        elif index == PAGE_ADD:
+            from add_artifact import AddArtifactWindow
+            page = self.page_add = AddArtifactWindow()
+            page.goArtifacts.connect(lambda: self.switch_page(PAGE_ARTIFACTS))
+        elif index == PAGE_SETTINGS:
+            from settings import SettingsWindow
+            page = self.page_settings = SettingsWindow()
+            # Settings internal links if they exist
+            if hasattr(page, 'goDashboard'): page.goDashboard.connect(lambda: self.switch_page(PAGE_DASHBOARD))
+            if hasattr(page, 'goArtifacts'): page.goArtifacts.connect(lambda: self.switch_page(PAGE_ARTIFACTS))
+        elif index == PAGE_USERS and Session.role == "admin":
+            from users import UsersWindow
+            page = self.page_users = UsersWindow()
+        elif index == PAGE_DETAILS:
+            from artifact_details import ArtifactDetailsWindow
+            page = self.details_page = ArtifactDetailsWindow()
+            page.goBack.connect(lambda: self.switch_page(PAGE_ARTIFACTS))
+            # عندما نضغط تعديل في التفاصيل -> نفتح صفحة التعديل
+            page.goEdit.connect(self.show_edit_artifact)
+        elif index == PAGE_EDIT:
+            from edit_artifact import EditArtifactWindow
+            page = self.edit_page = EditArtifactWindow()
+            # عند الانتهاء (حفظ أو إلغاء) نعود لصفحة التفاصيل لنرى التعديلات الجديدة
+            page.goDetails.connect(self.show_artifact_details)
+        else:
+            return None
+
+        self.pagesWidget.addWidget(page)
+        self.pages[index] = page
+        return page
+
+    def page(self, index):
+        """الصفحة رقم index (تُنشأ عند أول طلب) مترجمة باللغة الحالية"""
+        page = self.pages.get(index) or self.create_page(index)
+        if page is not None and self.page_langs.get(index) != CURRENT_LANG:
+            self.translate_page(index)
+        return page
+
+    def translate_page(self, index):
+        t = translations[CURRENT_LANG]
+        page = self.pages[index]
+        if hasattr(page, "set_translation"):  # صفحة التفاصيل بالعربية فقط: الاتجاه وحده
+            page.set_translation(t)
+        page.setLayoutDirection(Qt.RightToLeft if t["direction"] == "RTL" else Qt.LeftToRight)
+        self.page_langs[index] = CURRENT_LANG
 
     def apply_modern_style(self):
         """Forces the Charcoal Grey style on the main window"""
@@ -154,67 +187,44 @@ class MainApp(QMainWindow):
         if hasattr(self, "btnUsers") and not self.btnUsers.isHidden(): 
             self.btnUsers.setText(t["btn_users"])
 
-        # 3. Propagate Translation to Sub-pages
-        self.page_dashboard.set_translation(t)
-        self.page_artifacts.set_translation(t)
-        self.page_add.set_translation(t)
-        self.page_settings.set_translation(t)
-        
-        if hasattr(self, 'page_users'):
-            self.page_users.set_translation(t)
-            
-        # Update layout direction for all widgets in stack
-        for i in range(self.pagesWidget.count()):
-            self.pagesWidget.widget(i).setLayoutDirection(direction)
+        # 3. Translate the visible page now; the others when they are shown (see page)
+        current = next((i for i, p in self.pages.items() if p is self.pagesWidget.currentWidget()), None)
+        if current is not None:
+            self.translate_page(current)
 
     def switch_page(self, index):
-        self.pagesWidget.setCurrentIndex(index)
+        page = self.page(index)
+        if page is None: return
+        self.pagesWidget.setCurrentWidget(page)
         
         # Update button states
-        self.btnDashboard.setChecked(index == 0)
-        self.btnArtifacts.setChecked(index == 1)
-        self.btnAddArtifact.setChecked(index == 2)
-        self.btnSettings.setChecked(index == 3)
+        self.btnDashboard.setChecked(index == PAGE_DASHBOARD)
+        self.btnArtifacts.setChecked(index == PAGE_ARTIFACTS)
+        self.btnAddArtifact.setChecked(index == PAGE_ADD)
+        self.btnSettings.setChecked(index == PAGE_SETTINGS)
         if hasattr(self, "btnUsers") and not self.btnUsers.isHidden():
-            self.btnUsers.setChecked(index == 4)
+            self.btnUsers.setChecked(index == PAGE_USERS)
 
         # Refresh Data on Page Load
-        if index == 0: self.page_dashboard.load_stats()
-        if index == 1: self.page_artifacts.load_data()
-        if index == 4 and hasattr(self, 'page_users'): self.page_users.load_data()
+        if index == PAGE_DASHBOARD: page.load_stats()
+        if index == PAGE_ARTIFACTS: page.load_data()
+        if index == PAGE_USERS: page.load_data()
 
     def show_artifact_details(self, artifact_id):
-        """عرض تفاصيل القطعة"""
+        """عرض تفاصيل القطعة (صفحة واحدة تُنشأ مرة وتُعاد لكل قطعة)"""
         print(f">> فتح تفاصيل القطعة: {artifact_id}")
-        
-        # 1. إنشاء صفحة التفاصيل
-        self.details_page = ArtifactDetailsWindow(artifact_id)
-        
-        # 2. ربط زر العودة (للرجوع للقائمة)
-        self.details_page.goBack.connect(lambda: self.switch_page(1))
-        
-        # 3. ✅✅✅ ربط زر التعديل (هذا هو السطر المفقود غالباً)
-        # عندما نضغط تعديل في التفاصيل -> نفتح صفحة التعديل
-        self.details_page.goEdit.connect(self.show_edit_artifact)
-
-        # 4. العرض
-        self.pagesWidget.addWidget(self.details_page)
-        self.pagesWidget.setCurrentWidget(self.details_page)
+        # الصفحة (تُنشأ عند أول استعمال، باللغة والاتجاه الحاليين) ثم ربطها بالقطعة والعرض
+        page = self.page(PAGE_DETAILS)
+        page.set_artifact(artifact_id)
+        self.pagesWidget.setCurrentWidget(page)
 
     def show_edit_artifact(self, artifact_id):
-        """فتح صفحة التعديل"""
+        """فتح صفحة التعديل (صفحة واحدة تُنشأ مرة وتُعاد لكل قطعة)"""
         print(f">> تعديل القطعة رقم: {artifact_id}")
-        
-        # 1. إنشاء صفحة التعديل
-        self.edit_page = EditArtifactWindow(artifact_id)
-        
-        # 2. ربط العودة (سواء بعد الحفظ أو الإلغاء)
-        # عند الانتهاء، نعود لصفحة التفاصيل لنرى التعديلات الجديدة
-        self.edit_page.goDetails.connect(self.show_artifact_details)
-        
-        # 3. العرض
-        self.pagesWidget.addWidget(self.edit_page)
-        self.pagesWidget.setCurrentWidget(self.edit_page)
+        page = self.page(PAGE_EDIT)
+        page.set_artifact(artifact_id)
+        self.pagesWidget.setCurrentWidget(page)
+
     def logout(self):
         self.close()
         global login_win
@@ -230,6 +240,7 @@ def start_main_app():
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(db.close_all)
     login_win = LoginWindow()
     login_win.loginSuccess.connect(start_main_app)
     login_win.show()
@@ -0,0 +1,452 @@
+"""ترحيل مخطط قاعدة البيانات (Schema Migrations).
+
+كل ترحيل له رقم إصدار، والإصدار الحالي للملف محفوظ في PRAGMA user_version.
+عند تشغيل البرنامج ينفذ Database() كل ترحيل لم يُطبق بعد، كل واحد داخل معاملة
+مستقلة (إذا فشل لا يتغير شيء ويبقى الإصدار كما هو).
+
+لإضافة تغيير على المخطط: أضف دالة جديدة وسجّلها في آخر MIGRATIONS برقم أكبر.
+لا تعدّل ترحيلاً قديماً بعد نشره، لأن قواعد البيانات الموجودة لن تعيد تنفيذه.
+
+الاستعمال من سطر الأوامر (بديل update_db.py القديم):
+    python migrations.py [heritage.db]
+"""
+import sys
+
+
+def _add_column_if_missing(cur, table, column, definition):
+    columns = [r[1] for r in cur.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _m001_base_schema(cur):
+    """الجداول الأساسية (كانت في create_tables) + أعمدة update_db.py"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    lookups = ["artifact_types", "materials", "historical_periods", 
+               "preservation_states", "restoration_methods", "storage_locations"]
+
+    for table in lookups:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL
+            )
+        """)
+
+    # ✅ تم إضافة card_editor و editing_date
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            artifact_code TEXT UNIQUE NOT NULL,
+            inventory_number TEXT,
+            name TEXT NOT NULL,
+            source TEXT,
+            artifact_type_id INTEGER,
+            quantity INTEGER DEFAULT 1,
+            material_id INTEGER,
+            historical_period_id INTEGER,
+            preservation_state_id INTEGER,
+            restoration_date TEXT,
+            restoration_method_id INTEGER,
+            storage_location_id INTEGER,
+            storage_row TEXT,
+            storage_col TEXT,
+            dim_length REAL DEFAULT 0,
+            dim_width REAL DEFAULT 0,
+            dim_diameter REAL DEFAULT 0,
+            dim_thickness REAL DEFAULT 0,
+            weight REAL DEFAULT 0,
+            weight_unit TEXT DEFAULT 'g',
+            description TEXT,
+            notes TEXT,
+            card_editor TEXT,
+            editing_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(artifact_type_id) REFERENCES artifact_types(id),
+            FOREIGN KEY(material_id) REFERENCES materials(id),
+            FOREIGN KEY(historical_period_id) REFERENCES historical_periods(id),
+            FOREIGN KEY(preservation_state_id) REFERENCES preservation_states(id),
+            FOREIGN KEY(storage_location_id) REFERENCES storage_locations(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS artifact_images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            artifact_id INTEGER,
+            image_path TEXT NOT NULL,
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(artifact_id) REFERENCES artifacts(id) ON DELETE CASCADE
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            current_value INTEGER DEFAULT 0
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO sequences (name, current_value) VALUES ('artifact_code_seq', 0)")
+
+    # قواعد قديمة أُنشئت قبل إضافة المحرر وتاريخ التحرير (كان يضيفها update_db.py)
+    _add_column_if_missing(cur, "artifacts", "card_editor", "TEXT")
+    _add_column_if_missing(cur, "artifacts", "editing_date", "TEXT")
+
+
+def _m002_indexes(cur):
+    """فهارس المفاتيح الأجنبية والبحث (JOIN, GROUP BY, صور القطعة)"""
+    # COUNT/GROUP BY حسب النوع والحالة... تُقرأ من الفهرس وحده (covering)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_type ON artifacts(artifact_type_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_material ON artifacts(material_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_period ON artifacts(historical_period_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_state ON artifacts(preservation_state_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_storage ON artifacts(storage_location_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_inventory ON artifacts(inventory_number)")
+    # get_artifact_images: البحث بـ artifact_id وقراءة image_path من الفهرس مباشرة
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_artifact_images_artifact ON artifact_images(artifact_id, image_path)")
+
+
+# الأعمدة المفهرسة نصياً والتعبير الذي يحسب قيمتها المُطبّعة من صف artifacts
+# (الكود يُفهرس أيضاً بدون الأصفار البادئة: البحث بـ 12 يجد 000000012)
+_FTS_COLUMNS = {
+    "name": "heritage_normalize({r}.name)",
+    "artifact_code": "heritage_normalize({r}.artifact_code) || ' ' || ltrim({r}.artifact_code, '0')",
+    "inventory_number": "heritage_normalize({r}.inventory_number)",
+    "description": "heritage_normalize({r}.description)",
+    "notes": "heritage_normalize({r}.notes)",
+    "source": "heritage_normalize({r}.source)",
+}
+
+
+def _fts_values(row_alias):
+    return ", ".join(expr.format(r=row_alias) for expr in _FTS_COLUMNS.values())
+
+
+def _m003_fulltext(cur):
+    """فهرس FTS5 على النصوص (مع تطبيع العربية والفرنسية) ومشغلات مزامنته"""
+    columns = ", ".join(_FTS_COLUMNS)
+    cur.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS artifacts_fts USING fts5(
+            {columns},
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    # وزن كل عمود في ترتيب النتائج (الاسم والكود ورقم الجرد أهم من الملاحظات)
+    cur.execute("INSERT INTO artifacts_fts(artifacts_fts, rank) VALUES('rank', 'bm25(10.0, 8.0, 8.0, 2.0, 1.0, 1.0)')")
+
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifacts_fts_insert AFTER INSERT ON artifacts BEGIN
+            INSERT INTO artifacts_fts(rowid, {columns}) VALUES (new.id, {_fts_values("new")});
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS artifacts_fts_delete AFTER DELETE ON artifacts BEGIN
+            DELETE FROM artifacts_fts WHERE rowid = old.id;
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifacts_fts_update AFTER UPDATE OF {columns} ON artifacts BEGIN
+            DELETE FROM artifacts_fts WHERE rowid = old.id;
+            INSERT INTO artifacts_fts(rowid, {columns}) VALUES (new.id, {_fts_values("new")});
+        END
+    """)
+
+    cur.execute("DELETE FROM artifacts_fts")
+    cur.execute(f"INSERT INTO artifacts_fts(rowid, {columns}) SELECT a.id, {_fts_values('a')} FROM artifacts a")
+
+
+# الأبعاد التي تُحصى في artifact_stats والعمود المقابل في artifacts
+# (القطع بدون قيمة تُحصى تحت key = 0، لأن معرفات القوائم تبدأ من 1)
+STATS_DIMENSIONS = {
+    "type": "artifact_type_id",
+    "material": "material_id",
+    "period": "historical_period_id",
+    "condition": "preservation_state_id",
+    "storage": "storage_location_id",
+}
+
+# إعادة العد الكامل من جدول artifacts: (dimension, key, count)
+STATS_RECOUNT_SQL = " UNION ALL ".join(
+    ["SELECT 'total', 0, COUNT(*) FROM artifacts"] + [
+        f"SELECT '{dim}', coalesce({col}, 0), COUNT(*) FROM artifacts GROUP BY 2"
+        for dim, col in STATS_DIMENSIONS.items()
+    ]
+)
+
+
+def _stats_upsert(rows):
+    """rows: قائمة (dimension, key_expr, delta) → جملة INSERT ... ON CONFLICT تضيف delta للعداد"""
+    values = ", ".join(f"('{dim}', {key}, {delta})" for dim, key, delta in rows)
+    return f"""
+        INSERT INTO artifact_stats (dimension, key, count) VALUES {values}
+        ON CONFLICT(dimension, key) DO UPDATE SET count = count + excluded.count;
+    """
+
+
+def rebuild_stats(cur):
+    """حساب artifact_stats و artifact_facets من الصفر (إصلاح أي انحراف عن العد الحقيقي)"""
+    cur.execute("DELETE FROM artifact_stats")
+    cur.execute(f"INSERT INTO artifact_stats (dimension, key, count) {STATS_RECOUNT_SQL}")
+    if cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'artifact_facets'").fetchone():
+        cur.execute("DELETE FROM artifact_facets")
+        cur.execute(f"INSERT INTO artifact_facets ({FACET_COLUMNS}, count) {FACETS_RECOUNT_SQL}")
+
+
+def _m004_stats(cur):
+    """جدول عدادات لوحة التحكم، تحدّثه المشغلات مع كل إضافة/تعديل/حذف"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS artifact_stats (
+            dimension TEXT NOT NULL,
+            key INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, key)
+        ) WITHOUT ROWID
+    """)
+
+    def row(alias, delta):
+        return [("total", 0, delta)] + [
+            (dim, f"coalesce({alias}.{col}, 0)", delta) for dim, col in STATS_DIMENSIONS.items()
+        ]
+
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifact_stats_insert AFTER INSERT ON artifacts BEGIN
+            {_stats_upsert(row("new", 1))}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifact_stats_delete AFTER DELETE ON artifacts BEGIN
+            {_stats_upsert(row("old", -1))}
+        END
+    """)
+    # التعديل: نقل القطعة من قيمتها القديمة إلى الجديدة (المجموع الكلي لا يتغير)
+    columns = ", ".join(STATS_DIMENSIONS.values())
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifact_stats_update AFTER UPDATE OF {columns} ON artifacts BEGIN
+            {_stats_upsert(row("old", -1)[1:] + row("new", 1)[1:])}
+        END
+    """)
+
+    rebuild_stats(cur)
+
+
+# مستويات الأولوية: 0 = لا تحتاج صيانة، وكلما زاد الرقم زادت الأولوية
+# القيم الأولية تُستنتج مرة واحدة من أسماء الحالات الموجودة، ثم تُعدل من الإعدادات
+_SEVERITY_FROM_NAME = [
+    (3, ["%تالف%", "%endommag%", "%détérior%"]),
+    (2, ["%ترميم%", "%سيئ%", "%restaur%", "%mauvais%"]),
+]
+
+
+def _m005_severity(cur):
+    """أولوية الصيانة لكل حالة حفظ + فهرس قائمة التنبيهات"""
+    _add_column_if_missing(cur, "preservation_states", "severity", "INTEGER NOT NULL DEFAULT 0")
+    for severity, patterns in reversed(_SEVERITY_FROM_NAME):
+        where = " OR ".join("name LIKE ?" for _ in patterns)
+        cur.execute(f"UPDATE preservation_states SET severity = ? WHERE {where}", [severity] + patterns)
+
+    # قائمة التنبيهات: القطع في حالة معينة مرتبة حسب تاريخ الترميم
+    # (يغني عن idx_artifacts_state لأنه يبدأ بنفس العمود)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_artifacts_state_restoration
+        ON artifacts(preservation_state_id, coalesce(restoration_date, ''), id)
+    """)
+    cur.execute("DROP INDEX IF EXISTS idx_artifacts_state")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_states_severity ON preservation_states(severity)")
+
+
+# عدد القطع لكل تركيبة (نوع، مادة، فترة، حالة، موقع): عدد الصفوف = عدد التركيبات
+# الموجودة فعلاً (بضعة آلاف) وليس عدد القطع، فعدّ الفلاتر منه لا يكبر مع الأرشيف
+FACET_COLUMNS = ", ".join(STATS_DIMENSIONS)
+
+FACETS_RECOUNT_SQL = f"""
+    SELECT {", ".join(f"coalesce({col}, 0)" for col in STATS_DIMENSIONS.values())}, COUNT(*)
+    FROM artifacts GROUP BY 1, 2, 3, 4, 5
+"""
+
+
+def _facets_upsert(alias, delta):
+    values = ", ".join(f"coalesce({alias}.{col}, 0)" for col in STATS_DIMENSIONS.values())
+    return f"""
+        INSERT INTO artifact_facets ({FACET_COLUMNS}, count) VALUES ({values}, {delta})
+        ON CONFLICT({FACET_COLUMNS}) DO UPDATE SET count = count + excluded.count;
+    """
+
+
+def _m006_facets(cur):
+    """جدول تركيبات الفلاتر لقائمة القطع (عدد النتائج لكل خيار)، تحدّثه المشغلات"""
+    columns = ", ".join(f"{dim} INTEGER NOT NULL" for dim in STATS_DIMENSIONS)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS artifact_facets (
+            {columns},
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY ({FACET_COLUMNS})
+        ) WITHOUT ROWID
+    """)
+    # فهرس لكل عمود غير الأول (الأول يغطيه المفتاح): عدّ خيارات فلتر مع فلتر آخر محدد
+    # يقرأ تركيبات القيمة المحددة فقط بدل كل الجدول
+    for dim in list(STATS_DIMENSIONS)[1:]:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_facets_{dim} ON artifact_facets({dim})")
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifact_facets_insert AFTER INSERT ON artifacts BEGIN
+            {_facets_upsert("new", 1)}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifact_facets_delete AFTER DELETE ON artifacts BEGIN
+            {_facets_upsert("old", -1)}
+        END
+    """)
+    columns = ", ".join(STATS_DIMENSIONS.values())
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS artifact_facets_update AFTER UPDATE OF {columns} ON artifacts BEGIN
+            {_facets_upsert("old", -1)}
+            {_facets_upsert("new", 1)}
+        END
+    """)
+    rebuild_stats(cur)
+
+
+# ترتيب قائمة القطع حسب عمود: التعبير المستعمل في ORDER BY (وفي الفهرس بنفس النص حرفياً،
+# وإلا لن يستعمله SQLite). {a} = اسم الجدول المستعار في الاستعلام ("a.") أو "" في الفهرس.
+# الوزن يُقارن بالغرام مهما كانت الوحدة.
+SORT_EXPRESSIONS = {
+    "name": "{a}name",
+    "inv_num": "coalesce({a}inventory_number, '')",
+    "date": "coalesce({a}restoration_date, '')",
+    "weight": "coalesce({a}weight, 0) * (CASE {a}weight_unit WHEN 'kg' THEN 1000 ELSE 1 END)",
+}
+
+
+def _m007_sort_indexes(cur):
+    """فهارس ترتيب القائمة: كل صفحة تُقرأ من الفهرس بالترتيب بدل ترتيب كل الجدول"""
+    for key, expression in SORT_EXPRESSIONS.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_artifacts_sort_{key} ON artifacts({expression.format(a='')})")
+    # إحصائيات الفهارس (sqlite_stat1): مع فلتر + ترتيب يختار SQLite بين فهرس الفلتر وفهرس
+    # الترتيب حسب عدد الصفوف الفعلي، بدل ترتيب كل القطع المطابقة للفلتر في كل صفحة.
+    # ANALYZE كامل (بدون analysis_limit): التقدير الجزئي يعطي SQLite أعداداً خاطئة لكل قيمة.
+    # تُحدّث بعد ذلك عبر PRAGMA optimize عند إغلاق البرنامج (Database.close_all)
+    cur.execute("ANALYZE")
+
+
+def _image_refs_upsert(path_expr, delta):
+    return f"""
+        INSERT INTO image_files (image_path, refs) VALUES ({path_expr}, {delta})
+        ON CONFLICT(image_path) DO UPDATE SET refs = refs + excluded.refs;
+    """
+
+
+def _m008_image_store(cur):
+    """عدد الأسطر التي تشير لكل ملف صورة (ملف واحد لكل محتوى، انظر image_store.py)، تحدّثه المشغلات"""
+    _add_column_if_missing(cur, "artifact_images", "original_name", "TEXT")
+
+    # نفس الصورة مرتين لنفس القطعة: سطر واحد يكفي، والفهرس يصبح فريداً
+    cur.execute("""
+        DELETE FROM artifact_images WHERE id NOT IN (
+            SELECT MIN(id) FROM artifact_images GROUP BY artifact_id, image_path
+        )
+    """)
+    cur.execute("DROP INDEX IF EXISTS idx_artifact_images_artifact")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_artifact_images_unique ON artifact_images(artifact_id, image_path)")
+
+    # الملفات بـ refs = 0 لم يعد يستعملها أحد: تحذفها image_store.collect_garbage (الحذف من القرص ليس في SQL)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS image_files (
+            image_path TEXT PRIMARY KEY,
+            refs INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_image_files_refs ON image_files(refs)")
+    # حذف القطعة يحذف صورها (ON DELETE CASCADE) وهذا يشغّل مشغل الحذف أيضاً
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS image_files_insert AFTER INSERT ON artifact_images BEGIN
+            {_image_refs_upsert("new.image_path", 1)}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS image_files_delete AFTER DELETE ON artifact_images BEGIN
+            {_image_refs_upsert("old.image_path", -1)}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS image_files_update AFTER UPDATE OF image_path ON artifact_images BEGIN
+            {_image_refs_upsert("old.image_path", -1)}
+            {_image_refs_upsert("new.image_path", 1)}
+        END
+    """)
+    cur.execute("DELETE FROM image_files")
+    cur.execute("INSERT INTO image_files (image_path, refs) SELECT image_path, COUNT(*) FROM artifact_images GROUP BY image_path")
+
+
+# القوائم الثابتة التي يحفظها Database.lookups() في الذاكرة
+LOOKUP_TABLES = ["artifact_types", "materials", "historical_periods",
+                 "preservation_states", "storage_locations", "restoration_methods"]
+
+
+def _m009_lookup_version(cur):
+    """عداد يزداد مع كل تعديل على جداول القوائم (مشغلات): ذاكرة القوائم لا تُلغى إلا عند تغيرها هي،
+    وليس مع كل كتابة من جهاز آخر (انظر Database._lookup_data)"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS lookup_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO lookup_version (id, version) VALUES (1, 0)")
+    for table in LOOKUP_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+
+MIGRATIONS = [
+    (1, "base schema", _m001_base_schema),
+    (2, "foreign-key and search indexes", _m002_indexes),
+    (3, "full-text search index", _m003_fulltext),
+    (4, "dashboard statistics table", _m004_stats),
+    (5, "maintenance severity", _m005_severity),
+    (6, "list filter counts", _m006_facets),
+    (7, "list sort indexes", _m007_sort_indexes),
+    (8, "image reference counts", _m008_image_store),
+    (9, "lookup list version", _m009_lookup_version),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db):
+    """تطبيق كل الترحيلات الناقصة على قاعدة البيانات (db: كائن Database)"""
+    conn = db.get_connection()
+    if current_version(conn) >= LATEST_VERSION:
+        return
+
+    for version, description, apply in MIGRATIONS:
+        # BEGIN IMMEDIATE ثم إعادة قراءة الإصدار: إذا شغّل جهازان البرنامج معاً لا يُطبق الترحيل مرتين
+        with db.transaction() as cur:
+            if current_version(conn) >= version:
+                continue
+            print(f"⚙️ Migrating database to v{version}: {description}...")
+            apply(cur)
+            cur.execute(f"PRAGMA user_version = {version}")
+
+    print(f"✓ Database schema is up to date (v{LATEST_VERSION})")
+
+
+if __name__ == "__main__":
+    from db import Database
+    Database(sys.argv[1] if len(sys.argv) > 1 else "heritage.db").close_all()
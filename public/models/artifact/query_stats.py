@@ -0,0 +1,261 @@
+"""قياس استعلامات SQLite (اختياري): المدة وعدد الصفوف والدالة المستدعية لكل استعلام.
+
+التفعيل: db.set_query_stats(QueryStats()) ثم db.set_query_stats(None) للإيقاف،
+أو من لوحة التشخيص المخفية في الإعدادات (Ctrl+Shift+D)، أو بمتغير البيئة HERITAGE_QUERY_STATS=1.
+بدون تفعيل لا يتغير شيء: الاتصالات تعيد مؤشرات sqlite3 العادية.
+
+الاستعلامات التي تتجاوز slow_ms تُكتب مع خطة التنفيذ (EXPLAIN QUERY PLAN) في سجل دوّار
+(slow_queries.log، ثم slow_queries.log.1 ...). المدة تشمل التنفيذ وقراءة كل الصفوف.
+"""
+import contextlib
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+SLOW_QUERY_MS = 100
+SLOW_LOG_FILE = "slow_queries.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+
+# عدد آخر المدد المحفوظة لكل دالة (لحساب p50 / p95 / p99)
+SAMPLES_PER_METHOD = 1000
+
+# دوال db.py العامة التي لا تعني شيئاً كاسم للمستدعي: نصعد إلى الدالة التي استدعتها
+_HELPERS = {"fetch_one", "fetch_all", "execute", "transaction", "cancellable"}
+_DB_FILES = {os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in ("db.py", "migrations.py")}
+_SKIPPED_FILES = {os.path.abspath(__file__), contextlib.__file__}
+_PLANNED = re.compile(r"\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+_code_names = {}  # code object → اسم الدالة، "" (تخطي) أو None (دالة مساعدة أو comprehension في db.py)
+
+
+def _code_name(code):
+    name = _code_names.get(code, False)
+    if name is False:
+        filename = os.path.abspath(code.co_filename)
+        if filename in _DB_FILES:
+            name = None if code.co_name.startswith(("_", "<")) or code.co_name in _HELPERS else code.co_name
+        elif filename in _SKIPPED_FILES:
+            name = ""
+        else:
+            name = f"{os.path.splitext(os.path.basename(filename))[0]}.{code.co_name}"
+        _code_names[code] = name
+    return name
+
+
+def caller_name():
+    """أقرب دالة عامة في Database (أو migrations) على مكدس الاستدعاء؛
+    وإن جاء الاستعلام من خارجها مباشرة: module.function للمستدعي."""
+    frame = sys._getframe(1)
+    while frame:
+        name = _code_name(frame.f_code)
+        if name: return name
+        frame = frame.f_back
+    return "?"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+# =========================================================
+#  Traced connection / cursor
+# =========================================================
+
+class TracedConnection(sqlite3.Connection):
+    """اتصال يعيد TracedCursor عندما يكون stats مفعلاً (Database.set_query_stats)"""
+    stats = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TracedCursor if self.stats is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if self.stats is None: return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        if self.stats is None: return super().executemany(sql, parameters)
+        return self.cursor().executemany(sql, parameters)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """يقيس كل استعلام من execute حتى آخر صف مقروء (أو execute التالي / إغلاق المؤشر)"""
+    _pending = None  # [stats, sql, params, method, seconds, rows]
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        stats = self.connection.stats
+        if stats is None: return super().execute(sql, parameters)
+        method = caller_name()
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._pending = [stats, sql, parameters, method, time.perf_counter() - start, max(self.rowcount, 0)]
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        stats = self.connection.stats
+        if stats is None: return super().executemany(sql, seq_of_parameters)
+        method = caller_name()
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            # خطة التنفيذ لا تحتاج قيماً حقيقية، لكن عدد المعاملات يجب أن يطابق
+            self._pending = [stats, sql, (None,) * sql.count("?"), method,
+                             time.perf_counter() - start, max(self.rowcount, 0)]
+            self._finish()
+        return self
+
+    def _fetched(self, start, rows, done):
+        pending = self._pending
+        if pending is None: return
+        pending[4] += time.perf_counter() - start
+        pending[5] += rows
+        if done: self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # execute(...).fetchone() مثلاً: المؤشر يُحذف قبل قراءة نهاية النتائج.
+        # المدة فقط: __del__ قد يأتي من جامع القمامة في خيط آخر، أو داخل معاملة، أو بعد إغلاق الاتصال،
+        # فلا يُنفَّذ EXPLAIN QUERY PLAN على الاتصال من هنا
+        self._finish(explain=False)
+
+    def _finish(self, explain=True):
+        pending, self._pending = self._pending, None
+        if pending is None: return
+        stats, sql, params, method, seconds, rows = pending
+        try:
+            stats.record(self.connection if explain else None, sql, params, method, seconds, rows)
+        except Exception as e:
+            print(f"Query Stats Error: {e}")
+
+
+# =========================================================
+#  Counters + slow-query log
+# =========================================================
+
+class QueryStats:
+    """عدادات لكل دالة (عدد، مجموع، صفوف، p50/p95/p99، الأقصى) وسجل الاستعلامات البطيئة"""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_path=SLOW_LOG_FILE, samples=SAMPLES_PER_METHOD):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.samples = samples
+        self.recent_slow = deque(maxlen=50)  # (الوقت، ms، الصفوف، الدالة، SQL) للوحة التشخيص
+        self._methods = {}
+        self._lock = threading.Lock()
+
+        self._logger = logging.Logger("heritage.slow_queries")
+        if log_path:
+            from logging.handlers import RotatingFileHandler  # فقط عند التفعيل، لا عند استيراد db.py
+            handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                          encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._logger.addHandler(handler)
+
+    def record(self, conn, sql, params, method, seconds, rows):
+        """conn: لخطة التنفيذ في سجل البطيئة، أو None بدون خطة (مؤشر حُذف قبل آخر صف)"""
+        ms = seconds * 1000
+        with self._lock:
+            m = self._methods.get(method)
+            if m is None:
+                m = self._methods[method] = {"count": 0, "total_ms": 0.0, "rows": 0, "max_ms": 0.0,
+                                             "samples": deque(maxlen=self.samples)}
+            m["count"] += 1
+            m["total_ms"] += ms
+            m["rows"] += rows
+            m["max_ms"] = max(m["max_ms"], ms)
+            m["samples"].append(ms)
+        if ms >= self.slow_ms:
+            self._log_slow(conn, sql, params, method, ms, rows)
+
+    def _log_slow(self, conn, sql, params, method, ms, rows):
+        sql = " ".join(sql.split())
+        self.recent_slow.append((time.strftime("%H:%M:%S"), ms, rows, method, sql))
+        lines = [f"{ms:.1f} ms  rows={rows}  {method}", f"    {sql}"]
+        if params: lines.append(f"    params: {str(params)[:300]}")
+        if conn is None:
+            lines.append("    (no plan: cursor released before its last row)")
+        else:
+            lines += [f"    {line}" for line in self.explain(conn, sql, params)]
+        self._logger.warning("\n".join(lines))
+
+    @staticmethod
+    def explain(conn, sql, params=()):
+        """خطة التنفيذ كشجرة نصية (مثل ‎.eqp في sqlite3)، على مؤشر عادي غير مقاس"""
+        if not _PLANNED.match(sql): return []
+        try:
+            plan = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in plan:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+
+    def summary(self):
+        """سطر لكل دالة، الأكثر استهلاكاً للوقت أولاً"""
+        with self._lock:
+            methods = [(name, dict(m), sorted(m["samples"])) for name, m in self._methods.items()]
+        result = []
+        for name, m, samples in methods:
+            result.append({
+                "method": name, "count": m["count"], "total_ms": m["total_ms"], "rows": m["rows"],
+                "p50": percentile(samples, 0.50), "p95": percentile(samples, 0.95),
+                "p99": percentile(samples, 0.99), "max_ms": m["max_ms"],
+            })
+        return sorted(result, key=lambda r: r["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+        self.recent_slow.clear()
+
+    def close(self):
+        for handler in self._logger.handlers:
+            handler.close()
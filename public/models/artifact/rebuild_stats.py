@@ -0,0 +1,46 @@
+"""فحص وإصلاح جداول العدادات artifact_stats و artifact_facets (لوحة التحكم وفلاتر القائمة).
+
+الاستعمال:
+    python rebuild_stats.py [heritage.db]            # فحص ثم إصلاح عند وجود انحراف
+    python rebuild_stats.py [heritage.db] --verify   # فحص فقط (رمز خروج 1 عند وجود انحراف)
+
+العدادات تحدّثها المشغلات تلقائياً، فلا حاجة لهذا الأمر في الاستعمال العادي.
+يفيد إذا عُدّل الملف ببرنامج خارجي أو نسخة قديمة من البرنامج لا تعرف المشغلات.
+"""
+import os
+import sys
+
+from db import Database
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    verify_only = "--verify" in sys.argv
+    db_file = args[0] if args else "heritage.db"
+
+    if not os.path.exists(db_file):
+        print(f"❌ لم يتم العثور على ملف قاعدة البيانات '{db_file}'")
+        raise SystemExit(1)
+
+    db = Database(db_file)
+    drift = db.verify_stats()
+    if not drift:
+        print("✅ العدادات مطابقة للعد الحقيقي")
+        db.close_all()
+        return
+
+    print(f"⚠️ {len(drift)} عداد غير مطابق:")
+    for dimension, key, stored, actual in drift:
+        print(f"   {dimension:<10} key={key:<6} stored={stored:<8} actual={actual}")
+
+    if verify_only:
+        db.close_all()
+        raise SystemExit(1)
+
+    db.rebuild_stats()
+    print("✅ تمت إعادة حساب العدادات" if not db.verify_stats() else "❌ ما زال هناك انحراف بعد إعادة الحساب")
+    db.close_all()
+
+
+if __name__ == "__main__":
+    main()
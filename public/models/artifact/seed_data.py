@@ -0,0 +1,190 @@
+"""توليد أرشيف تجريبي قابل للتكرار: نفس البذرة ونفس الحجم = نفس البيانات بالضبط.
+
+الاستعمال:
+    python seed_data.py OUT.db [--scale 10k] [--seed 1]
+
+الحجم من 1k إلى 1M قطعة (أو أي عدد). الأسماء والأوصاف عربية وفرنسية، والقيم موزعة
+بشكل غير متساوٍ (بعض الأنواع والمواد أكثر بكثير من غيرها) كما في أرشيف حقيقي.
+لكل قطعة 0 إلى 3 صور (أسطر في artifact_images فقط، بدون ملفات).
+القطع تُضاف عبر Database.insert_artifacts_many (معاملة واحدة، كل المشغلات تعمل كالمعتاد).
+يُستعمل أيضاً من demo_data.py و benchmark_suite.py.
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+# القوائم الثابتة (حالات الحفظ مع أولوية الصيانة)
+LOOKUPS = {
+    "artifact_types": ["مخطوطة", "سلاح", "آنية فخارية", "عملة نقدية", "تمثال", "مجوهارت", "أدوات زراعية", "نصيجة"],
+    "materials": ["ذهب", "فضة", "برونز", "حديد", "خشب", "فخار", "ورق بردي", "جلد", "حجر جيري"],
+    "historical_periods": ["العصر الإسلامي", "العصر العثماني", "العصر الروماني", "العصر البيزنطي", "العصر الحديث", "ما قبل التاريخ"],
+    "preservation_states": [("ممتازة", 0), ("جيدة", 0), ("متوسطة", 0), ("تحتاج ترميم", 2), ("تالفة جزئياً", 3)],
+    "storage_locations": ["المستودع الرئيسي A", "المستودع الفرعي B", "قاعة العرض 1", "الخزنة الحديدية", "غرفة الأرشيف"],
+    "restoration_methods": ["تنظيف كيميائي", "تنظيف ميكانيكي", "تثبيت أجزاء", "عزل حراري"],
+}
+
+# أماكن تخزين إضافية للأرشيفات الكبيرة: رف لكل STORAGE_PER_SHELF قطعة تقريباً
+STORAGE_PER_SHELF = 5000
+MAX_SHELVES = 200
+
+# (اسم، صفة) متوافقة في التذكير والتأنيث؛ الأسماء الفرنسية لحوالي ربع القطع
+_AR_NAMES = [
+    (["سيف", "درع", "إناء", "خاتم", "فأس", "مصباح", "قنديل", "صندوق", "رمح", "عقد"],
+     ["أثري", "قديم", "نادر", "ملكي", "مزخرف", "صغير", "كبير", "مذهب", "منقوش", "مكسور"]),
+    (["جرة", "عملة", "مخطوطة", "قلادة", "خوذة", "مزهرية", "لوحة", "سجادة", "مبخرة", "قارورة"],
+     ["أثرية", "قديمة", "نادرة", "ملكية", "مزخرفة", "صغيرة", "كبيرة", "مذهبة", "منقوشة", "مرممة"]),
+]
+_FR_NAMES = [
+    (["Épée", "Jarre", "Lampe", "Amphore", "Monnaie", "Fibule", "Stèle", "Coupe", "Bague", "Tablette"],
+     ["ancienne", "ornée", "dorée", "gravée", "romaine", "punique", "ottomane", "restaurée", "fragmentée", "royale"]),
+]
+_SOURCES = ["تنقيب 2019", "تنقيب 2023", "إهداء خاص", "شراء مزاد", "مصادرة", "موقع القلعة",
+            "Fouilles de Tipasa", "Don de la famille Benali", "Collection privée", "Saisie douanière"]
+_DESCRIPTIONS = [
+    "قطعة أثرية ذات قيمة تاريخية عالية.",
+    "عُثر عليها في طبقة أثرية مع بقايا فخارية.",
+    "تحمل نقوشاً كتابية غير مكتملة.",
+    "Objet présentant des traces de polychromie.",
+    "Découvert lors des fouilles de sauvetage.",
+]
+_NOTES = ["تم الفحص الأولي.", "تحتاج توثيقاً فوتوغرافياً.", "", "À vérifier par le conservateur.", ""]
+_INV_SERIES = ["أ", "ب", "ج", "د", "A", "B"]
+
+# تاريخ ثابت (وليس date.today()) حتى تبقى البيانات نفسها في كل تشغيل
+BASE_DATE = date(2025, 1, 1)
+
+
+def parse_scale(text):
+    """'10k' → 10000، '1M' → 1000000، '2500' → 2500"""
+    text = str(text).strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    number = float(text[:-1]) if factor > 1 else float(text)
+    n = int(number * factor)
+    if n < 1:
+        raise ValueError(f"invalid scale: {text}")
+    return n
+
+
+def _weights(count):
+    """توزيع Zipf تقريبي: العنصر الأول أكثر بكثير من الأخير"""
+    return [1 / (rank + 1) for rank in range(count)]
+
+
+def _insert_lookups(cur, n_artifacts):
+    """إضافة القوائم الثابتة الناقصة وإعادة {table: [ids]} بترتيب الإضافة"""
+    lookups = dict(LOOKUPS)
+    shelves = min(MAX_SHELVES, n_artifacts // STORAGE_PER_SHELF)
+    lookups["storage_locations"] = LOOKUPS["storage_locations"] + [
+        f"مخزن {k // 10 + 1} - رف {k % 10 + 1}" for k in range(shelves)]
+
+    ids = {}
+    for table, items in lookups.items():
+        by_name = {r[1]: r[0] for r in cur.execute(f"SELECT id, name FROM {table}")}
+        for item in items:
+            name, severity = item if isinstance(item, tuple) else (item, None)
+            if name in by_name: continue
+            if severity is None:
+                cur.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,))
+            else:
+                cur.execute(f"INSERT INTO {table} (name, severity) VALUES (?, ?)", (name, severity))
+            by_name[name] = cur.lastrowid
+        ids[table] = [by_name[item[0] if isinstance(item, tuple) else item] for item in items]
+    return ids
+
+
+def artifact_data(rnd, n_artifacts, ids):
+    """generator: dict لكل قطعة بنفس شكل insert_artifact (ids: {table: [ids]} للقوائم الثابتة)"""
+    choices = {table: (values, _weights(len(values))) for table, values in ids.items()}
+
+    def pick(table):
+        values, weights = choices[table]
+        return rnd.choices(values, weights)[0]
+
+    for i in range(1, n_artifacts + 1):
+        nouns, adjectives = rnd.choice(_FR_NAMES) if rnd.random() < 0.25 else rnd.choice(_AR_NAMES)
+        heavy = rnd.random() < 0.2
+        yield {
+            "name": f"{rnd.choice(nouns)} {rnd.choice(adjectives)}",
+            "inventory_number": f"{i}/{rnd.choice(_INV_SERIES)}",
+            "source": rnd.choice(_SOURCES),
+            "type_id": pick("artifact_types"),
+            "quantity": rnd.choice([1, 1, 1, 1, 2, 3, 5, 12]),
+            "material_id": pick("materials"),
+            "period_id": pick("historical_periods"),
+            "condition_id": pick("preservation_states"),
+            "date": (BASE_DATE - timedelta(days=rnd.randint(0, 365 * 15))).isoformat() if rnd.random() < 0.6 else "",
+            "storage_id": pick("storage_locations"),
+            "storage_row": f"R-{rnd.randint(1, 10)}",
+            "storage_col": f"C-{rnd.randint(1, 20)}",
+            "dim_length": round(rnd.uniform(2.0, 150.0), 1),
+            "dim_width": round(rnd.uniform(1.0, 60.0), 1),
+            "dim_diameter": round(rnd.uniform(1.0, 40.0), 1) if rnd.random() < 0.3 else 0,
+            "dim_thickness": round(rnd.uniform(0.1, 10.0), 1),
+            "weight": round(rnd.uniform(1.0, 80.0), 2) if heavy else round(rnd.uniform(0.5, 900.0), 1),
+            "weight_unit": "kg" if heavy else "g",
+            "description": rnd.choice(_DESCRIPTIONS),
+            "notes": rnd.choice(_NOTES),
+            "card_editor": rnd.choice(["admin", "amina", "karim", "sofiane"]),
+            "editing_date": (BASE_DATE - timedelta(days=rnd.randint(0, 365))).isoformat(),
+        }
+
+
+def _images(rnd, artifacts):
+    """(artifact_id, image_path): 0 إلى 3 صور لكل قطعة، بالتسمية القديمة {id}_{inventory}_{name} (انظر image_store.py)"""
+    for artifact_id, inventory_number in artifacts:
+        safe_inv = inventory_number.replace("/", "-")
+        for k in range(rnd.choices([0, 1, 2, 3], [30, 40, 20, 10])[0]):
+            yield artifact_id, f"{artifact_id}_{safe_inv}_IMG_{k + 1:04d}.jpg"
+
+
+def generate_catalog(db, n_artifacts, seed=1, on_progress=None):
+    """إضافة n_artifacts قطعة (مع القوائم الثابتة والصور) إلى db. يعيد {"artifacts": n, "images": n}.
+    على قاعدة فارغة: نفس seed ونفس n_artifacts = نفس البيانات بالضبط."""
+    rnd = random.Random(seed)
+    with db.transaction() as cur:
+        ids = _insert_lookups(cur, n_artifacts)
+        last_id = cur.execute("SELECT coalesce(MAX(id), 0) FROM artifacts").fetchone()[0]
+
+        def rows():
+            for i, data in enumerate(artifact_data(rnd, n_artifacts, ids), 1):
+                if on_progress and i % 100_000 == 0: on_progress(i)
+                yield data
+
+        db.insert_artifacts_many(rows())
+        # بذرة منفصلة للصور: لا تتغير الصور إذا أضيف حقل جديد للقطع
+        # القطع الجديدة تُقرأ بمؤشر ثانٍ أثناء إضافة صورها (بدون تحميلها كلها في الذاكرة)
+        added = db.get_connection().execute(
+            "SELECT id, inventory_number FROM artifacts WHERE id > ? ORDER BY id", (last_id,))
+        cur.executemany("INSERT INTO artifact_images (artifact_id, image_path) VALUES (?, ?)",
+                        _images(random.Random(seed + 1), added))
+        images = cur.execute("SELECT COUNT(*) FROM artifact_images WHERE artifact_id > ?", (last_id,)).fetchone()[0]
+    return {"artifacts": n_artifacts, "images": images}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out")
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1M or a number")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        n_artifacts = parse_scale(args.scale)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    if os.path.exists(args.out):
+        print(f"❌ {args.out} موجود مسبقاً: التوليد يحتاج قاعدة فارغة ليكون قابلاً للتكرار")
+        raise SystemExit(1)
+
+    from db import Database
+    db = Database(args.out)
+    print(f"🏺 توليد {n_artifacts:,} قطعة (seed={args.seed})...")
+    result = generate_catalog(db, n_artifacts, args.seed, on_progress=lambda i: print(f"   {i:,}"))
+    db.close_all()
+    print(f"✅ {result['artifacts']:,} قطعة و {result['images']:,} صورة في {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,48 @@
 import sys
-from PyQt5.QtWidgets import QWidget, QMessageBox, QListWidgetItem
+from PyQt5.QtWidgets import (QWidget, QMessageBox, QListWidgetItem, QFileDialog, QProgressDialog, QShortcut,
+                             QTableWidgetItem, QHeaderView, QAbstractItemView)
 from PyQt5.uic import loadUi
-from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, Qt, QObject, QRunnable, QThreadPool, QTimer
+from PyQt5.QtGui import QKeySequence
 from db import db
+from importer import ArtifactImporter, ImportCancelled
+import query_stats
+from translations import translations
+
+class ImportSignals(QObject):
+    progress = pyqtSignal(int, int, int)   # (read, inserted, rejected)
+    finished = pyqtSignal(dict)            # تقرير ArtifactImporter.run
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class ImportWorker(QRunnable):
+    """استيراد ملف CSV/XLSX في خيط خلفي؛ الإلغاء يلغي كل الاستيراد (معاملة واحدة)"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.cancel_requested = False
+        self.signals = ImportSignals()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            with db.thread_connection():
+                report = ArtifactImporter(db).run(self.path, on_progress=self.signals.progress.emit,
+                                                  is_cancelled=lambda: self.cancel_requested)
+        except ImportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(report)
 
 class SettingsWindow(QWidget):
 
+    # مستويات أولوية الصيانة لحالات الحفظ (0 = لا تحتاج صيانة، لا تظهر في التنبيهات)
+    SEVERITY_LEVELS = [0, 1, 2, 3]
 
     def __init__(self):
         super().__init__()
@@ -25,6 +62,9 @@ class SettingsWindow(QWidget):
             "أماكن التخزين": "storage_locations"
         }
 
+        self.t = translations["ar"]
+        self.fill_severity_combo()
+
         # ملء القائمة المنسدلة
         self.comboTables.addItems(self.tables_map.keys())
         # تحميل البيانات عند البدء وعند تغيير الاختيار
@@ -34,13 +74,34 @@ class SettingsWindow(QWidget):
         # ربط الأزرار
         self.btnAdd.clicked.connect(self.add_item)
         self.btnDelete.clicked.connect(self.delete_item)
-        
+        self.btnSetSeverity.clicked.connect(self.set_severity)
+        self.listItems.currentItemChanged.connect(self.on_item_selected)
+        self.btnImport.clicked.connect(self.import_file)
+
+        self.import_pool = QThreadPool(self)
+        self.import_pool.setMaxThreadCount(1)
+        self.import_worker = None
+        self.import_dialog = None
+
+        # لوحة التشخيص المخفية (Ctrl+Shift+D): عدادات قياس الاستعلامات وآخر الاستعلامات البطيئة
+        self.query_stats = db.query_stats
+        self.setup_diagnostics()
 
     def get_current_table(self):
         """معرفة اسم الجدول الإنجليزي من الاختيار العربي"""
         arabic_name = self.comboTables.currentText()
         return self.tables_map.get(arabic_name)
 
+    def is_states_table(self):
+        return self.get_current_table() == "preservation_states"
+
+    def fill_severity_combo(self):
+        current = self.comboSeverity.currentIndex()
+        self.comboSeverity.clear()
+        for level in self.SEVERITY_LEVELS:
+            self.comboSeverity.addItem(self.t[f"sev_{level}"], level)
+        self.comboSeverity.setCurrentIndex(max(current, 0))
+
     def load_current_list(self):
         """تحميل العناصر في القائمة"""
         self.listItems.clear()
@@ -48,19 +109,50 @@ class SettingsWindow(QWidget):
         
         if not table_name: return
 
-        items = db.get_list(table_name)
+        # أولوية الصيانة خاصة بحالات الحفظ
+        states = self.is_states_table()
+        for widget in (self.lblSeverity, self.comboSeverity, self.btnSetSeverity):
+            widget.setVisible(states)
+
+        items = db.get_preservation_states() if states else db.get_list(table_name)
         for item in items:
             # نخزن الـ ID داخل العنصر لنستخدمه عند الحذف
-            list_item = QListWidgetItem(item['name'])
+            text = item['name']
+            if states: text = f"{item['name']}  ({self.t['sev_%d' % item['severity']]})"
+            list_item = QListWidgetItem(text)
             list_item.setData(Qt.UserRole, item['id']) 
+            list_item.setData(Qt.UserRole + 1, item.get('severity', 0))
             self.listItems.addItem(list_item)
 
+    def on_item_selected(self, current, previous=None):
+        """عرض أولوية الحالة المحددة في القائمة المنسدلة لتعديلها"""
+        if current is None or not self.is_states_table(): return
+        index = self.comboSeverity.findData(current.data(Qt.UserRole + 1))
+        if index >= 0: self.comboSeverity.setCurrentIndex(index)
+
+    def set_severity(self):
+        current_item = self.listItems.currentItem()
+        if not current_item:
+            QMessageBox.warning(self, "تنبيه", "الرجاء تحديد حالة لتعديل أولويتها")
+            return
+
+        if db.set_state_severity(current_item.data(Qt.UserRole), self.comboSeverity.currentData()):
+            row = self.listItems.currentRow()
+            self.load_current_list()
+            self.listItems.setCurrentRow(row)
+        else:
+            QMessageBox.warning(self, "خطأ", "حدث خطأ أثناء الحفظ")
+
     def add_item(self):
         text = self.inputNewItem.text().strip()
         if not text: return
 
         table_name = self.get_current_table()
-        if db.insert_lookup(table_name, text):
+        if self.is_states_table():
+            ok = db.insert_preservation_state(text, self.comboSeverity.currentData())
+        else:
+            ok = db.insert_lookup(table_name, text)
+        if ok:
             self.inputNewItem.clear()
             self.load_current_list() # تحديث القائمة
         else:
@@ -85,6 +177,126 @@ class SettingsWindow(QWidget):
             else:
                 QMessageBox.warning(self, "خطأ", "لا يمكن حذف هذا العنصر (قد يكون مستخدماً في قطع أثرية)")
 
+    # ---------------------------------------------------------
+    #  Import (CSV / XLSX)
+    # ---------------------------------------------------------
+    def import_file(self):
+        if self.import_worker: return
+        path, _ = QFileDialog.getOpenFileName(self, self.t["btn_import"], "", "CSV / Excel (*.csv *.xlsx)")
+        if not path: return
+
+        self.import_worker = ImportWorker(path)
+        self.import_dialog = QProgressDialog(self.t["import_progress"].format(read=0, rejected=0),
+                                             self.t["btn_cancel"], 0, 0, self)
+        self.import_dialog.setWindowModality(Qt.WindowModal)
+        self.import_dialog.setMinimumDuration(0)
+        self.import_dialog.canceled.connect(self.import_worker.cancel)
+
+        signals = self.import_worker.signals
+        signals.progress.connect(self.on_import_progress)
+        signals.finished.connect(self.on_import_finished)
+        signals.failed.connect(self.on_import_failed)
+        signals.cancelled.connect(self.end_import)
+        self.btnImport.setEnabled(False)
+        self.import_pool.start(self.import_worker)
+
+    def on_import_progress(self, read, inserted, rejected):
+        if self.import_dialog:
+            self.import_dialog.setLabelText(self.t["import_progress"].format(read=read, rejected=rejected))
+
+    def on_import_finished(self, report):
+        self.end_import()
+        message = self.t["import_done"].format(**report)
+        if report["rejects_file"]:
+            message += "\n\n" + self.t["import_rejects"].format(rejected=report["rejected"], file=report["rejects_file"])
+        QMessageBox.information(self, self.t["btn_import"], message)
+        self.load_current_list()  # قد يضيف الاستيراد عناصر جديدة للقوائم
+
+    def on_import_failed(self, error):
+        self.end_import()
+        QMessageBox.warning(self, "خطأ", self.t["import_failed"].format(error=error))
+
+    def end_import(self):
+        if self.import_dialog:
+            self.import_dialog.canceled.disconnect()
+            self.import_dialog.close()
+        self.import_dialog = None
+        self.import_worker = None
+        self.btnImport.setEnabled(True)
+
+    # ---------------------------------------------------------
+    #  Diagnostics (query_stats)
+    # ---------------------------------------------------------
+    def setup_diagnostics(self):
+        if not hasattr(self, "diagnosticsPanel"): return
+        self.shortcut_diagnostics = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.shortcut_diagnostics.activated.connect(self.toggle_diagnostics)
+
+        table = self.tableQueryStats
+        table.setColumnCount(8)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.set_diagnostics_headers()
+
+        self.chkQueryStats.setChecked(self.query_stats is not None)
+        if self.query_stats: self.spinSlowMs.setValue(int(self.query_stats.slow_ms))
+        self.chkQueryStats.toggled.connect(self.toggle_query_stats)
+        self.spinSlowMs.valueChanged.connect(self.set_slow_ms)
+        self.btnRefreshStats.clicked.connect(self.refresh_diagnostics)
+        self.btnResetStats.clicked.connect(self.reset_query_stats)
+
+        # تحديث تلقائي كل ثانية ما دامت اللوحة ظاهرة
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setInterval(1000)
+        self.diagnostics_timer.timeout.connect(self.refresh_diagnostics)
+
+    def set_diagnostics_headers(self):
+        t = self.t
+        self.tableQueryStats.setHorizontalHeaderLabels([
+            t["col_method"], t["col_calls"], t["col_total_ms"], t["col_rows"], "p50", "p95", "p99", t["col_max_ms"]])
+
+    def toggle_diagnostics(self):
+        visible = not self.diagnosticsPanel.isVisible()
+        self.diagnosticsPanel.setVisible(visible)
+        if visible:
+            self.refresh_diagnostics()
+            self.diagnostics_timer.start()
+        else:
+            self.diagnostics_timer.stop()
+
+    def toggle_query_stats(self, enabled):
+        if enabled:
+            self.query_stats = query_stats.QueryStats(slow_ms=self.spinSlowMs.value())
+            db.set_query_stats(self.query_stats)
+        else:
+            # نترك آخر الأرقام معروضة في اللوحة
+            db.set_query_stats(None)
+            if self.query_stats: self.query_stats.close()
+        self.refresh_diagnostics()
+
+    def set_slow_ms(self, value):
+        if self.query_stats: self.query_stats.slow_ms = value
+
+    def reset_query_stats(self):
+        if self.query_stats: self.query_stats.reset()
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        if not self.diagnosticsPanel.isVisible(): return
+        rows = self.query_stats.summary() if self.query_stats else []
+        self.tableQueryStats.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            values = [row["method"], str(row["count"]), f"{row['total_ms']:.1f}", str(row["rows"]),
+                      f"{row['p50']:.2f}", f"{row['p95']:.2f}", f"{row['p99']:.2f}", f"{row['max_ms']:.1f}"]
+            for col, value in enumerate(values):
+                self.tableQueryStats.setItem(i, col, QTableWidgetItem(value))
+
+        self.listSlowQueries.clear()
+        if self.query_stats:
+            for at, ms, count, method, sql in reversed(self.query_stats.recent_slow):
+                self.listSlowQueries.addItem(f"{at}  {ms:.0f} ms  rows={count}  {method}  {sql[:200]}")
+
     def set_translation(self, t):
         self.pageTitle.setText(t["set_title"])
         self.label1.setText(t["lbl_choose"])
@@ -92,3 +304,16 @@ class SettingsWindow(QWidget):
         self.btnAdd.setText(t["btn_add_item"])
         self.label2.setText(t["lbl_current"])
         self.btnDelete.setText(t["btn_del_item"])
+        self.t = t
+        self.lblSeverity.setText(t["lbl_severity"])
+        self.btnSetSeverity.setText(t["btn_set_severity"])
+        self.btnImport.setText(t["btn_import"])
+        if hasattr(self, "diagnosticsPanel"):
+            self.chkQueryStats.setText(t["chk_query_stats"])
+            self.lblSlowMs.setText(t["lbl_slow_ms"])
+            self.btnRefreshStats.setText(t["btn_refresh_stats"])
+            self.btnResetStats.setText(t["btn_reset_stats"])
+            self.lblSlowQueries.setText(t["lbl_slow_queries"])
+            self.set_diagnostics_headers()
+        self.fill_severity_combo()
+        self.load_current_list()
@@ -0,0 +1,113 @@
+"""اختبار ضغط: عدة عمليات (processes) تقرأ وتكتب في نفس ملف قاعدة البيانات معاً.
+
+الاستعمال:
+    python stress_db.py [--readers 6] [--writers 3] [--seconds 10]
+                        [--artifacts 20000] [--journal-mode WAL] [--db PATH]
+
+يحاكي عدة أجهزة تتصفح قائمة الآثار بينما أجهزة أخرى تحفظ تعديلات.
+ينتهي برمز خروج 1 إذا فشلت أي عملية (مثل "database is locked")
+أو إذا لم تُكمل إحدى العمليات أي عملية خلال المدة (starvation).
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import tempfile
+import time
+
+from db import Database
+from benchmark_db import build_catalog
+
+
+def _artifact_data(rnd, n):
+    return {
+        "name": f"قطعة ضغط {n}", "inventory_number": f"S-{n}", "source": "",
+        "type_id": None, "quantity": 1, "material_id": None, "period_id": None,
+        "condition_id": None, "date": "2024-01-01", "storage_id": None,
+        "description": "", "notes": "", "weight": rnd.uniform(0, 10),
+    }
+
+
+def reader(db_path, profile, deadline, results):
+    db = Database(db_path, profile)
+    rnd = random.Random(os.getpid())
+    ops = errors = 0
+    worst = 0.0
+    max_id = db.fetch_one("SELECT MAX(id) FROM artifacts")[0] or 1
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            db.count("artifacts")
+            db.get_artifacts_by_type()
+            db.get_artifact(rnd.randint(1, max_id))
+            db.fetch_all("SELECT id, name FROM artifacts ORDER BY id DESC LIMIT 200")
+            ops += 1
+        except Exception as e:
+            errors += 1
+            print(f"❌ reader {os.getpid()}: {e}")
+        worst = max(worst, time.perf_counter() - start)
+    db.close_all()
+    results.put(("reader", os.getpid(), ops, errors, worst))
+
+
+def writer(db_path, profile, deadline, results):
+    db = Database(db_path, profile)
+    rnd = random.Random(os.getpid())
+    ops = errors = 0
+    worst = 0.0
+    n = 0
+    while time.time() < deadline:
+        n += 1
+        start = time.perf_counter()
+        new_id = db.insert_artifact(_artifact_data(rnd, f"{os.getpid()}-{n}"))
+        data = _artifact_data(rnd, f"{os.getpid()}-{n}-edit")
+        data["id"] = new_id
+        if new_id and db.update_artifact(data):
+            ops += 1
+        else:
+            errors += 1
+        worst = max(worst, time.perf_counter() - start)
+    db.close_all()
+    results.put(("writer", os.getpid(), ops, errors, worst))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--artifacts", type=int, default=20000)
+    parser.add_argument("--journal-mode", default=None)
+    parser.add_argument("--db", default=None, help="existing database file (default: temporary copy)")
+    args = parser.parse_args()
+
+    profile = {"journal_mode": args.journal_mode} if args.journal_mode else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "stress.db")
+        if not args.db:
+            db = Database(db_path, profile)
+            build_catalog(db, args.artifacts)
+            db.close_all()
+
+        results = mp.Queue()
+        deadline = time.time() + args.seconds
+        procs = [mp.Process(target=reader, args=(db_path, profile, deadline, results)) for _ in range(args.readers)]
+        procs += [mp.Process(target=writer, args=(db_path, profile, deadline, results)) for _ in range(args.writers)]
+        for p in procs: p.start()
+        rows = [results.get() for _ in procs]
+        for p in procs: p.join()
+
+    failed = False
+    print(f"{'role':<8}{'pid':>8}{'ops':>8}{'errors':>8}{'worst (ms)':>12}")
+    for role, pid, ops, errors, worst in sorted(rows):
+        print(f"{role:<8}{pid:>8}{ops:>8}{errors:>8}{worst * 1000:>12.1f}")
+        if errors or ops == 0:
+            failed = True
+
+    print("❌ FAILED" if failed else "✓ No failures, no starved process")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""معاينات صور القطع: نسخ مصغرة بأحجام ثابتة على القرص، وذاكرة مؤقتة محدودة (LRU) للصور المفكوكة.
+
+الأصل يبقى كما هو في artifact_images/. لكل صورة ولكل حجم في SIZES ملف JPEG في
+artifact_images/.previews/<الحجم>/<اسم الصورة>.jpg، يُولَّد عند حفظ الصورة في المخزن (image_store.ingest_file)
+أو عند أول طلب، ويُعاد توليده إذا كان الأصل أحدث منه.
+
+لتوليد معاينات كل الصور الموجودة مسبقاً:
+    python thumbnails.py [--force]
+"""
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QImageReader, QPainter, QPixmap
+
+IMAGES_DIR = "artifact_images"
+PREVIEWS_DIR = os.path.join(IMAGES_DIR, ".previews")
+# أطول ضلع (px) لكل حجم: thumb لقائمة صور صفحة التعديل، preview لصفحة التفاصيل (480×320 على الأقل، أكبر مع النافذة)
+SIZES = {"thumb": 256, "preview": 1024}
+JPEG_QUALITY = 85
+# حد الصور المفكوكة في الذاكرة (MB)؛ معاينة 1024×768 حوالي 3 MB
+PIXMAP_CACHE_MB = 64
+
+
+def source_path(image_path):
+    return os.path.join(IMAGES_DIR, image_path)
+
+
+def preview_path(image_path, size):
+    return os.path.join(PREVIEWS_DIR, size, image_path + ".jpg")
+
+
+def _is_fresh(path, source):
+    try:
+        return os.path.getmtime(path) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+# =========================================================
+#  Generation (QImage فقط: يعمل في أي خيط)
+# =========================================================
+
+def render_image(source, max_side):
+    """الصورة مصغرة إلى max_side (بدون تكبير) ومعدلة حسب اتجاه EXIF؛ None إذا تعذرت القراءة"""
+    reader = QImageReader(source)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and max(size.width(), size.height()) > max_side:
+        # فك الترميز مباشرة بالحجم الصغير (JPEG يُفك بـ 1/2 أو 1/4 أو 1/8 دون كل البكسلات)
+        reader.setScaledSize(size.scaled(max_side, max_side, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.hasAlphaChannel():
+        # JPEG بلا شفافية: خلفية بيضاء بدل السوداء
+        flat = QImage(image.size(), QImage.Format_RGB32)
+        flat.fill(Qt.white)
+        painter = QPainter(flat)
+        painter.drawImage(0, 0, image)
+        painter.end()
+        image = flat
+    return image
+
+
+def generate_previews(image_path, force=False):
+    """توليد أحجام SIZES الناقصة (أو الأقدم من الأصل) لصورة واحدة. يعيد عدد الملفات المولّدة.
+    الأصل يُفك مرة واحدة بأكبر حجم مطلوب، والأحجام الأصغر تُصغّر منه."""
+    source = source_path(image_path)
+    if not os.path.exists(source):
+        return 0
+    needed = [(size, side) for size, side in sorted(SIZES.items(), key=lambda s: -s[1])
+              if force or not _is_fresh(preview_path(image_path, size), source)]
+    if not needed:
+        return 0
+
+    image = render_image(source, needed[0][1])
+    if image is None:
+        print(f"⚠️ تعذرت قراءة الصورة: {source}")
+        return 0
+    made = 0
+    for size, side in needed:
+        if max(image.width(), image.height()) > side:
+            image = image.scaled(side, side, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        path = preview_path(image_path, size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # كتابة ثم إعادة تسمية: لا يُقرأ ملف نصف مكتوب أبداً
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if not image.save(tmp, "JPG", JPEG_QUALITY):
+            print(f"⚠️ فشل حفظ المعاينة: {path}")
+            if os.path.exists(tmp): os.remove(tmp)
+            continue
+        os.replace(tmp, path)
+        made += 1
+    return made
+
+
+def ensure_preview(image_path, size="preview"):
+    """مسار معاينة حديثة (تُولَّد الآن إن لزم)، أو None إذا لم يكن الأصل موجوداً أو تعذرت قراءته"""
+    source = source_path(image_path)
+    if not os.path.exists(source):
+        return None
+    path = preview_path(image_path, size)
+    if not _is_fresh(path, source):
+        generate_previews(image_path)
+    return path if os.path.exists(path) else None
+
+
+def read_fitted(image_path, width, height, size="preview"):
+    """QImage للمعاينة بحجم يدخل في width×height، مصغرة أثناء فك الترميز وليس بعده؛ None إذا لم تتوفر.
+    QImage فقط (بلا QPixmap): للاستعمال من خيط خلفي."""
+    path = ensure_preview(image_path, size)
+    if path is None: return None
+    reader = QImageReader(path)
+    reader.setQuality(100)  # تصغير ناعم بدل الأسرع
+    source = reader.size()
+    if source.isValid() and (source.width() > width or source.height() > height):
+        reader.setScaledSize(source.scaled(width, height, Qt.KeepAspectRatio))
+    image = reader.read()
+    return None if image.isNull() else image
+
+
+# =========================================================
+#  LRU pixmap cache (خيط الواجهة فقط: QPixmap)
+# =========================================================
+
+class PixmapCache:
+    """آخر الصور المفكوكة المستعملة، بحد أقصى للذاكرة (بايت). المفتاح tuple يبدأ باسم الصورة."""
+
+    def __init__(self, max_bytes=PIXMAP_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key -> (pixmap, bytes)، الأقدم استعمالاً أولاً
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items  # بدون تغيير ترتيب الاستعمال ولا العدادات
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def put(self, key, pixmap):
+        cost = pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+        if cost > self.max_bytes: return
+        old = self._items.pop(key, None)
+        if old: self.bytes -= old[1]
+        self._items[key] = (pixmap, cost)
+        self.bytes += cost
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self.bytes -= evicted
+
+    def discard(self, image_path):
+        """كل النسخ المحفوظة لصورة (بعد استبدال ملفها)"""
+        for key in [k for k in self._items if k[0] == image_path]:
+            self.bytes -= self._items.pop(key)[1]
+
+    def clear(self):
+        self._items.clear()
+        self.bytes = 0
+
+
+pixmap_cache = PixmapCache()
+
+
+def preview_pixmap(image_path, size="preview"):
+    """QPixmap للمعاينة من الذاكرة المؤقتة أو من ملفها (يُولَّد عند أول طلب)؛ None إذا لم تتوفر الصورة"""
+    key = (image_path, size)
+    pixmap = pixmap_cache.get(key)
+    if pixmap is None:
+        path = ensure_preview(image_path, size)
+        if path is None: return None
+        pixmap = QPixmap(path)
+        if pixmap.isNull(): return None
+        pixmap_cache.put(key, pixmap)
+    return pixmap
+
+
+def move(old_path, new_path):
+    """صورة غيّرت اسمها في IMAGES_DIR (نفس المحتوى): نقل معايناتها بدل توليدها من جديد"""
+    pixmap_cache.discard(old_path)
+    for size in SIZES:
+        old, new = preview_path(old_path, size), preview_path(new_path, size)
+        if os.path.exists(old) and not os.path.exists(new):
+            os.makedirs(os.path.dirname(new), exist_ok=True)
+            os.replace(old, new)
+
+
+def remove(image_path):
+    """صورة حُذفت من IMAGES_DIR: حذف معايناتها ونسخها المفكوكة"""
+    pixmap_cache.discard(image_path)
+    remove_previews(image_path)
+
+
+def remove_previews(image_path):
+    """ملفات المعاينات فقط (أي خيط)"""
+    for size in SIZES:
+        try:
+            os.remove(preview_path(image_path, size))
+        except FileNotFoundError:
+            pass
+
+
+def image_paths():
+    """كل صور IMAGES_DIR بمساراتها النسبية (بـ /): القديمة في أعلى المجلد ومخزن المحتوى ab/cd/<sha256>.ext
+    (انظر image_store.py)، بدون مجلد المعاينات وملفات النسخ المؤقتة"""
+    for root, dirs, files in os.walk(IMAGES_DIR):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        rel = os.path.relpath(root, IMAGES_DIR)
+        for name in sorted(files):
+            if name.endswith(".tmp"): continue
+            yield name if rel == "." else "/".join(rel.split(os.sep) + [name])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="regenerate previews that are already up to date")
+    args = parser.parse_args()
+
+    if not os.path.isdir(IMAGES_DIR):
+        print(f"❌ {IMAGES_DIR} غير موجود")
+        raise SystemExit(1)
+    start = time.perf_counter()
+    names = list(image_paths())
+    made = sum(generate_previews(name, args.force) for name in names)
+    print(f"✅ {len(names)} صورة، {made} معاينة مولّدة في {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
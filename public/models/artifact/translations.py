@@ -23,12 +23,30 @@ translations = {
         "chart_pie_title": "توزيع القطع حسب النوع",
         "chart_bar_title": "حالة الأصول",
         "chart_bar_label": "العدد",
+        "alerts_title": "قطع تحتاج صيانة",
+        "tbl_condition": "الحالة",
+        "tbl_restoration": "تاريخ الترميم",
+        "btn_prev": "السابق",
+        "btn_next": "التالي",
 
         # --- قائمة الآثار ---
         "list_title": "سجل المخزون الأثري",
         "search_ph": "بحث (الاسم، الكود، رقم الجرد)...",
         "btn_search": "بحث",
         "btn_new": "+ قطعة جديدة",
+        "btn_export": "تصدير 📤",
+        "flt_type": "النوع",
+        "flt_material": "المادة",
+        "flt_period": "الفترة",
+        "flt_condition": "الحالة",
+        "flt_storage": "الموقع",
+        "flt_all": "الكل",
+        "btn_clear_filters": "مسح الفلاتر ✕",
+        "export_progress": "جاري التصدير... {written} قطعة",
+        "export_done": "تم تصدير {written} قطعة إلى:\n{file}",
+        "export_failed": "فشل التصدير:\n{error}",
+        "ingest_progress": "جاري حفظ الصور... {done} / {total}",
+        "ingest_failed": "تعذر حفظ {count} من الصور:\n{files}\n\nمتابعة الحفظ بدونها؟",
         # أعمدة الجدول
         "col_inv": "رقم الجرد",
         "col_code": "الكود الآلي",
@@ -83,6 +101,27 @@ translations = {
         "btn_add_item": "إضافة",
         "lbl_current": "العناصر الحالية:",
         "btn_del_item": "حذف المحدد",
+        "lbl_severity": "أولوية الصيانة:",
+        "btn_set_severity": "تعيين الأولوية",
+        "sev_0": "لا تحتاج صيانة",
+        "sev_1": "منخفضة",
+        "sev_2": "متوسطة",
+        "sev_3": "عاجلة",
+        "btn_import": "استيراد من ملف 📥",
+        "import_progress": "جاري الاستيراد... {read} سطر ({rejected} مرفوض)",
+        "import_done": "تمت إضافة {inserted} قطعة من {read} سطر.",
+        "import_rejects": "{rejected} سطر مرفوض، التفاصيل في:\n{file}",
+        "import_failed": "فشل الاستيراد، لم يُضف أي سطر:\n{error}",
+        "chk_query_stats": "قياس الاستعلامات",
+        "lbl_slow_ms": "حد الاستعلام البطيء (ms):",
+        "btn_refresh_stats": "تحديث",
+        "btn_reset_stats": "تصفير",
+        "lbl_slow_queries": "آخر الاستعلامات البطيئة:",
+        "col_method": "الدالة",
+        "col_calls": "العدد",
+        "col_total_ms": "المجموع (ms)",
+        "col_rows": "الصفوف",
+        "col_max_ms": "الأقصى (ms)",
         
         # --- المستخدمين ---
         "users_title": "إدارة المستخدمين",
@@ -121,12 +160,30 @@ translations = {
         "chart_pie_title": "Répartition par type",
         "chart_bar_title": "État des actifs",
         "chart_bar_label": "Nombre",
+        "alerts_title": "Objets à entretenir",
+        "tbl_condition": "État",
+        "tbl_restoration": "Date de restauration",
+        "btn_prev": "Précédent",
+        "btn_next": "Suivant",
         
         # --- List ---
         "list_title": "Registre des Artefacts",
         "search_ph": "Rechercher (Nom, Code, Inv)...",
         "btn_search": "Chercher",
         "btn_new": "+ Nouveau",
+        "btn_export": "Exporter 📤",
+        "flt_type": "Type",
+        "flt_material": "Matériau",
+        "flt_period": "Période",
+        "flt_condition": "État",
+        "flt_storage": "Stockage",
+        "flt_all": "Tous",
+        "btn_clear_filters": "Effacer les filtres ✕",
+        "export_progress": "Exportation... {written} objets",
+        "export_done": "{written} objets exportés vers :\n{file}",
+        "export_failed": "Échec de l'exportation :\n{error}",
+        "ingest_progress": "Enregistrement des images... {done} / {total}",
+        "ingest_failed": "{count} image(s) n'ont pas pu être enregistrées :\n{files}\n\nContinuer sans elles ?",
         "col_inv": "N° Inventaire",
         "col_code": "Code Sys",
         "col_name": "Nom",
@@ -180,6 +237,27 @@ translations = {
         "btn_add_item": "Ajouter",
         "lbl_current": "Éléments actuels:",
         "btn_del_item": "Supprimer",
+        "lbl_severity": "Priorité d'entretien:",
+        "btn_set_severity": "Définir la priorité",
+        "sev_0": "Aucun entretien",
+        "sev_1": "Faible",
+        "sev_2": "Moyenne",
+        "sev_3": "Urgente",
+        "btn_import": "Importer un fichier 📥",
+        "import_progress": "Importation... {read} lignes ({rejected} rejetées)",
+        "import_done": "{inserted} objets ajoutés sur {read} lignes.",
+        "import_rejects": "{rejected} lignes rejetées, détails dans :\n{file}",
+        "import_failed": "Échec de l'importation, aucune ligne ajoutée :\n{error}",
+        "chk_query_stats": "Mesurer les requêtes",
+        "lbl_slow_ms": "Seuil requête lente (ms) :",
+        "btn_refresh_stats": "Actualiser",
+        "btn_reset_stats": "Réinitialiser",
+        "lbl_slow_queries": "Dernières requêtes lentes :",
+        "col_method": "Méthode",
+        "col_calls": "Nombre",
+        "col_total_ms": "Total (ms)",
+        "col_rows": "Lignes",
+        "col_max_ms": "Max (ms)",
 
         # --- Users ---
         "users_title": "Gestion des utilisateurs",
@@ -1,5 +1,4 @@
 import sys
-import bcrypt
 from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import QWidget, QTableWidgetItem, QMessageBox
 from PyQt5.uic import loadUi
@@ -45,6 +44,7 @@ class UsersWindow(QWidget):
             return
 
         # تشفير كلمة المرور
+        import bcrypt
         hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
         if db.add_user(username, hashed_pw, role):